@@ -6,6 +6,34 @@ class Config:
     SECRET_KEY = os.environ.get("QA_SECRET_KEY", secrets.token_hex(24))
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
+    # 登入 token 是否內嵌權限、部門與授權版本（版本不符時仍會回到資料庫驗證）
+    JWT_EMBED_CLAIMS = os.environ.get("QA_JWT_EMBED_CLAIMS", "1") == "1"
+    
+    # 用戶可訪問部門快取
+    ACCESS_CACHE_TTL_SECONDS = 300
+    ACCESS_CACHE_MAX_USERS = 1024
+    
+    # 已認證用戶快取（依 token），用戶、角色或部門變更時主動失效
+    PRINCIPAL_CACHE_TTL_SECONDS = 300
+    PRINCIPAL_CACHE_MAX_ENTRIES = 4096
+    
+    # 篩選選單計數快取（依可見範圍），允許短時間內的計數延遲
+    FACET_CACHE_TTL_SECONDS = 60
+    FACET_CACHE_MAX_ENTRIES = 256
+    
+    # 問題詳情快取（依問題與用戶權限指紋），問題或回覆變更時主動失效
+    DETAIL_CACHE_TTL_SECONDS = 300
+    DETAIL_CACHE_MAX_ENTRIES = 512
+    
+    # 密碼雜湊（bcrypt）執行緒數與排隊上限，超過上限的登入請求直接返回忙碌
+    PASSWORD_HASH_WORKERS = 2
+    PASSWORD_HASH_MAX_PENDING = 64
+    
+    # 批次匯入問題的單檔列數上限
+    IMPORT_MAX_ROWS = 5000
+    
+    # 頁面 ETag 的版本字串，部署新版模板時變更可讓瀏覽器快取的頁面全部失效
+    ETAG_SALT = os.environ.get("QA_ETAG_SALT", "1")
     
     # Web服務配置
     HOST = "172.20.11.22"
@@ -9,8 +9,15 @@ from app.models.user import User
 from app.models.role import Role
 from app.models.department import Department
 from app.config import settings
+from app.cache import TTLCache
+from sqlalchemy import or_
+from typing import NamedTuple, Optional
 import functools
+import hashlib
 import logging
+import secrets
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -24,51 +31,235 @@ def get_token_from_cookie(request: Request):
     return None
 
 
+class PrincipalDepartment(NamedTuple):
+    """已認證用戶所屬的部門（唯讀）"""
+    id: int
+    code: Optional[str]
+    name: str
+    parent_id: Optional[int] = None
+
+    @property
+    def is_bureau(self):
+        """判斷是否為局/處級單位"""
+        return bool(self.code) and self.code.endswith('00')
+
+    @property
+    def bureau_code(self):
+        """獲取局/處代碼（前兩位）"""
+        return self.code[:2] if self.code else None
+
+
+class PrincipalRole(NamedTuple):
+    """已認證用戶的角色（唯讀）"""
+    id: int
+    name: str
+    permissions: tuple
+
+
+class Principal(NamedTuple):
+    """
+    已認證的用戶（唯讀），依 token 快取，可在請求間共用
+
+    提供路由與模板使用的 User 屬性，另含預先算好的權限集合與可訪問部門 ID。
+    """
+    id: int
+    username: str
+    full_name: Optional[str]
+    email: Optional[str]
+    is_active: bool
+    department_id: Optional[int]
+    department: Optional[PrincipalDepartment]
+    roles: tuple
+    departments: tuple
+    permissions: frozenset
+    accessible_department_ids: frozenset
+
+
+# 已認證用戶快取，鍵為 token 的 SHA-256，值為 (Principal, token 到期時間戳)
+_principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+
+def _principal_department(department):
+    return PrincipalDepartment(department.id, department.code, department.name, department.parent_id)
+
+
+def build_principal(user, db):
+    """由 User（已載入角色與部門）建立 Principal"""
+    primary = None
+    if user.department_id:
+        primary = next((dept for dept in user.departments if dept.id == user.department_id), None)
+        if primary is None:
+            primary = db.get(Department, user.department_id)
+    roles = tuple(
+        PrincipalRole(role.id, role.name, tuple(role.permissions or ()))
+        for role in user.roles
+    )
+    return Principal(
+        id=user.id,
+        username=user.username,
+        full_name=user.full_name,
+        email=user.email,
+        is_active=user.is_active,
+        department_id=user.department_id,
+        department=_principal_department(primary) if primary else None,
+        roles=roles,
+        departments=tuple(_principal_department(dept) for dept in user.departments),
+        permissions=frozenset(permission for role in roles for permission in role.permissions),
+        accessible_department_ids=get_accessible_department_ids(user, db),
+    )
+
+
+# 授權版本：每個行程啟動時的隨機前綴、全域版本（角色或部門變更）與各用戶版本（用戶資料變更）。
+# token 中的版本與目前版本相同時才直接採用 token 內的權限與部門，否則改由資料庫載入；
+# 行程重啟或多個 worker 之間版本不同時一律回到資料庫，不會誤用過時的權限。
+_AUTHORIZATION_EPOCH = secrets.token_hex(4)
+_authorization_lock = threading.Lock()
+_global_authorization_version = 0
+_user_authorization_versions = {}
+
+
+def authorization_version(user_id):
+    """取得用戶目前的授權版本字串"""
+    with _authorization_lock:
+        return f"{_AUTHORIZATION_EPOCH}.{_global_authorization_version}.{_user_authorization_versions.get(user_id, 0)}"
+
+
+def _bump_authorization_version(user_id=None):
+    global _global_authorization_version
+    with _authorization_lock:
+        if user_id is None:
+            _global_authorization_version += 1
+        else:
+            _user_authorization_versions[user_id] = _user_authorization_versions.get(user_id, 0) + 1
+
+
+def authorization_claims(principal):
+    """
+    將 Principal 的權限與部門編成 token claims
+
+    具有 manage_all 或 manage_departments 權限時可訪問所有部門，以 "*" 表示，不逐一列出。
+    """
+    def department_claim(dept):
+        return [dept.id, dept.code, dept.name, dept.parent_id]
+
+    all_departments = bool(principal.permissions & {"manage_all", "manage_departments"})
+    return {
+        "uid": principal.id,
+        "av": authorization_version(principal.id),
+        "fn": principal.full_name,
+        "act": principal.is_active,
+        "dept": department_claim(principal.department) if principal.department else None,
+        "roles": [[role.id, role.name, list(role.permissions)] for role in principal.roles],
+        "depts": [department_claim(dept) for dept in principal.departments],
+        "acc": "*" if all_departments else sorted(principal.accessible_department_ids),
+    }
+
+
+def principal_from_claims(payload, db):
+    """
+    由 token claims 建立 Principal，授權版本不符或沒有 claims 時返回 None
+
+    "*"（可訪問所有部門）時以一個查詢取得部門 ID 並依用戶快取，其餘情況不查詢資料庫。
+    """
+    if not settings.JWT_EMBED_CLAIMS or "av" not in payload or "uid" not in payload:
+        return None
+    user_id = payload["uid"]
+    if payload["av"] != authorization_version(user_id):
+        logger.debug("用戶 ID=%s 的 token 授權版本已過期，改由資料庫載入", user_id)
+        return None
+
+    accessible_ids = payload.get("acc") or []
+    if accessible_ids == "*":
+        accessible_ids = _accessible_departments_cache.get(user_id)
+        if accessible_ids is None:
+            accessible_ids = frozenset(row.id for row in db.query(Department.id))
+            _accessible_departments_cache.set(user_id, accessible_ids)
+
+    roles = tuple(PrincipalRole(role_id, name, tuple(permissions)) for role_id, name, permissions in payload.get("roles", []))
+    department = payload.get("dept")
+    return Principal(
+        id=user_id,
+        username=payload["sub"],
+        full_name=payload.get("fn"),
+        email=None,
+        is_active=payload.get("act", True),
+        department_id=department[0] if department else None,
+        department=PrincipalDepartment(*department) if department else None,
+        roles=roles,
+        departments=tuple(PrincipalDepartment(*dept) for dept in payload.get("depts", [])),
+        permissions=frozenset(permission for role in roles for permission in role.permissions),
+        accessible_department_ids=frozenset(accessible_ids),
+    )
+
+
+def authenticate_token(token, db):
+    """
+    驗證 token 並取得 Principal，token 無效或用戶不存在時返回 None
+
+    快取命中時不解碼 JWT 也不查詢資料庫；未命中時若 token 帶有版本相符的授權 claims
+    （JWT_EMBED_CLAIMS），直接由 claims 建立 Principal，否則查詢用戶。快取項目最晚在 token 到期時失效。
+    """
+    if not token:
+        return None
+    key = hashlib.sha256(token.encode()).hexdigest()
+    cached = _principal_cache.get(key)
+    if cached is not None:
+        principal, expires_at = cached
+        if expires_at > time.time():
+            return principal
+        _principal_cache.pop(key)
+        return None
+
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        logger.debug("Token 解碼失敗")
+        return None
+    username = payload.get("sub")
+    if username is None:
+        logger.debug("Token 中未找到用戶名")
+        return None
+
+    principal = principal_from_claims(payload, db)
+    if principal is None:
+        # 使用 joinedload 預加載關聯關係
+        user = db.query(User).options(
+            joinedload(User.roles),
+            joinedload(User.departments)
+        ).filter(User.username == username).first()
+        if user is None:
+            logger.warning("未找到用戶 %s", username)
+            return None
+        principal = build_principal(user, db)
+
+    _principal_cache.set(key, (principal, payload.get("exp", float("inf"))))
+    return principal
+
+
+def invalidate_principal_cache(user_id=None):
+    """
+    清除已認證用戶快取
+
+    Args:
+        user_id: 只清除指定用戶的所有 token；為 None 時清除全部（角色或部門變更時使用）
+    """
+    if user_id is None:
+        _principal_cache.clear()
+    else:
+        _principal_cache.evict(lambda entry: entry[0].id == user_id)
+
+
 # 自定義依賴來獲取當前請求，並檢查是否需要重定向
-async def get_current_user_with_request(
+def get_current_user_with_request(
     request: Request,
     db: Session = Depends(get_db)
 ):
-    token = get_token_from_cookie(request)
     is_web_request = request.headers.get("accept", "").startswith("text/html")
     
-    if not token:
-        if is_web_request:
-            return RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="無效的認證憑證",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-    
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            if is_web_request:
-                return RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="無效的認證憑證",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-    except JWTError:
-        if is_web_request:
-            return RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="無效的認證憑證",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-    
-    user = db.query(User).options(
-        joinedload(User.roles),
-        joinedload(User.departments)
-    ).filter(User.username == username).first()
-    
+    user = authenticate_token(get_token_from_cookie(request), db)
     if user is None:
         if is_web_request:
             return RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
@@ -85,56 +276,20 @@ async def get_current_user_with_request(
 # 用於向後兼容的 get_current_user 函數
 def get_current_user(db: Session = Depends(get_db), token: str = Depends(get_token_from_cookie)):
     """原始的獲取當前用戶函數，僅用於兼容現有代碼"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="無效的認證憑證",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    if not token:
-        raise credentials_exception
-    
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    # 使用 joinedload 預加載關聯關係
-    user = db.query(User).options(
-        joinedload(User.roles),
-        joinedload(User.departments)
-    ).filter(User.username == username).first()
-    
+    user = authenticate_token(token, db)
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="無效的認證憑證",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
     return user
 
 
 def get_current_user_optional(request: Request, db: Session = Depends(get_db)):
     """獲取當前用戶，如果未登入則返回None"""
-    token = get_token_from_cookie(request)
-    if not token:
-        return None
-    
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-    except JWTError:
-        return None
-    
-    # 使用 joinedload 預加載關聯關係
-    user = db.query(User).options(
-        joinedload(User.roles),
-        joinedload(User.departments)
-    ).filter(User.username == username).first()
-    
-    return user
+    return authenticate_token(get_token_from_cookie(request), db)
 
 
 def has_permission(user, permission):
@@ -151,6 +306,9 @@ def has_permission(user, permission):
     if not user:
         return False
     
+    if isinstance(user, Principal):
+        return permission in user.permissions
+    
     # 檢查用戶的所有角色是否有所需權限
     for role in user.roles:
         if permission in role.permissions:
@@ -198,40 +356,15 @@ def permission_required(required_permission: str, department_id: int = None):
 
 def check_page_permission(required_permission: str, request: Request, db: Session, department_id: int = None):
     """檢查頁面權限的輔助函數"""
-    token = get_token_from_cookie(request)
-    if not token:
-        logger.debug("未找到 token，重定向到登錄頁面")
-        return None, RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
-    
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            logger.debug("Token 中未找到用戶名，重定向到登錄頁面")
-            return None, RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
-    except JWTError:
-        logger.debug("Token 解碼失敗，重定向到登錄頁面")
-        return None, RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
-            
-    user = db.query(User).filter(User.username == username).first()
+    user = authenticate_token(get_token_from_cookie(request), db)
     if user is None:
-        logger.warning("未找到用戶，重定向到登錄頁面")
+        logger.debug("未登入或 token 無效，重定向到登錄頁面")
         return None, RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
     
-    # 載入相關資料
-    _ = user.roles
-    _ = user.departments
-    
     logger.debug("用戶請求權限: %s", required_permission)
             
     # 檢查用戶角色是否有所需權限
-    has_permission = False
-    for role in user.roles:
-        if required_permission in role.permissions:
-            has_permission = True
-            break
-    
-    if not has_permission:
+    if required_permission not in user.permissions:
         logger.info("用戶權限不足，重定向到首頁")
         return None, RedirectResponse(url="/", status_code=status.HTTP_302_FOUND)
     
@@ -253,39 +386,82 @@ def page_permission_required(required_permission: str, department_id: int = None
     return dependency
 
 
+# 用戶可訪問部門 ID 集合的快取，鍵為用戶 ID
+_accessible_departments_cache = TTLCache(
+    maxsize=settings.ACCESS_CACHE_MAX_USERS,
+    ttl=settings.ACCESS_CACHE_TTL_SECONDS
+)
+
+
+def get_accessible_department_ids(user, db):
+    """
+    獲取用戶可訪問的部門 ID 集合
+
+    規則與逐一檢查部門相同：用戶所屬的部門、用戶所屬局/處底下的所有部門；
+    具有 manage_all 或 manage_departments 權限的用戶可訪問所有部門。
+    結果會依用戶 ID 快取，用戶、角色或部門資料變更時需呼叫 invalidate_access_cache。
+
+    Returns:
+        frozenset: 可訪問的部門 ID
+    """
+    if isinstance(user, Principal):
+        return user.accessible_department_ids
+
+    cached = _accessible_departments_cache.get(user.id)
+    if cached is not None:
+        return cached
+
+    if has_permission(user, "manage_all") or has_permission(user, "manage_departments"):
+        department_ids = frozenset(row.id for row in db.query(Department.id))
+    else:
+        department_ids = {dept.id for dept in user.departments}
+        bureau_codes = {dept.bureau_code for dept in user.departments if dept.is_bureau}
+        if bureau_codes:
+            # 用戶屬於局/處級單位時，可訪問該局/處底下的所有部門
+            rows = db.query(Department.id).filter(
+                or_(*[Department.code.like(f"{code}%") for code in bureau_codes])
+            )
+            department_ids.update(row.id for row in rows)
+        department_ids = frozenset(department_ids)
+
+    logger.debug("用戶 ID=%s 可訪問的部門 IDs: %s", user.id, sorted(department_ids))
+    _accessible_departments_cache.set(user.id, department_ids)
+    return department_ids
+
+
+def get_accessible_departments(user, db):
+    """獲取用戶可訪問的部門物件列表（單一查詢）"""
+    department_ids = get_accessible_department_ids(user, db)
+    if not department_ids:
+        return []
+    return db.query(Department).filter(Department.id.in_(department_ids)).all()
+
+
+def invalidate_access_cache(user_id=None):
+    """
+    清除可訪問部門快取與已認證用戶快取
+
+    用戶、角色與部門的寫入都會呼叫此函數，快取的 Principal 因此不會保留過時的權限。
+
+    Args:
+        user_id: 只清除指定用戶；為 None 時清除全部（角色或部門變更時使用）
+    """
+    if user_id is None:
+        _accessible_departments_cache.clear()
+    else:
+        _accessible_departments_cache.pop(user_id)
+    # Principal 含有可訪問部門，一併清除；token 內的授權 claims 也隨版本遞增而失效
+    invalidate_principal_cache(user_id)
+    _bump_authorization_version(user_id)
+
+
 def can_access_department(user, department_id, db):
     """檢查用戶是否有權限訪問指定部門"""
-    logger.debug("檢查用戶是否有權限訪問部門 ID=%s", department_id)
-    
     # 如果用戶有 manage_all 權限，允許訪問所有部門
     if has_permission(user, "manage_all"):
-        logger.debug("用戶具有 manage_all 權限，允許訪問所有部門")
-        return True
-    
-    # 獲取目標部門
-    target_dept = db.query(Department).filter(Department.id == department_id).first()
-    if not target_dept:
-        logger.warning("部門 ID=%s 不存在", department_id)
-        return False
-    
-    # 檢查用戶是否直接屬於該部門
-    for dept in user.departments:
-        # 如果用戶屬於目標部門
-        if dept.id == department_id:
-            logger.debug("用戶直接屬於目標部門，允許訪問")
-            return True
-        # 如果用戶屬於目標部門的父部門（局/處級）
-        if dept.is_bureau and target_dept.bureau_code == dept.bureau_code:
-            logger.debug("用戶屬於父部門，允許訪問子部門")
-            return True
-    
-    # 管理部門的權限
-    if has_permission(user, "manage_departments"):
-        logger.debug("用戶具有 manage_departments 權限，允許訪問所有部門")
         return True
-    
-    logger.info("用戶無權訪問部門 ID=%s", department_id)
-    return False
+
+    return department_id in get_accessible_department_ids(user, db)
 
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
@@ -307,3 +483,16 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
+
+
+def create_login_token(user, db, expires_delta: timedelta = None):
+    """
+    登入時建立訪問令牌
+
+    啟用 JWT_EMBED_CLAIMS 時 token 另含權限、部門與授權版本，
+    其他 worker 或快取過期後也不必查詢用戶即可判斷權限。
+    """
+    data = {"sub": user.username}
+    if settings.JWT_EMBED_CLAIMS:
+        data.update(authorization_claims(build_principal(user, db)))
+    return create_access_token(data=data, expires_delta=expires_delta)
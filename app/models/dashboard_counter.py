@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.database import Base
+
+class DashboardCounter(Base):
+    """
+    儀表板計數
+
+    每個局/處一組計數，bureau_id 為 0 時代表全系統合計（一個問題可能同時指派給多個局/處）。
+    name 為計數名稱：pending（待回覆）、answered（已回覆未結案）、closed（已結案），
+    以及每週回覆數 replies:YYYY-Www。
+    """
+    __tablename__ = "dashboard_counters"
+
+    bureau_id = Column(Integer, primary_key=True)
+    name = Column(String(20), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
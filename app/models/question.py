@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Table
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Table, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -9,7 +9,9 @@ question_report_department = Table(
     "question_report_department",
     Base.metadata,
     Column("question_id", Integer, ForeignKey("questions.id"), primary_key=True),
-    Column("department_id", Integer, ForeignKey("departments.id"), primary_key=True)
+    Column("department_id", Integer, ForeignKey("departments.id"), primary_key=True),
+    # 主鍵為 (question_id, department_id)，反向索引供依部門查詢問題使用
+    Index("ix_question_report_department_department", "department_id", "question_id")
 )
 
 # 問題-回答部門多對多關聯表
@@ -17,7 +19,8 @@ question_answer_department = Table(
     "question_answer_department",
     Base.metadata,
     Column("question_id", Integer, ForeignKey("questions.id"), primary_key=True),
-    Column("department_id", Integer, ForeignKey("departments.id"), primary_key=True)
+    Column("department_id", Integer, ForeignKey("departments.id"), primary_key=True),
+    Index("ix_question_answer_department_department", "department_id", "question_id")
 )
 
 class QuestionStatus(enum.Enum):
@@ -38,6 +41,8 @@ class Question(Base):
     summary = Column(Text, nullable=True)
     closed_date = Column(DateTime, nullable=True)
     creator_id = Column(Integer, ForeignKey("users.id"))
+    # 樂觀鎖版本，每次修改問題時遞增；更新時以 WHERE version = :expected_version 檢查是否被他人修改
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     # 問題創建者
     creator = relationship("User", foreign_keys=[creator_id])
@@ -58,3 +63,8 @@ class Question(Base):
     
     # 問題的回覆
     reports = relationship("Report", back_populates="question", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # 列表依年度、狀態篩選並依建立日期排序
+        Index("ix_questions_year_status_created", "year", "status", "created_date"),
+    )
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
+from app.database import Base
+
+class QuestionListView(Base):
+    """
+    問題列表的反正規化資料表
+
+    每個問題一筆，預先算好列表與匯出頁面需要的狀態、回覆統計與部門名稱，
+    由 app.services.list_view 建立的觸發器在問題、回覆、部門關聯異動時逐筆更新。
+    """
+    __tablename__ = "question_list_view"
+
+    id = Column(Integer, primary_key=True)  # 與 questions.id 相同
+    version = Column(Integer, nullable=False, default=1)  # 每次重新計算時遞增，用於 ETag
+    question_version = Column(Integer, nullable=False, default=1)  # questions.version，列表頁結案時送回以檢查衝突
+    title = Column(String, nullable=False)
+    year = Column(Integer, nullable=True)
+    question_date = Column(DateTime, nullable=True)
+    created_date = Column(DateTime, nullable=True)
+    status = Column(String, nullable=True)  # 統一為小寫的 QuestionStatus 值
+    display_status = Column(String, nullable=True)  # 列表顯示用狀態（PENDING / ANSWERED / CLOSED）
+    summary = Column(Text, nullable=True)
+    closed_date = Column(DateTime, nullable=True)
+    creator_id = Column(Integer, nullable=True)
+    reply_count = Column(Integer, nullable=False, default=0)
+    first_reply_date = Column(DateTime, nullable=True)
+    # 部門列表，格式為 [{"id", "code", "name", "parent_id"}, ...]
+    report_departments = Column(JSON, nullable=False, default=list)
+    answer_departments = Column(JSON, nullable=False, default=list)
+
+    __table_args__ = (
+        Index("ix_question_list_view_created", "created_date", "id"),
+        Index("ix_question_list_view_year_status_created", "year", "status", "created_date"),
+    )
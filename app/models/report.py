@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -16,3 +16,9 @@ class Report(Base):
     question = relationship("Question", back_populates="reports")
     user = relationship("User", back_populates="reports")
     department = relationship("Department", backref="reports")
+
+    __table_args__ = (
+        # 問題詳情依回覆日期列出回覆
+        Index("ix_reports_question_reply_date", "question_id", "reply_date"),
+        Index("ix_reports_department_id", "department_id"),
+    )
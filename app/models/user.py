@@ -1,9 +1,7 @@
 from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Table
 from sqlalchemy.orm import relationship
 from app.database import Base
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.services.passwords import hash_password, verify_password
 
 # 用戶-角色多對多關聯表
 user_role = Table(
@@ -47,9 +45,7 @@ class User(Base):
     reports = relationship("Report", back_populates="user")
 
     def set_password(self, password):
-        self.password_hash = pwd_context.hash(password)
+        self.password_hash = hash_password(password)
 
     def verify_password(self, password):
-        if not self.password_hash:
-            return False
-        return pwd_context.verify(password, self.password_hash) 
\ No newline at end of file
+        return verify_password(password, self.password_hash) 
\ No newline at end of file
@@ -0,0 +1,32 @@
+import json
+from datetime import date, datetime
+
+from fastapi.responses import JSONResponse
+
+# orjson 為選用套件：有安裝時使用較快的序列化，否則退回標準 json
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"無法序列化的型別: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    API 用 JSON 回應
+
+    直接序列化傳入的字典與列表（不經過 jsonable_encoder），日期時間轉為 ISO 8601 字串，
+    中文不跳脫。
+    """
+
+    def render(self, content):
+        if orjson is not None:
+            return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(
+            content, default=_default, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
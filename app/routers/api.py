@@ -0,0 +1,120 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+import logging
+
+from app.database import get_db
+from app.dependencies import get_current_user, has_permission, get_accessible_department_ids
+from app.models.user import User
+from app.responses import FastJSONResponse
+from app.services.dates import typed_text
+from app.services.facets import question_facets
+from app.services.list_view import load_department_list
+from app.services.pagination import clamp_page_size, decode_cursor, paginate_rows
+from app.services.question_queries import build_question_list_query, parse_int
+
+router = APIRouter()
+
+# 可透過 fields= 選取的欄位（皆為 question_list_view 的欄位）
+QUESTION_FIELDS = (
+    "id", "title", "year", "question_date", "created_date", "status", "display_status",
+    "summary", "closed_date", "creator_id", "reply_count", "first_reply_date",
+    "report_departments", "answer_departments",
+)
+DEPARTMENT_FIELDS = {"report_departments", "answer_departments"}
+
+
+def parse_fields(fields):
+    """解析 fields= 參數，未指定時返回全部欄位，有未知欄位時返回 400"""
+    if not fields or not fields.strip():
+        return list(QUESTION_FIELDS)
+    selected = []
+    for field in fields.split(","):
+        field = field.strip()
+        if not field or field in selected:
+            continue
+        if field not in QUESTION_FIELDS:
+            raise HTTPException(status_code=400, detail=f"不支援的欄位: {field}")
+        selected.append(field)
+    return selected
+
+
+@router.get("/questions", response_class=FastJSONResponse)
+def list_questions_api(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    status: Optional[str] = None,
+    department_id: Optional[str] = None,
+    year: Optional[str] = None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    page_size: Optional[int] = None,
+    fields: Optional[str] = None
+):
+    """
+    問題列表 JSON API（唯讀）
+
+    篩選條件與問題列表頁相同，以 after / before 游標分頁，fields 以逗號分隔選取欄位。
+    """
+    if not has_permission(current_user, "read_question"):
+        raise HTTPException(status_code=403, detail="權限不足")
+
+    selected_fields = parse_fields(fields)
+    page_size = clamp_page_size(page_size)
+    backward = bool(before) and not after
+    cursor = decode_cursor(before if backward else after)
+
+    accessible_departments = frozenset()
+    if not has_permission(current_user, "manage_all"):
+        accessible_departments = get_accessible_department_ids(current_user, db)
+
+    # 只查詢選取的欄位，游標需要的 id 與 created_date 一律取出
+    columns = list(dict.fromkeys(["id", "created_date"] + selected_fields))
+    sql, params = build_question_list_query(
+        current_user,
+        accessible_departments,
+        status=status,
+        department_id=parse_int(department_id, "部門 ID"),
+        year=parse_int(year, "年份"),
+        cursor=cursor,
+        backward=backward,
+        page_size=page_size,
+        columns=", ".join(columns)
+    )
+    # 日期欄位由查詢型別直接轉為 datetime，回應統一輸出 ISO 8601 格式
+    rows = db.execute(typed_text(sql), params).fetchall()
+    rows, prev_cursor, next_cursor = paginate_rows(rows, page_size, cursor, backward)
+
+    items = []
+    for row in rows:
+        mapping = row._mapping
+        item = {}
+        for field in selected_fields:
+            value = mapping[field]
+            if field in DEPARTMENT_FIELDS:
+                value = load_department_list(value)
+            item[field] = value
+        items.append(item)
+
+    logging.info(f"API 問題列表: 用戶={current_user.username}, 筆數={len(items)}")
+    return FastJSONResponse({
+        "items": items,
+        "page_size": page_size,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    })
+
+
+@router.get("/questions/facets", response_class=FastJSONResponse)
+def question_facets_api(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """用戶可見問題依狀態、年度、部門的計數（與列表篩選選單相同，已快取）"""
+    if not has_permission(current_user, "read_question"):
+        raise HTTPException(status_code=403, detail="權限不足")
+
+    accessible_departments = frozenset()
+    if not has_permission(current_user, "manage_all"):
+        accessible_departments = get_accessible_department_ids(current_user, db)
+    return FastJSONResponse(question_facets(db, current_user, accessible_departments))
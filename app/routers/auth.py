@@ -13,21 +13,17 @@ from app.database import get_db
 from app.models.user import User
 from app.models.role import Role
 from app.models.department import Department
-from passlib.context import CryptContext
-from app.dependencies import create_access_token, get_current_user
+from app.services.passwords import PasswordHashBusy, verify_password_async
+from app.dependencies import create_login_token, get_current_user, invalidate_access_cache
 from app.config import settings
 from app.templates import templates
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 router = APIRouter()
 
 # 設置日誌
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
 @router.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
     return templates.TemplateResponse("auth/login.html", {"request": request})
@@ -38,14 +34,22 @@ async def login(
     db: Session = Depends(get_db)
 ):
     user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not user.verify_password(form_data.password):
+    if not user:
+        raise HTTPException(status_code=401, detail="帳號或密碼錯誤")
+    
+    # bcrypt 驗證在雜湊執行緒池中排隊執行，不阻塞其他請求
+    try:
+        password_ok = await verify_password_async(form_data.password, user.password_hash)
+    except PasswordHashBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    if not password_ok:
         raise HTTPException(status_code=401, detail="帳號或密碼錯誤")
     
     if not user.is_active:
         raise HTTPException(status_code=401, detail="帳號已停用")
     
-    access_token = create_access_token(
-        data={"sub": user.username},
+    access_token = create_login_token(
+        user, db,
         expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     response = RedirectResponse(url="/", status_code=303)
@@ -186,8 +190,11 @@ async def sso_login(
                     else:
                         logger.warning(f"找不到單位代碼為 {unit_code} 的部門")
                 
+                # SSO 登入可能更新了用戶的部門與角色
+                invalidate_access_cache(user.id)
+                
                 # 創建訪問令牌
-                access_token = create_access_token(data={"sub": account})
+                access_token = create_login_token(user, db)
                 response = RedirectResponse(url="/", status_code=303)
                 response.set_cookie(
                     key="access_token",
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, RedirectResponse
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.dependencies import page_permission_required, has_permission, get_accessible_departments
+from app.models.department import Department
+from app.services.counters import ALL_BUREAUS, load_dashboard_counters
+
+router = APIRouter()
+templates = Jinja2Templates(directory="templates")
+templates.env.globals["has_permission"] = has_permission
+
+EMPTY_COUNTERS = {"pending": 0, "answered": 0, "closed": 0, "replies_this_week": 0}
+
+
+@router.get("/", response_class=HTMLResponse)
+def dashboard(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user = Depends(page_permission_required("read_question"))
+):
+    # 如果 current_user 是 RedirectResponse，直接返回它
+    if isinstance(current_user, RedirectResponse):
+        return current_user
+
+    # 只讀取預先維護的計數，不掃描問題與回覆資料表
+    if has_permission(current_user, "manage_all"):
+        counters = load_dashboard_counters(db)
+        totals = counters.pop(ALL_BUREAUS, EMPTY_COUNTERS)
+        bureaus = []
+        if counters:
+            bureaus = db.query(Department).filter(Department.id.in_(counters.keys())).order_by(Department.code).all()
+    else:
+        bureaus = [
+            dept for dept in get_accessible_departments(current_user, db)
+            if dept.code.endswith('00')
+        ]
+        bureaus.sort(key=lambda dept: dept.code)
+        counters = load_dashboard_counters(db, [dept.id for dept in bureaus])
+        # 一個問題可能指派給多個局/處，各局/處計數相加會重複計算，可訪問多個局/處時只顯示各局/處的計數
+        totals = None
+        if len(bureaus) <= 1:
+            totals = counters.get(bureaus[0].id, EMPTY_COUNTERS) if bureaus else EMPTY_COUNTERS
+
+    show_totals = totals is not None
+    totals = totals or EMPTY_COUNTERS
+    return templates.TemplateResponse(
+        "dashboard.html",
+        {
+            "request": request,
+            "current_user": current_user,
+            "show_totals": show_totals,
+            "open_questions": totals["pending"],
+            "answered_questions": totals["answered"],
+            "closed_questions": totals["closed"],
+            "replies_this_week": totals["replies_this_week"],
+            "bureau_counters": [
+                (dept, counters.get(dept.id, EMPTY_COUNTERS)) for dept in bureaus
+            ],
+        }
+    )
@@ -4,7 +4,8 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.database import get_db
 from app.models.department import Department
-from app.dependencies import permission_required
+from app.dependencies import permission_required, invalidate_access_cache
+from app.services.question_detail import invalidate_question_detail
 from app.models.user import User
 from fastapi.templating import Jinja2Templates
 
@@ -12,7 +13,7 @@ router = APIRouter()
 templates = Jinja2Templates(directory="templates")
 
 @router.get("/", response_class=HTMLResponse)
-async def list_departments(
+def list_departments(
     request: Request,
     error: str = None,
     db: Session = Depends(get_db),
@@ -46,7 +47,7 @@ async def list_departments(
     )
 
 @router.get("/create", response_class=HTMLResponse)
-async def create_department_page(
+def create_department_page(
     request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(permission_required("manage_departments"))
@@ -64,7 +65,7 @@ async def create_department_page(
     )
 
 @router.post("/create")
-async def create_department(
+def create_department(
     request: Request,
     code: str = Form(...),
     name: str = Form(...),
@@ -121,11 +122,13 @@ async def create_department(
     )
     db.add(new_department)
     db.commit()
+    # 新部門可能落在既有用戶的局/處範圍內
+    invalidate_access_cache()
     
     return RedirectResponse(url="/departments", status_code=303)
 
 @router.get("/{department_id}/edit", response_class=HTMLResponse)
-async def edit_department_page(
+def edit_department_page(
     department_id: int,
     request: Request,
     db: Session = Depends(get_db),
@@ -149,7 +152,7 @@ async def edit_department_page(
     )
 
 @router.post("/{department_id}/edit")
-async def edit_department(
+def edit_department(
     department_id: int,
     request: Request,
     name: str = Form(...),
@@ -163,11 +166,14 @@ async def edit_department(
     # 更新部門名稱
     department.name = name
     db.commit()
+    invalidate_question_detail()
+    # 已認證用戶的 Principal 與可訪問部門快取含有部門資料
+    invalidate_access_cache()
     
     return RedirectResponse(url="/departments", status_code=303)
 
 @router.post("/{department_id}/delete")
-async def delete_department(
+def delete_department(
     department_id: int,
     request: Request,
     db: Session = Depends(get_db),
@@ -251,6 +257,8 @@ async def delete_department(
         # 刪除部門
         db.delete(department)
         db.commit()
+        invalidate_question_detail()
+        invalidate_access_cache()
     except Exception as e:
         db.rollback()
         return templates.TemplateResponse(
@@ -5,14 +5,20 @@ from io import BytesIO
 import openpyxl
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import exists, and_, or_, desc
+from sqlalchemy import exists, and_, desc, text
 
 from app.database import get_db
 from app.models.question import Question, QuestionStatus
+from app.models.question_list_view import QuestionListView
 from app.models.department import Department
 from app.models.report import Report
 from app.models.user import User
-from app.dependencies import permission_required, can_access_department
+from app.dependencies import permission_required, has_permission, get_accessible_department_ids
+from app.services.question_queries import build_question_filters, parse_int
+from app.services.facets import question_facets
+from app.services.search import apply_keyword_search
+from app.templates import stream_template
+from app.view_models import LIST_ITEM_FIELDS, QuestionListItem
 from fastapi.templating import Jinja2Templates
 import logging
 
@@ -21,8 +27,11 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
 
+# 查詢結果串流輸出時每批從資料庫讀取的筆數
+SEARCH_FETCH_SIZE = 200
+
 @router.get("/", response_class=HTMLResponse)
-async def export_index(
+def export_index(
     request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(permission_required("export_questions"))
@@ -36,6 +45,12 @@ async def export_index(
     # 獲取所有可能的狀態
     statuses = [status.value for status in QuestionStatus]
     
+    # 篩選選單的計數（依用戶可見範圍快取）
+    accessible_departments = frozenset()
+    if not has_permission(current_user, "manage_all"):
+        accessible_departments = get_accessible_department_ids(current_user, db)
+    facets = question_facets(db, current_user, accessible_departments)
+    
     return templates.TemplateResponse(
         "export/index.html",
         {
@@ -43,12 +58,13 @@ async def export_index(
             "current_user": current_user,
             "departments": all_departments,
             "current_year": current_year,
-            "statuses": statuses
+            "statuses": statuses,
+            "facets": facets
         }
     )
 
 @router.get("/search", response_class=HTMLResponse)
-async def search_questions(
+def search_questions(
     request: Request,
     department_id: Optional[str] = None,
     year: Optional[str] = None,
@@ -57,83 +73,23 @@ async def search_questions(
     db: Session = Depends(get_db),
     current_user: User = Depends(permission_required("export_questions"))
 ):
-    # 初始化查詢
-    query = db.query(Question)
-    
-    # 部門過濾邏輯
-    if department_id and department_id.strip():
-        try:
-            dept_id = int(department_id)
-            department = db.query(Department).filter(Department.id == dept_id).first()
-            
-            if department:
-                logger.debug("過濾部門: ID=%s", dept_id)
-                
-                # 檢查權限
-                if not can_access_department(current_user, dept_id, db):
-                    logger.info("用戶無權訪問部門 ID: %s", dept_id)
-                else:
-                    # 過濾與此部門關聯的問題
-                    query = query.filter(
-                        or_(
-                            Question.report_departments.any(Department.id == dept_id),
-                            Question.answer_departments.any(Department.id == dept_id)
-                        )
-                    )
-        except ValueError:
-            logger.warning("無效的部門 ID: %s", department_id)
-    else:
-        # 如果沒有指定部門，則只顯示用戶有權限的部門的問題
-        accessible_departments = []
-        for dept in db.query(Department).all():
-            if can_access_department(current_user, dept.id, db):
-                accessible_departments.append(dept.id)
-        
-        if accessible_departments:
-            # 過濾出用戶有權限的部門的問題
-            query = query.filter(
-                or_( 
-                    Question.report_departments.any(Department.id.in_(accessible_departments)),
-                    Question.answer_departments.any(Department.id.in_(accessible_departments))
-                )
-            )
-    
-    # 年份過濾邏輯
-    if year and year.strip():
-        try:
-            year_int = int(year)
-            query = query.filter(Question.year == year_int)
-            selected_year = year_int
-        except ValueError:
-            selected_year = None
-    else:
-        selected_year = None
+    # 權限、部門、年份與狀態過濾全部交由資料庫處理
+    selected_year = parse_int(year, "年份")
+    query = visible_questions_query(db, current_user, department_id, selected_year, status)
     
-    # 狀態過濾邏輯
-    if status and status.strip() and status != "all":
-        try:
-            # 將字符串轉換為 QuestionStatus 枚舉
-            status_enum = QuestionStatus(status)
-            query = query.filter(Question.status == status_enum)
-        except (ValueError, KeyError):
-            logger.warning("無效的狀態值: %s", status)
+    # 關鍵字搜尋（全文檢索，依相關度排序）
+    query = apply_keyword_search(db, query, keyword, id_column=QuestionListView.id)
     
-    # 關鍵字搜尋
-    if keyword and keyword.strip():
-        search_term = f"%{keyword.strip()}%"
-        query = query.filter(
-            or_(
-                Question.title.like(search_term),
-                Question.content.like(search_term),
-                Question.summary.like(search_term)
-            )
-        )
+    # 先計算筆數供頁首顯示，結果列在渲染時才分批從資料庫讀取
+    total = query.order_by(None).count()
     
     # 按創建日期降序排序
-    query = query.order_by(desc(Question.created_date))
-    
-    # 執行查詢
-    questions = query.all()
+    query = query.order_by(desc(QuestionListView.created_date))
+    # 只取模板需要的欄位，逐批轉為 QuestionListItem，不建立 ORM 物件
+    rows = query.with_entities(
+        *(getattr(QuestionListView, field) for field in LIST_ITEM_FIELDS)
+    ).yield_per(SEARCH_FETCH_SIZE)
+    questions = (QuestionListItem.from_row(row) for row in rows)
     
     # 獲取所有部門（用於部門過濾選擇）
     all_departments = db.query(Department).all()
@@ -144,11 +100,14 @@ async def search_questions(
     # 獲取所有可能的狀態
     statuses = [status.value for status in QuestionStatus]
     
-    return templates.TemplateResponse(
+    # 串流輸出，大量結果不必先組成整頁 HTML
+    return stream_template(
+        templates,
         "export/search_results.html",
         {
             "request": request, 
             "questions": questions, 
+            "total": total, 
             "current_user": current_user, 
             "departments": all_departments, 
             "current_year": current_year, 
@@ -165,7 +124,7 @@ def export_all_questions(
     db: Session = Depends(get_db),
     current_user: User = Depends(permission_required("export_questions"))
 ):
-    questions = db.query(Question).all()
+    questions = with_question_content(db.query(QuestionListView)).all()
     return export_questions_to_excel(questions, db)
 
 @router.get("/questions/filtered")
@@ -177,90 +136,55 @@ def export_filtered_questions(
     db: Session = Depends(get_db),
     current_user: User = Depends(permission_required("export_questions"))
 ):
-    # 初始化查詢
-    query = db.query(Question)
+    # 權限、部門、年份與狀態過濾全部交由資料庫處理
+    query = visible_questions_query(db, current_user, department_id, parse_int(year, "年份"), status)
     
-    # 部門過濾邏輯
-    if department_id and department_id.strip():
-        try:
-            dept_id = int(department_id)
-            department = db.query(Department).filter(Department.id == dept_id).first()
-            
-            if department:
-                # 檢查權限
-                if not can_access_department(current_user, dept_id, db):
-                    pass
-                else:
-                    # 過濾與此部門關聯的問題
-                    query = query.filter(
-                        or_(
-                            Question.report_departments.any(Department.id == dept_id),
-                            Question.answer_departments.any(Department.id == dept_id)
-                        )
-                    )
-        except ValueError:
-            pass
-    else:
-        # 如果沒有指定部門，則只顯示用戶有權限的部門的問題
-        accessible_departments = []
-        for dept in db.query(Department).all():
-            if can_access_department(current_user, dept.id, db):
-                accessible_departments.append(dept.id)
-        
-        if accessible_departments:
-            # 過濾出用戶有權限的部門的問題
-            query = query.filter(
-                or_( 
-                    Question.report_departments.any(Department.id.in_(accessible_departments)),
-                    Question.answer_departments.any(Department.id.in_(accessible_departments))
-                )
-            )
-    
-    # 年份過濾邏輯
-    if year and year.strip():
-        try:
-            year_int = int(year)
-            query = query.filter(Question.year == year_int)
-        except ValueError:
-            pass
-    
-    # 狀態過濾邏輯
-    if status and status.strip() and status != "all":
-        try:
-            # 將字符串轉換為 QuestionStatus 枚舉
-            status_enum = QuestionStatus(status)
-            query = query.filter(Question.status == status_enum)
-        except (ValueError, KeyError):
-            logger.warning("無效的狀態值: %s", status)
-    
-    # 關鍵字搜尋
-    if keyword and keyword.strip():
-        search_term = f"%{keyword.strip()}%"
-        query = query.filter(
-            or_(
-                Question.title.like(search_term),
-                Question.content.like(search_term),
-                Question.summary.like(search_term)
-            )
-        )
+    # 關鍵字搜尋（全文檢索，依相關度排序）
+    query = apply_keyword_search(db, query, keyword, id_column=QuestionListView.id)
     
     # 按創建日期降序排序
-    query = query.order_by(desc(Question.created_date))
+    query = query.order_by(desc(QuestionListView.created_date))
     
-    # 執行查詢
-    questions = query.all()
+    # 執行查詢（Excel 需要問題內容，一併從問題資料表取出）
+    questions = with_question_content(query).all()
     
     return export_questions_to_excel(questions, db)
 
+def visible_questions_query(db, current_user, department_id, year, status):
+    """建立用戶可見且符合篩選條件的問題查詢"""
+    # 具有 manage_all 權限的用戶不需要計算可訪問部門
+    accessible_departments = frozenset()
+    if not has_permission(current_user, "manage_all"):
+        accessible_departments = get_accessible_department_ids(current_user, db)
+    
+    clauses, params = build_question_filters(
+        current_user,
+        accessible_departments,
+        status=status,
+        department_id=parse_int(department_id, "部門 ID"),
+        year=year,
+        table=QuestionListView.__tablename__
+    )
+    
+    # 狀態與部門名稱已預先存在列表資料表中，不需再載入關聯
+    query = db.query(QuestionListView)
+    if clauses:
+        query = query.filter(text(" AND ".join(clauses))).params(**params)
+    return query
+
+def with_question_content(query):
+    """在列表資料表查詢上加入問題內容欄位（匯出 Excel 用）"""
+    return query.join(Question, Question.id == QuestionListView.id).add_columns(Question.content)
+
 def export_questions_to_excel(questions, db):
     wb = openpyxl.Workbook()
     ws = wb.active
     ws.append(["ID", "年度", "問題日期", "建立日期", "標題", "內容", "填報單位", "回答單位", "摘要", "狀態", "結案日期"])
 
-    for q in questions:
+    for q, content in questions:
         # 獲取填報部門和回答部門的名稱
-        report_depts = ", ".join([d.name for d in q.report_departments]) if hasattr(q, 'report_departments') else ""
-        answer_depts = ", ".join([d.name for d in q.answer_departments]) if hasattr(q, 'answer_departments') else ""
+        report_depts = ", ".join([d["name"] for d in q.report_departments])
+        answer_depts = ", ".join([d["name"] for d in q.answer_departments])
         
         ws.append([
             q.id, 
@@ -268,11 +192,11 @@ def export_questions_to_excel(questions, db):
             q.question_date.strftime('%Y-%m-%d') if q.question_date else "",
             q.created_date.strftime('%Y-%m-%d') if q.created_date else "",
             q.title,
-            q.content,
+            content,
             report_depts,
             answer_depts,
             q.summary if q.summary else "",
-            q.status.value if q.status else "",
+            q.status or "",
             q.closed_date.strftime('%Y-%m-%d') if q.closed_date else ""
         ])
 
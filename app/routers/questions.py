@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Form, status, UploadFile, File
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
@@ -8,14 +9,26 @@ from sqlalchemy import exists, and_, or_, desc, text
 from sqlalchemy.exc import IntegrityError
 import logging
 
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models.question import Question, QuestionStatus
 from app.models.department import Department
 from app.models.role import Role
-from app.schemas.question import QuestionCreate, QuestionUpdate
-from app.dependencies import get_current_user, page_permission_required, permission_required, can_access_department, has_permission
+from app.schemas.question import QuestionBulkClose, QuestionBulkReassign, QuestionCreate, QuestionUpdate
+from app.dependencies import get_current_user, page_permission_required, permission_required, can_access_department, has_permission, get_accessible_department_ids, get_accessible_departments
 from app.models.user import User
 from app.models.report import Report
+from app.services.pagination import clamp_page_size, decode_cursor, paginate_rows, PAGE_SIZE_OPTIONS
+from app.services.question_queries import build_question_list_query, parse_int
+from app.services.counters import question_bureaus, question_state, record_state_change, record_state_changes
+from app.services.dates import typed_text
+from app.services.question_bulk import BulkOperationError, bulk_close_questions, bulk_reassign_questions, load_bulk_targets
+from app.services.question_links import sync_department_links
+from app.services.question_import import ImportFileError, import_questions, iter_import_rows
+from app.services.question_detail import build_question_detail, cache_question_detail, cached_question_detail, invalidate_question_detail, visible_question_row
+from app.services.facets import invalidate_facet_cache, question_facets
+from app.services.etag import departments_signature, etag_headers, etag_matches, make_etag, not_modified, permission_fingerprint
+from app.templates import stream_template
+from app.view_models import LIST_ITEM_FIELDS, QuestionDetail, QuestionListItem, department_view
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
@@ -27,29 +40,32 @@ def create_question(
     db: Session = Depends(get_db),
     current_user: User = Depends(permission_required("create_question"))
 ):
-    # 檢查用戶是否有權限訪問所有指定的部門
-    for dept_id in question.report_department_ids + question.answer_department_ids:
-        # 檢查部門是否為處層級
-        department = db.query(Department).filter(Department.id == dept_id).first()
-        if not department or not department.code.endswith('00'):
+    report_dept_ids = list(dict.fromkeys(question.report_department_ids))
+    answer_dept_ids = list(dict.fromkeys(question.answer_department_ids))
+    
+    # 以一個查詢檢查所有指定的部門是否為處層級
+    all_dept_ids = list(dict.fromkeys(report_dept_ids + answer_dept_ids))
+    dept_codes = dict(
+        db.query(Department.id, Department.code).filter(Department.id.in_(all_dept_ids)).all()
+    ) if all_dept_ids else {}
+    accessible_ids = get_accessible_department_ids(current_user, db)
+    for dept_id in all_dept_ids:
+        code = dept_codes.get(dept_id)
+        if not code or not code.endswith('00'):
             raise HTTPException(
                 status_code=400,
                 detail=f"部門 ID={dept_id} 不是處層級部門"
             )
         
         # 檢查權限
-        if not can_access_department(current_user, dept_id, db):
+        if dept_id not in accessible_ids:
             raise HTTPException(
                 status_code=403,
                 detail=f"用戶無權訪問部門 ID={dept_id}"
             )
     
-    # 檢查是否有重複的部門 ID
-    report_dept_set = set(question.report_department_ids)
-    answer_dept_set = set(question.answer_department_ids)
-    
     # 檢查報告部門和回答部門是否有重複
-    if report_dept_set.intersection(answer_dept_set):
+    if set(report_dept_ids).intersection(answer_dept_ids):
         raise HTTPException(
             status_code=400,
             detail="同一個部門不能同時是報告部門和回答部門"
@@ -61,68 +77,55 @@ def create_question(
     question_date = question.question_date or datetime.now().date()
     
     try:
-        # 使用 text() 函數來聲明 SQL 語句
-        from sqlalchemy import text
-        
-        # 創建問題
-        sql = text("""
-            INSERT INTO questions (title, content, year, question_date, created_date, status, creator_id)
-            VALUES (:title, :content, :year, :question_date, :created_date, :status, :creator_id)
-            RETURNING id
-        """)
-        
-        result = db.execute(
-            sql,
-            {
-                "title": question.title,
-                "content": question.content,
-                "year": year,
-                "question_date": question_date,
-                "created_date": datetime.utcnow(),
-                "status": "pending",  # 使用小寫的枚舉值
-                "creator_id": current_user.id
-            }
-        )
-        
-        # 獲取新創建的問題 ID
-        question_id = result.scalar_one()
-        
-        # 添加報告部門關聯
-        for dept_id in question.report_department_ids:
-            try:
-                insert_sql = text("""
-                    INSERT INTO question_report_department (question_id, department_id)
-                    VALUES (:question_id, :department_id)
-                """)
-                
+        # 問題與部門關聯在同一個 savepoint 中寫入，任何一步失敗都整筆回滾
+        with db.begin_nested():
+            # 創建問題（日期參數以統一格式寫入）
+            sql = typed_text("""
+                INSERT INTO questions (title, content, year, question_date, created_date, status, creator_id)
+                VALUES (:title, :content, :year, :question_date, :created_date, :status, :creator_id)
+                RETURNING id
+            """)
+            
+            result = db.execute(
+                sql,
+                {
+                    "title": question.title,
+                    "content": question.content,
+                    "year": year,
+                    "question_date": question_date,
+                    "created_date": datetime.utcnow(),
+                    "status": "pending",  # 使用小寫的枚舉值
+                    "creator_id": current_user.id
+                }
+            )
+            
+            # 獲取新創建的問題 ID
+            question_id = result.scalar_one()
+            
+            # 以 executemany 添加報告部門與回答部門關聯
+            if report_dept_ids:
                 db.execute(
-                    insert_sql,
-                    {"question_id": question_id, "department_id": dept_id}
+                    text("""
+                        INSERT INTO question_report_department (question_id, department_id)
+                        VALUES (:question_id, :department_id)
+                    """),
+                    [{"question_id": question_id, "department_id": dept_id} for dept_id in report_dept_ids]
                 )
-                db.flush()
-            except Exception as e:
-                logging.error(f"添加報告部門關聯時發生錯誤: {str(e)}")
-                # 繼續處理其他部門，不中斷流程
-        
-        # 添加回答部門關聯
-        for dept_id in question.answer_department_ids:
-            try:
-                insert_sql = text("""
-                    INSERT INTO question_answer_department (question_id, department_id)
-                    VALUES (:question_id, :department_id)
-                """)
-                
+            if answer_dept_ids:
                 db.execute(
-                    insert_sql,
-                    {"question_id": question_id, "department_id": dept_id}
+                    text("""
+                        INSERT INTO question_answer_department (question_id, department_id)
+                        VALUES (:question_id, :department_id)
+                    """),
+                    [{"question_id": question_id, "department_id": dept_id} for dept_id in answer_dept_ids]
                 )
-                db.flush()
-            except Exception as e:
-                logging.error(f"添加回答部門關聯時發生錯誤: {str(e)}")
-                # 繼續處理其他部門，不中斷流程
+            
+            # 更新儀表板計數（回答部門皆為處層級，直接作為局/處）
+            record_state_changes(db, [(answer_dept_ids, None, "pending")])
         
         # 提交事務
         db.commit()
+        invalidate_facet_cache()
         
         # 返回創建的問題 ID
         return {"success": True, "question_id": question_id}
@@ -130,27 +133,6 @@ def create_question(
     except Exception as e:
         db.rollback()
         logging.error(f"創建問題時發生錯誤: {str(e)}")
-        
-        # 嘗試清理可能部分創建的問題
-        try:
-            # 檢查錯誤消息中是否包含問題 ID
-            import re
-            match = re.search(r'question_id, department_id\)\s+VALUES\s+\((\d+),', str(e))
-            if match:
-                problem_question_id = int(match.group(1))
-                
-                # 刪除問題及其關聯 - 分別執行每個 SQL 語句
-                db.execute(text("DELETE FROM question_report_department WHERE question_id = :question_id"), 
-                          {"question_id": problem_question_id})
-                db.execute(text("DELETE FROM question_answer_department WHERE question_id = :question_id"), 
-                          {"question_id": problem_question_id})
-                db.execute(text("DELETE FROM questions WHERE id = :question_id"), 
-                          {"question_id": problem_question_id})
-                db.commit()
-                logging.info(f"已刪除不完整的問題記錄 ID={problem_question_id}")
-        except Exception as cleanup_error:
-            logging.error(f"清理不完整問題記錄時發生錯誤: {str(cleanup_error)}")
-        
         raise HTTPException(
             status_code=500,
             detail=f"創建問題時發生錯誤: {str(e)}"
@@ -159,187 +141,111 @@ def create_question(
 @router.get("/", response_class=HTMLResponse)
 async def list_questions(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(page_permission_required("read_question")),
     status: Optional[str] = None,
     department_id: Optional[str] = None,
-    year: Optional[str] = None
+    year: Optional[str] = None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    page_size: Optional[int] = None
 ):
     # 如果 current_user 是 RedirectResponse，直接返回它
     if isinstance(current_user, RedirectResponse):
         return current_user
-    
-    logging.info(f"請求參數: status={status}, department_id={department_id}, year={year}")
-    
+
+    return await db.run_sync(
+        render_question_list, request, current_user, status, department_id, year, after, before, page_size
+    )
+
+def render_question_list(db, request, current_user, status, department_id, year, after, before, page_size):
+    """問題列表的查詢與渲染，以同步 Session 撰寫，由 AsyncSession.run_sync 執行"""
+    logging.info(f"請求參數: status={status}, department_id={department_id}, year={year}, after={after}, before={before}, page_size={page_size}")
+
+    # 分頁參數：after 取下一頁，before 取上一頁
+    page_size = clamp_page_size(page_size)
+    backward = bool(before) and not after
+    cursor = decode_cursor(before if backward else after)
+
+    # 模板需要的分頁與篩選資訊
+    pagination = {
+        "page_size": page_size,
+        "page_size_options": PAGE_SIZE_OPTIONS,
+        "next_cursor": None,
+        "prev_cursor": None,
+        "selected_status": status or "",
+        "selected_department_id": department_id or "",
+    }
+
     try:
-        # 獲取用戶可訪問的部門 ID 列表
-        accessible_departments = []
-        for dept in db.query(Department).all():
-            if can_access_department(current_user, dept.id, db):
-                accessible_departments.append(dept.id)
-        
-        logging.info(f"用戶可訪問的部門 IDs: {accessible_departments}")
-        
-        if not accessible_departments:
-            # 沒有權限訪問任何部門
-            logging.warning("用戶無權訪問任何部門")
-            questions = []
-            return templates.TemplateResponse(
-                "questions/list.html",
-                {"request": request, "questions": questions, "current_user": current_user, "departments": [], "current_year": datetime.now().year, "selected_year": None}
+        # 具有 manage_all 權限的用戶可以看到所有問題，不需要計算可訪問部門
+        accessible_departments = frozenset()
+        if not has_permission(current_user, "manage_all"):
+            # 獲取用戶可訪問的部門 ID 集合（已快取）
+            accessible_departments = get_accessible_department_ids(current_user, db)
+
+            if not accessible_departments:
+                # 沒有權限訪問任何部門
+                logging.warning("用戶無權訪問任何部門")
+                questions = []
+                return templates.TemplateResponse(
+                    "questions/list.html",
+                    {"request": request, "questions": questions, "current_user": current_user, "departments": [], "current_year": datetime.now().year, "selected_year": None, **pagination}
+                )
+
+        # 權限、狀態、部門與年度過濾全部交由資料庫處理，狀態、回覆與部門名稱都已預先算好，只需查詢列表資料表
+        def page_query(columns):
+            return build_question_list_query(
+                current_user,
+                accessible_departments,
+                status=status,
+                department_id=parse_int(department_id, "部門 ID"),
+                year=parse_int(year, "年份"),
+                cursor=cursor,
+                backward=backward,
+                page_size=page_size,
+                columns=columns
             )
-        
-        # 使用原始 SQL 查詢獲取所有問題
-        from sqlalchemy import text
-        
-        # 構建基本查詢
-        sql_query = """
-            SELECT * FROM questions
-            ORDER BY created_date DESC
-        """
-        
-        # 執行查詢
-        result = db.execute(text(sql_query))
-        rows = result.fetchall()
-        
-        # 將結果轉換為字典列表
-        all_questions = []
-        for row in rows:
-            question_dict = dict(row._mapping)
-            question_dict['report_departments'] = []
-            question_dict['answer_departments'] = []
-            
-            # 確保日期欄位是可用的格式
-            # 將字串日期轉換為日期對象，或者設為 None
-            for date_field in ['question_date', 'created_date', 'closed_date']:
-                if date_field in question_dict and question_dict[date_field] is not None:
-                    if isinstance(question_dict[date_field], str):
-                        try:
-                            # 嘗試解析日期字串
-                            question_dict[date_field] = datetime.fromisoformat(question_dict[date_field].replace('Z', '+00:00'))
-                        except (ValueError, AttributeError):
-                            # 如果解析失敗，設為 None
-                            question_dict[date_field] = None
-            
-            all_questions.append(question_dict)
-        
-        # 獲取問題的報告部門和回答部門
-        for question in all_questions:
-            # 獲取報告部門
-            report_dept_query = """
-                SELECT d.* FROM departments d
-                JOIN question_report_department qrd ON d.id = qrd.department_id
-                WHERE qrd.question_id = :question_id
-            """
-            report_depts = db.execute(text(report_dept_query), {"question_id": question['id']}).fetchall()
-            question['report_departments'] = [dict(dept._mapping) for dept in report_depts]
-            
-            # 獲取回答部門
-            answer_dept_query = """
-                SELECT d.* FROM departments d
-                JOIN question_answer_department qad ON d.id = qad.department_id
-                WHERE qad.question_id = :question_id
-            """
-            answer_depts = db.execute(text(answer_dept_query), {"question_id": question['id']}).fetchall()
-            question['answer_departments'] = [dict(dept._mapping) for dept in answer_depts]
-        
-        # 手動過濾用戶有權限的部門的問題
-        filtered_questions = []
-        for question in all_questions:
-            # 檢查用戶是否有權限訪問該問題的任一填報部門或回答部門
-            has_access = False
-            
-            # 如果用戶有 manage_all 權限，允許訪問所有問題
-            if has_permission(current_user, "manage_all"):
-                has_access = True
-            else:
-                # 檢查填報部門
-                for dept in question['report_departments']:
-                    if dept['id'] in accessible_departments:
-                        has_access = True
-                        break
-                
-                # 如果沒有權限訪問填報部門，檢查回答部門
-                if not has_access:
-                    for dept in question['answer_departments']:
-                        if dept['id'] in accessible_departments:
-                            has_access = True
-                            break
-            
-            # 狀態過濾
-            if status and has_access:
-                if status == "open" and question['status'] == 'closed':
-                    has_access = False
-                elif status == "closed" and question['status'] != 'closed':
-                    has_access = False
-            
-            # 部門過濾
-            if department_id and department_id.strip() and has_access:
-                try:
-                    dept_id = int(department_id)
-                    # 檢查是否有指定的部門
-                    department = db.query(Department).filter(Department.id == dept_id).first()
-                    if not department:
-                        logging.warning(f"找不到部門 ID: {dept_id}")
-                        has_access = False
-                    else:
-                        logging.info(f"過濾部門: ID={dept_id}, 名稱={department.name}")
-                        
-                        # 檢查權限
-                        if not can_access_department(current_user, dept_id, db):
-                            logging.warning(f"用戶無權訪問部門 ID: {dept_id}")
-                            has_access = False
-                        else:
-                            # 檢查問題是否與此部門關聯
-                            dept_related = False
-                            for dept in question['report_departments']:
-                                if dept['id'] == dept_id:
-                                    dept_related = True
-                                    break
-                            
-                            if not dept_related:
-                                for dept in question['answer_departments']:
-                                    if dept['id'] == dept_id:
-                                        dept_related = True
-                                        break
-                            
-                            has_access = has_access and dept_related
-                except ValueError:
-                    logging.warning(f"無效的部門 ID: {department_id}")
-            
-            # 年份過濾
-            if year and year.strip() and has_access:
-                try:
-                    year_int = int(year)
-                    logging.info(f"過濾年份: {year_int}")
-                    if question['year'] != year_int:
-                        has_access = False
-                except ValueError:
-                    logging.warning(f"無效的年份: {year}")
-            
-            if has_access:
-                # 為每個問題添加一個 display_status 屬性
-                if question['status'] == 'closed' and not question.get('closed_date'):
-                    # 如果狀態是 closed 但沒有關閉日期，根據是否有回覆調整顯示狀態
-                    has_reports = db.query(exists().where(Report.question_id == question['id'])).scalar()
-                    question['display_status'] = 'ANSWERED' if has_reports else 'PENDING'
-                else:
-                    # 將小寫狀態轉換為大寫
-                    status_map = {'pending': 'PENDING', 'answered': 'ANSWERED', 'closed': 'CLOSED'}
-                    question['display_status'] = status_map.get(question['status'], question['status'].upper() if question['status'] else '')
-                
-                # 添加一些模板可能需要的方法
-                question['get_report_departments'] = lambda q=question: q['report_departments']
-                question['get_answer_departments'] = lambda q=question: q['answer_departments']
-                
-                filtered_questions.append(question)
-        
+
+        # 篩選選單的計數（已快取），也是頁面內容的一部分
+        facets = question_facets(db, current_user, accessible_departments)
+
+        def page_etag(page_versions):
+            # 以本頁（含判斷下一頁的多一筆）問題的 ID 與版本組成 ETag
+            return make_etag(
+                "questions",
+                permission_fingerprint(current_user, accessible_departments),
+                request.url.query,
+                datetime.now().year,
+                departments_signature(db),
+                [tuple(row) for row in page_versions],
+                facets
+            )
+
+        sql_query, params = page_query(", ".join(LIST_ITEM_FIELDS + ("version",)))
+        if request.headers.get("if-none-match"):
+            # 用戶端有快取時先只查 ID 與版本，內容未變就不必載入資料列
+            version_sql, version_params = page_query("id, version")
+            etag = page_etag(db.execute(text(version_sql), version_params).fetchall())
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            rows = db.execute(typed_text(sql_query), params).fetchall()
+        else:
+            # 沒有快取時直接查詢完整資料列，ETag 由同一批資料列計算，不另外查詢
+            rows = db.execute(typed_text(sql_query), params).fetchall()
+            etag = page_etag([(row.id, row.version) for row in rows])
+
+        rows, pagination["prev_cursor"], pagination["next_cursor"] = paginate_rows(rows, page_size, cursor, backward)
+
+        # 資料列在模板渲染時才逐筆轉換
+        filtered_questions = iter_question_list_items(rows)
+
         # 獲取所有部門（用於部門過濾選擇）
         all_departments = db.query(Department).all()
-        
+
         # 獲取當前年度
         current_year = datetime.now().year
-        
+
         # 獲取選定的年份
         selected_year = None
         if year and year.strip():
@@ -347,27 +253,35 @@ async def list_questions(
                 selected_year = int(year)
             except ValueError:
                 pass
-        
-        return templates.TemplateResponse(
+
+        # 串流輸出，頁首不必等整個列表渲染完成
+        return stream_template(
+            templates,
             "questions/list.html",
-            {"request": request, "questions": filtered_questions, "current_user": current_user, "departments": all_departments, "current_year": current_year, "selected_year": selected_year}
+            {"request": request, "questions": filtered_questions, "current_user": current_user, "departments": all_departments, "current_year": current_year, "selected_year": selected_year, "facets": facets, **pagination},
+            headers=etag_headers(etag)
         )
-    
+
     except Exception as e:
         logging.error(f"列出問題時發生錯誤: {str(e)}")
         # 獲取所有部門（用於部門過濾選擇）
         all_departments = db.query(Department).all()
-        
+
         # 獲取當前年度
         current_year = datetime.now().year
-        
+
         return templates.TemplateResponse(
             "questions/list.html",
-            {"request": request, "questions": [], "current_user": current_user, "departments": all_departments, "current_year": current_year, "selected_year": None, "error": f"載入問題時發生錯誤: {str(e)}"}
+            {"request": request, "questions": [], "current_user": current_user, "departments": all_departments, "current_year": current_year, "selected_year": None, "error": f"載入問題時發生錯誤: {str(e)}", **pagination}
         )
 
+def iter_question_list_items(rows):
+    """將列表資料表的資料列逐筆轉換為模板使用的 QuestionListItem"""
+    for row in rows:
+        yield QuestionListItem.from_row(row)
+
 @router.get("/create", response_class=HTMLResponse)
-async def create_question_page(
+def create_question_page(
     request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(permission_required("create_question"))
@@ -376,11 +290,9 @@ async def create_question_page(
     if isinstance(current_user, RedirectResponse):
         return current_user
     
-    # 確保用戶部門信息已加載
-    if hasattr(current_user, 'department_id') and current_user.department_id:
-        # 加載用戶主要部門信息
-        department = db.query(Department).filter(Department.id == current_user.department_id).first()
-        current_user.department = department
+    # 用戶主要部門已包含在 current_user.department 中
+    if current_user.department_id:
+        department = current_user.department
         logging.info(f"用戶 {current_user.username} 的部門ID={current_user.department_id}, 部門名稱={department.name if department else 'None'}")
     else:
         logging.warning(f"用戶 {current_user.username} 沒有設定department_id")
@@ -405,177 +317,184 @@ async def create_question_page(
         }
     )
 
-@router.get("/{question_id}", response_class=HTMLResponse)
-async def get_question(
-    question_id: int,
+@router.get("/import", response_class=HTMLResponse)
+async def import_questions_page(
     request: Request,
-    db: Session = Depends(get_db),
-    current_user = Depends(page_permission_required("read_question"))
+    current_user: User = Depends(permission_required("create_question"))
 ):
     # 如果 current_user 是 RedirectResponse，直接返回它
     if isinstance(current_user, RedirectResponse):
         return current_user
     
-    # 使用原始 SQL 查詢獲取問題
-    from sqlalchemy import text
-    
-    # 獲取問題
-    question_query = """
-        SELECT * FROM questions
-        WHERE id = :question_id
-    """
-    result = db.execute(text(question_query), {"question_id": question_id}).fetchone()
-    
-    if not result:
-        return RedirectResponse(url="/questions", status_code=302)
-    
-    # 將結果轉換為字典
-    question = dict(result._mapping)
+    return templates.TemplateResponse(
+        "questions/import.html",
+        {"request": request, "current_user": current_user, "imported": None, "row_errors": []}
+    )
+
+@router.post("/import", response_class=HTMLResponse)
+def import_questions_upload(
+    request: Request,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(permission_required("create_question"))
+):
+    """由 Excel / CSV 批次匯入問題，有誤的列略過並列出錯誤，其餘在同一個交易中寫入"""
+    # 如果 current_user 是 RedirectResponse，直接返回它
+    if isinstance(current_user, RedirectResponse):
+        return current_user
     
-    # 確保日期欄位是可用的格式
-    for date_field in ['question_date', 'created_date', 'closed_date']:
-        if date_field in question and question[date_field] is not None:
-            if isinstance(question[date_field], str):
-                try:
-                    # 嘗試解析日期字串
-                    question[date_field] = datetime.fromisoformat(question[date_field].replace('Z', '+00:00'))
-                except (ValueError, AttributeError):
-                    # 如果解析失敗，設為 None
-                    question[date_field] = None
+    context = {"request": request, "current_user": current_user, "imported": None, "row_errors": []}
+    try:
+        accessible_ids = get_accessible_department_ids(current_user, db)
+        rows = iter_import_rows(file.filename, file.file)
+        question_ids, row_errors = import_questions(db, current_user, accessible_ids, rows)
+        db.commit()
+        invalidate_facet_cache()
+    except ImportFileError as e:
+        # 檔案格式錯誤在寫入前就會發現，不需要回滾
+        context["error"] = str(e)
+        return templates.TemplateResponse("questions/import.html", context, status_code=400)
+    except Exception as e:
+        db.rollback()
+        logging.error(f"匯入問題時發生錯誤: {str(e)}")
+        context["error"] = f"匯入問題時發生錯誤: {str(e)}"
+        return templates.TemplateResponse("questions/import.html", context, status_code=500)
     
-    # 獲取報告部門
-    report_dept_query = """
-        SELECT d.* FROM departments d
-        JOIN question_report_department qrd ON d.id = qrd.department_id
-        WHERE qrd.question_id = :question_id
+    context.update(imported=len(question_ids), row_errors=row_errors)
+    return templates.TemplateResponse("questions/import.html", context)
+
+# 樂觀鎖：問題在讀取後已被他人修改
+VERSION_CONFLICT_MESSAGE = "問題已被其他人修改，請重新載入頁面後再試"
+VERSION_REQUIRED_MESSAGE = "缺少問題版本，請重新載入頁面後再試"
+
+def _version_conflict_response():
+    return JSONResponse(
+        content={"success": False, "conflict": True, "message": VERSION_CONFLICT_MESSAGE},
+        status_code=409
+    )
+
+def _version_required_response():
+    return JSONResponse(content={"success": False, "message": VERSION_REQUIRED_MESSAGE}, status_code=400)
+
+def _expected_version(value):
     """
-    report_depts = db.execute(text(report_dept_query), {"question_id": question_id}).fetchall()
-    question['report_departments'] = [dict(dept._mapping) for dept in report_depts]
-    
-    # 獲取回答部門
-    answer_dept_query = """
-        SELECT d.* FROM departments d
-        JOIN question_answer_department qad ON d.id = qad.department_id
-        WHERE qad.question_id = :question_id
+    取得更新時要比對的版本（用戶端送回讀取時的版本）
+
+    未提供或無效時返回 None，由呼叫端拒絕更新；不可改用目前版本，否則舊表單仍會覆蓋新資料。
     """
-    answer_depts = db.execute(text(answer_dept_query), {"question_id": question_id}).fetchall()
-    question['answer_departments'] = [dict(dept._mapping) for dept in answer_depts]
-    
-    # 檢查用戶是否有權限訪問該問題的任一填報部門或回答部門
-    has_access = False
-    
-    # 如果用戶有 manage_all 權限，允許訪問所有問題
-    if has_permission(current_user, "manage_all"):
-        has_access = True
-    else:
-        # 檢查填報部門
-        for dept in question['report_departments']:
-            if can_access_department(current_user, dept['id'], db):
-                has_access = True
-                break
-                
-        # 如果沒有權限訪問填報部門，檢查回答部門
-        if not has_access:
-            for dept in question['answer_departments']:
-                if can_access_department(current_user, dept['id'], db):
-                    has_access = True
-                    break
-    
-    if not has_access:
-        return RedirectResponse(url="/questions", status_code=302)
-    
-    # 過濾問題的填報部門和回答部門，只顯示用戶有權限的部門
-    filtered_report_departments = []
-    filtered_answer_departments = []
+    return parse_int(value, "版本")
+
+def _bulk_error_response(error):
+    return JSONResponse(content={"success": False, "message": str(error)}, status_code=error.status_code)
+
+@router.put("/bulk/close", response_class=JSONResponse)
+def bulk_close_questions_api(
+    payload: QuestionBulkClose,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(permission_required("close_question"))
+):
+    """批次結案：權限以一個查詢檢查，所有問題在同一個交易中結案"""
+    # 如果 current_user 是 RedirectResponse，直接返回它
+    if isinstance(current_user, RedirectResponse):
+        return current_user
     
-    for dept in question['report_departments']:
-        if can_access_department(current_user, dept['id'], db):
-            filtered_report_departments.append(dept)
+    try:
+        accessible_ids = get_accessible_department_ids(current_user, db)
+        states = load_bulk_targets(db, payload.question_ids, current_user, accessible_ids)
+        closed_ids = bulk_close_questions(db, states, payload.summary)
+        db.commit()
+    except BulkOperationError as e:
+        # 檢查都在寫入前完成，不需要回滾
+        return _bulk_error_response(e)
+    except Exception as e:
+        db.rollback()
+        logging.error(f"批次結案時發生錯誤: {str(e)}")
+        return JSONResponse(
+            content={"success": False, "message": f"批次結案時發生錯誤: {str(e)}"},
+            status_code=500
+        )
     
-    for dept in question['answer_departments']:
-        if can_access_department(current_user, dept['id'], db):
-            filtered_answer_departments.append(dept)
+    invalidate_facet_cache()
+    for question_id in closed_ids:
+        invalidate_question_detail(question_id)
+    return JSONResponse(content={
+        "success": True,
+        "closed": closed_ids,
+        "skipped": [question_id for question_id in states if question_id not in closed_ids]
+    })
+
+@router.put("/bulk/reassign", response_class=JSONResponse)
+def bulk_reassign_questions_api(
+    payload: QuestionBulkReassign,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(permission_required("edit_question"))
+):
+    """批次更換回答部門：權限以一個查詢檢查，關聯在同一個交易中以集合式 DELETE / INSERT 更新"""
+    # 如果 current_user 是 RedirectResponse，直接返回它
+    if isinstance(current_user, RedirectResponse):
+        return current_user
     
-    # 添加過濾後的部門到問題字典
-    question['filtered_report_departments'] = filtered_report_departments
-    question['filtered_answer_departments'] = filtered_answer_departments
+    try:
+        accessible_ids = get_accessible_department_ids(current_user, db)
+        states = load_bulk_targets(db, payload.question_ids, current_user, accessible_ids)
+        question_ids = bulk_reassign_questions(db, states, payload.answer_department_ids, accessible_ids)
+        db.commit()
+    except BulkOperationError as e:
+        # 檢查都在寫入前完成，不需要回滾
+        return _bulk_error_response(e)
+    except Exception as e:
+        db.rollback()
+        logging.error(f"批次更換回答部門時發生錯誤: {str(e)}")
+        return JSONResponse(
+            content={"success": False, "message": f"批次更換回答部門時發生錯誤: {str(e)}"},
+            status_code=500
+        )
     
-    # 添加一些模板可能需要的方法
-    question['get_report_departments'] = lambda q=question: q['report_departments']
-    question['get_answer_departments'] = lambda q=question: q['answer_departments']
+    invalidate_facet_cache()
+    for question_id in question_ids:
+        invalidate_question_detail(question_id)
+    return JSONResponse(content={"success": True, "updated": question_ids})
+
+@router.get("/{question_id}", response_class=HTMLResponse)
+async def get_question(
+    question_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(page_permission_required("read_question"))
+):
+    # 如果 current_user 是 RedirectResponse，直接返回它
+    if isinstance(current_user, RedirectResponse):
+        return current_user
     
-    # 設置顯示狀態
-    if question['status'] == 'closed' and not question.get('closed_date'):
-        # 如果狀態是 closed 但沒有關閉日期，根據是否有回覆調整顯示狀態
-        has_reports = db.query(exists().where(Report.question_id == question['id'])).scalar()
-        question['display_status'] = 'ANSWERED' if has_reports else 'PENDING'
+    return await db.run_sync(render_question_detail, question_id, request, current_user)
+
+def render_question_detail(db, question_id, request, current_user):
+    """問題詳情的查詢與渲染，以同步 Session 撰寫，由 AsyncSession.run_sync 執行"""
+    accessible_departments = frozenset()
+    if not has_permission(current_user, "manage_all"):
+        accessible_departments = get_accessible_department_ids(current_user, db)
+    
+    fingerprint = permission_fingerprint(current_user, accessible_departments)
+    cached = cached_question_detail(question_id, fingerprint)
+    if cached:
+        # 快取命中時不必查詢資料庫
+        version, question = cached
     else:
-        # 將小寫狀態轉換為大寫
-        status_map = {'pending': 'PENDING', 'answered': 'ANSWERED', 'closed': 'CLOSED'}
-        question['display_status'] = status_map.get(question['status'], question['status'].upper() if question['status'] else '')
-    
-    # 獲取問題的回覆記錄
-    reports_query = """
-        SELECT r.*, u.username, u.id as user_id, d.name as department_name, d.id as department_id
-        FROM reports r
-        JOIN users u ON r.user_id = u.id
-        JOIN departments d ON u.department_id = d.id
-        WHERE r.question_id = :question_id
-        ORDER BY r.reply_date DESC
-    """
-    reports = db.execute(text(reports_query), {"question_id": question_id}).fetchall()
-    
-    # 將結果轉換為字典列表
-    question['reports'] = []
-    
-    # 獲取當前用戶的部門 ID 列表
-    user_department_ids = [dept.id for dept in current_user.departments]
-    
-    for report in reports:
-        report_dict = dict(report._mapping)
-        
-        # 只添加用戶有權限的部門的回答
-        # 如果用戶有 manage_all 權限，或者回答來自用戶所屬的部門，則可以看到
-        if has_permission(current_user, "manage_all") or report_dict['department_id'] in user_department_ids:
-            # 確保日期欄位是可用的格式
-            if 'reply_date' in report_dict and report_dict['reply_date'] is not None:
-                if isinstance(report_dict['reply_date'], str):
-                    try:
-                        # 嘗試解析日期字串
-                        report_dict['reply_date'] = datetime.fromisoformat(report_dict['reply_date'].replace('Z', '+00:00'))
-                    except (ValueError, AttributeError):
-                        pass
-            
-            # 添加用戶信息
-            report_dict['user'] = {
-                'username': report_dict.get('username'),
-                'id': report_dict.get('user_id'),
-                'department': {'name': report_dict.get('department_name')}
-            }
-            
-            question['reports'].append(report_dict)
-    
-    # 檢查當前用戶是否可以回答此問題
-    can_reply = False
-    if has_permission(current_user, "create_report"):
-        # 檢查用戶是否屬於問題的回答部門
-        for dept in question['answer_departments']:
-            if dept['id'] in user_department_ids:
-                can_reply = True
-                break
-    
-    # 檢查當前用戶的部門是否已經回答過
-    has_replied = False
-    for report in question['reports']:
-        if report['department_id'] in user_department_ids:
-            has_replied = True
-            break
-    
-    # 如果已經回答過，就不能再回答
-    if has_replied:
-        can_reply = False
-    
-    question['can_reply'] = can_reply
+        # 問題、部門與顯示狀態一次取得，權限在 SQL 中判斷
+        row = visible_question_row(db, question_id, current_user, accessible_departments)
+        if not row:
+            return RedirectResponse(url="/questions", status_code=302)
+        version, question = row.version, None
+    
+    # 以問題版本與用戶權限指紋比對 ETag，未變更時直接返回 304
+    etag = make_etag("question", question_id, version, fingerprint)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    if question is None:
+        # 回覆以第二個查詢取得（已在 SQL 中過濾可見範圍）
+        question = build_question_detail(db, row, current_user, accessible_departments)
+        cache_question_detail(question_id, fingerprint, version, question)
     
     return templates.TemplateResponse(
         "questions/detail.html",
@@ -583,7 +502,8 @@ async def get_question(
             "request": request, 
             "question": question,
             "current_user": current_user
-        }
+        },
+        headers=etag_headers(etag)
     )
 
 @router.put("/{question_id}", response_model=dict)
@@ -597,19 +517,35 @@ def update_question(
     if not db_question:
         raise HTTPException(status_code=404, detail="問題不存在")
     
-    # 檢查用戶是否有權限訪問該問題所屬的部門
-    if not can_access_department(current_user, db_question.department_id, db):
-        raise HTTPException(status_code=403, detail="無權訪問此部門")
-    
+    # 檢查用戶是否有權限訪問該問題的填報部門或回答部門
+    accessible_ids = get_accessible_department_ids(current_user, db)
+    if not has_permission(current_user, "manage_all") and not any(
+        dept.id in accessible_ids
+        for dept in db_question.report_departments + db_question.answer_departments
+    ):
+        raise HTTPException(status_code=403, detail="無權訪問此問題")
+    
+    values = {}
     if question_update.title is not None:
-        db_question.title = question_update.title
+        values[Question.title] = question_update.title
     
     if question_update.content is not None:
-        db_question.content = question_update.content
+        values[Question.content] = question_update.content
+    
+    # 以條件式 UPDATE 檢查版本，問題在讀取後被他人修改時不覆蓋
+    expected_version = _expected_version(question_update.version)
+    if expected_version is None:
+        raise HTTPException(status_code=400, detail=VERSION_REQUIRED_MESSAGE)
+    values[Question.version] = Question.version + 1
+    updated = db.query(Question).filter(
+        Question.id == question_id, Question.version == expected_version
+    ).update(values, synchronize_session=False)
+    if not updated:
+        raise HTTPException(status_code=409, detail=VERSION_CONFLICT_MESSAGE)
     
     db.commit()
-    db.refresh(db_question)
-    return {"success": True}
+    invalidate_question_detail(question_id)
+    return {"success": True, "version": expected_version + 1}
 
 @router.put("/{question_id}/close", response_class=JSONResponse)
 async def close_question(
@@ -639,6 +575,10 @@ async def close_question(
     if not result:
         return JSONResponse(content={"success": False, "message": "問題不存在"}, status_code=404)
     
+    expected_version = _expected_version(data.get("version"))
+    if expected_version is None:
+        return _version_required_response()
+    
     # 將結果轉換為字典
     question = dict(result._mapping)
     
@@ -684,25 +624,36 @@ async def close_question(
         return JSONResponse(content={"success": False, "message": "無權訪問此問題"}, status_code=403)
     
     try:
-        # 更新問題狀態為已結案
+        old_state = question_state(db, question_id)
+        
+        # 更新問題狀態為已結案（版本不符表示已被他人修改，不覆蓋）
         update_query = """
             UPDATE questions
             SET status = 'closed',
                 summary = :summary,
-                closed_date = :closed_date
-            WHERE id = :question_id
+                closed_date = :closed_date,
+                version = version + 1
+            WHERE id = :question_id AND version = :expected_version
         """
         
-        db.execute(
-            text(update_query),
+        result = db.execute(
+            typed_text(update_query),
             {
                 "summary": summary,
                 "closed_date": datetime.now(),
-                "question_id": question_id
+                "question_id": question_id,
+                "expected_version": expected_version
             }
         )
+        if result.rowcount == 0:
+            return _version_conflict_response()
+        
+        # 更新儀表板計數（與結案在同一個交易中提交）
+        record_state_change(db, question_id, old_state, "closed")
         
         db.commit()
+        invalidate_question_detail(question_id)
+        invalidate_facet_cache()
         return JSONResponse(content={"success": True})
         
     except Exception as e:
@@ -714,7 +665,7 @@ async def close_question(
         )
 
 @router.post("/{question_id}/edit", response_class=HTMLResponse)
-async def edit_question(
+def edit_question(
     question_id: int,
     request: Request,
     title: str = Form(...),
@@ -725,6 +676,7 @@ async def edit_question(
     answer_department_ids: List[int] = Form(...),
     closed_date: Optional[str] = Form(None),
     summary: Optional[str] = Form(None),
+    version: Optional[str] = Form(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(permission_required("edit_question"))
 ):
@@ -740,7 +692,8 @@ async def edit_question(
         SELECT * FROM questions
         WHERE id = :question_id
     """
-    result = db.execute(text(question_query), {"question_id": question_id}).fetchone()
+    # 日期欄位以 datetime 取得，表單重新顯示（403 / 409 / 500）時模板直接格式化
+    result = db.execute(typed_text(question_query), {"question_id": question_id}).fetchone()
     
     if not result:
         return RedirectResponse(url="/questions", status_code=302)
@@ -748,6 +701,10 @@ async def edit_question(
     # 將結果轉換為字典
     question = dict(result._mapping)
     
+    # 表單重新顯示時保留讀取時的版本，衝突或缺少版本時用戶需重新載入才能再送出
+    expected_version = _expected_version(version)
+    question['question_version'] = expected_version
+    
     # 獲取報告部門
     report_dept_query = """
         SELECT d.* FROM departments d
@@ -789,15 +746,26 @@ async def edit_question(
     if not has_access:
         return RedirectResponse(url="/questions", status_code=302)
     
+    if expected_version is None:
+        return templates.TemplateResponse(
+            "questions/edit.html",
+            {
+                "request": request, 
+                "question": question,
+                "departments": get_accessible_departments(current_user, db),
+                "report_department_ids": report_department_ids,
+                "answer_department_ids": answer_department_ids,
+                "current_user": current_user,
+                "error": VERSION_REQUIRED_MESSAGE
+            },
+            status_code=400
+        )
+    
     # 檢查用戶是否有權限訪問所有指定的部門
     for dept_id in report_department_ids + answer_department_ids:
         if not can_access_department(current_user, dept_id, db):
             # 獲取用戶有權限的部門
-            accessible_departments = []
-            all_departments = db.query(Department).all()
-            for dept in all_departments:
-                if can_access_department(current_user, dept.id, db):
-                    accessible_departments.append(dept)
+            accessible_departments = get_accessible_departments(current_user, db)
             
             return templates.TemplateResponse(
                 "questions/edit.html",
@@ -814,6 +782,10 @@ async def edit_question(
             )
     
     try:
+        # 編輯可能改變狀態與回答部門，先取得原本的計數狀態與局/處
+        old_state = question_state(db, question_id)
+        old_bureaus = question_bureaus(db, question_id)
+        
         # 更新問題基本信息
         update_query = """
             UPDATE questions
@@ -823,8 +795,9 @@ async def edit_question(
                 question_date = :question_date,
                 closed_date = :closed_date,
                 summary = :summary,
-                status = :status
-            WHERE id = :question_id
+                status = :status,
+                version = version + 1
+            WHERE id = :question_id AND version = :expected_version
         """
         
         # 處理問題日期
@@ -846,9 +819,9 @@ async def edit_question(
             has_reports = db.query(exists().where(Report.question_id == question_id)).scalar()
             status = "answered" if has_reports else "pending"  # 使用小寫
         
-        # 執行更新
-        db.execute(
-            text(update_query),
+        # 執行更新（版本不符表示已被他人修改，不覆蓋也不更新部門關聯）
+        update_result = db.execute(
+            typed_text(update_query),
             {
                 "title": title,
                 "content": content,
@@ -857,49 +830,51 @@ async def edit_question(
                 "closed_date": parsed_closed_date,
                 "summary": summary,
                 "status": status,
-                "question_id": question_id
+                "question_id": question_id,
+                "expected_version": expected_version
             }
         )
-        
-        # 更新填報部門關聯
-        # 先刪除現有關聯
-        db.execute(
-            text("DELETE FROM question_report_department WHERE question_id = :question_id"),
-            {"question_id": question_id}
-        )
-        
-        # 添加新的關聯
-        for dept_id in report_department_ids:
-            db.execute(
-                text("INSERT INTO question_report_department (question_id, department_id) VALUES (:question_id, :department_id)"),
-                {"question_id": question_id, "department_id": dept_id}
+        if update_result.rowcount == 0:
+            return templates.TemplateResponse(
+                "questions/edit.html",
+                {
+                    "request": request, 
+                    "question": question,
+                    "departments": get_accessible_departments(current_user, db),
+                    "report_department_ids": report_department_ids,
+                    "answer_department_ids": answer_department_ids,
+                    "current_user": current_user,
+                    "error": VERSION_CONFLICT_MESSAGE
+                },
+                status_code=409
             )
         
-        # 更新回答部門關聯
-        # 先刪除現有關聯
-        db.execute(
-            text("DELETE FROM question_answer_department WHERE question_id = :question_id"),
-            {"question_id": question_id}
+        # 只寫入部門關聯的差異，未變更時不寫入關聯資料表
+        sync_department_links(
+            db, "question_report_department", question_id,
+            [dept['id'] for dept in question['report_departments']], report_department_ids
+        )
+        answer_added, answer_removed = sync_department_links(
+            db, "question_answer_department", question_id,
+            [dept['id'] for dept in question['answer_departments']], answer_department_ids
         )
         
-        # 添加新的關聯
-        for dept_id in answer_department_ids:
-            db.execute(
-                text("INSERT INTO question_answer_department (question_id, department_id) VALUES (:question_id, :department_id)"),
-                {"question_id": question_id, "department_id": dept_id}
-            )
+        # 更新儀表板計數：從原局/處的原狀態移到新局/處的新狀態（與編輯在同一個交易中提交）
+        new_bureaus = question_bureaus(db, question_id) if answer_added or answer_removed else old_bureaus
+        record_state_changes(db, [
+            (old_bureaus, old_state, None),
+            (new_bureaus, None, question_state(db, question_id)),
+        ])
         
         db.commit()
+        invalidate_question_detail(question_id)
+        invalidate_facet_cache()
         
     except Exception as e:
         db.rollback()
         logging.error(f"更新問題時發生錯誤: {str(e)}")
         # 獲取用戶有權限的部門
-        accessible_departments = []
-        all_departments = db.query(Department).all()
-        for dept in all_departments:
-            if can_access_department(current_user, dept.id, db):
-                accessible_departments.append(dept)
+        accessible_departments = get_accessible_departments(current_user, db)
         
         return templates.TemplateResponse(
             "questions/edit.html",
@@ -918,7 +893,7 @@ async def edit_question(
     return RedirectResponse(url=f"/questions/{question_id}", status_code=303)
 
 @router.get("/{question_id}/edit", response_class=HTMLResponse)
-async def edit_question_page(
+def edit_question_page(
     question_id: int,
     request: Request,
     db: Session = Depends(get_db),
@@ -933,50 +908,35 @@ async def edit_question_page(
     
     # 獲取問題
     question_query = """
-        SELECT * FROM questions
+        SELECT *, version AS question_version FROM questions
         WHERE id = :question_id
     """
-    result = db.execute(text(question_query), {"question_id": question_id}).fetchone()
+    result = db.execute(typed_text(question_query), {"question_id": question_id}).fetchone()
     
     if not result:
         return RedirectResponse(url="/questions", status_code=302)
     
-    # 將結果轉換為字典
-    question = dict(result._mapping)
-    
-    # 確保日期欄位是可用的格式
-    for date_field in ['question_date', 'created_date', 'closed_date']:
-        if date_field in question and question[date_field] is not None:
-            if isinstance(question[date_field], str):
-                try:
-                    # 嘗試解析日期字串
-                    question[date_field] = datetime.fromisoformat(question[date_field].replace('Z', '+00:00'))
-                except (ValueError, AttributeError):
-                    # 如果解析失敗，設為 None
-                    question[date_field] = None
-    
-    # 獲取報告部門
+    # 獲取報告部門與回答部門
     report_dept_query = """
-        SELECT d.* FROM departments d
+        SELECT d.id, d.code, d.name, d.parent_id FROM departments d
         JOIN question_report_department qrd ON d.id = qrd.department_id
         WHERE qrd.question_id = :question_id
     """
-    report_depts = db.execute(text(report_dept_query), {"question_id": question_id}).fetchall()
-    question['report_departments'] = [dict(dept._mapping) for dept in report_depts]
-    
-    # 獲取回答部門
     answer_dept_query = """
-        SELECT d.* FROM departments d
+        SELECT d.id, d.code, d.name, d.parent_id FROM departments d
         JOIN question_answer_department qad ON d.id = qad.department_id
         WHERE qad.question_id = :question_id
     """
-    answer_depts = db.execute(text(answer_dept_query), {"question_id": question_id}).fetchall()
-    question['answer_departments'] = [dict(dept._mapping) for dept in answer_depts]
+    question = QuestionDetail(
+        result,
+        [department_view(dept) for dept in db.execute(text(report_dept_query), {"question_id": question_id})],
+        [department_view(dept) for dept in db.execute(text(answer_dept_query), {"question_id": question_id})]
+    )
     
     # 檢查用戶是否有權限訪問任何填報部門
     can_access = False
-    for dept in question['report_departments']:
-        if can_access_department(current_user, dept['id'], db):
+    for dept in question.report_departments:
+        if can_access_department(current_user, dept.id, db):
             can_access = True
             break
     
@@ -984,21 +944,11 @@ async def edit_question_page(
         return RedirectResponse(url="/questions", status_code=302)
     
     # 獲取用戶有權限的部門（用於回答單位選擇）
-    accessible_departments = []
-    all_departments = db.query(Department).all()
-    
-    # 檢查用戶是否有權限訪問每個部門
-    for dept in all_departments:
-        if can_access_department(current_user, dept.id, db):
-            accessible_departments.append(dept)
+    accessible_departments = get_accessible_departments(current_user, db)
     
     # 獲取當前問題的填報部門和回答部門ID列表
-    report_department_ids = [dept['id'] for dept in question['report_departments']]
-    answer_department_ids = [dept['id'] for dept in question['answer_departments']]
-    
-    # 添加一些模板可能需要的方法
-    question['get_report_departments'] = lambda q=question: q['report_departments']
-    question['get_answer_departments'] = lambda q=question: q['answer_departments']
+    report_department_ids = [dept.id for dept in question.report_departments]
+    answer_department_ids = [dept.id for dept in question.answer_departments]
     
     return templates.TemplateResponse(
         "questions/edit.html",
@@ -1035,11 +985,19 @@ async def update_summary(
     data = await request.json()
     summary = data.get("summary", "")
     
-    # 更新摘要
-    question.summary = summary
+    # 以條件式 UPDATE 更新摘要，問題在讀取後被他人修改時不覆蓋
+    expected_version = _expected_version(data.get("version"))
+    if expected_version is None:
+        return _version_required_response()
+    updated = db.query(Question).filter(
+        Question.id == question_id, Question.version == expected_version
+    ).update({Question.summary: summary, Question.version: Question.version + 1}, synchronize_session=False)
+    if not updated:
+        return _version_conflict_response()
     
     db.commit()
-    return {"success": True}
+    invalidate_question_detail(question_id)
+    return {"success": True, "version": expected_version + 1}
 
 @router.post("/create", response_class=HTMLResponse)
 async def create_question(
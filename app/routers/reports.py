@@ -8,6 +8,8 @@ from app.schemas.report import ReportCreate, ReportUpdate
 from app.dependencies import get_current_user, permission_required, page_permission_required, can_access_department, has_permission
 from app.models.user import User
 from app.models.role import Role
+from app.services.counters import question_state, record_reply, record_state_change
+from app.services.question_detail import invalidate_question_detail
 from datetime import datetime
 
 router = APIRouter()
@@ -61,8 +63,16 @@ def create_report(
         user_id=current_user.id
     )
     
+    old_state = question_state(db, question_id)
     db.add(db_report)
+    db.flush()
+    
+    # 更新儀表板計數（與回覆在同一個交易中提交）
+    record_state_change(db, question_id, old_state, question_state(db, question_id))
+    record_reply(db, current_user, db_report.reply_date)
+    
     db.commit()
+    invalidate_question_detail(question_id)
     db.refresh(db_report)
     
     return {"success": True, "report_id": db_report.id}
@@ -139,6 +149,7 @@ def update_report(
     db_report.reply_content = report_update.reply_content
     
     db.commit()
+    invalidate_question_detail(db_report.question_id)
     db.refresh(db_report)
     
     return {"success": True} 
\ No newline at end of file
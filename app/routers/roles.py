@@ -6,7 +6,7 @@ from typing import Optional, List
 from app.database import get_db
 from app.models.role import Role
 from app.models.user import User
-from app.dependencies import page_permission_required, has_permission
+from app.dependencies import page_permission_required, has_permission, invalidate_access_cache
 import logging
 from fastapi import HTTPException
 
@@ -15,7 +15,7 @@ templates.env.globals["has_permission"] = has_permission
 router = APIRouter()
 
 @router.get("/", response_class=HTMLResponse)
-async def list_roles(
+def list_roles(
     request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(page_permission_required("manage_roles"))
@@ -28,7 +28,7 @@ async def list_roles(
     )
 
 @router.get("/create", response_class=HTMLResponse)
-async def create_role_page(
+def create_role_page(
     request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(page_permission_required("manage_roles"))
@@ -59,7 +59,7 @@ async def create_role_page(
     )
 
 @router.post("/", response_class=HTMLResponse)
-async def create_role(
+def create_role(
     request: Request,
     name: str = Form(...),
     description: str = Form(""),
@@ -137,7 +137,7 @@ async def create_role(
         )
 
 @router.get("/{role_id}/edit", response_class=HTMLResponse)
-async def edit_role_page(
+def edit_role_page(
     role_id: int,
     request: Request,
     db: Session = Depends(get_db),
@@ -174,7 +174,7 @@ async def edit_role_page(
     )
 
 @router.post("/{role_id}/edit", response_class=HTMLResponse)
-async def update_role(
+def update_role(
     role_id: int,
     request: Request,
     name: str = Form(...),
@@ -234,6 +234,8 @@ async def update_role(
             role.permissions = permissions
         
         db.commit()
+        # 角色權限可能影響所有持有此角色的用戶
+        invalidate_access_cache()
         logging.info(f"角色更新成功: role_id={role.id}, name={role.name}")
         return RedirectResponse(url="/roles", status_code=status.HTTP_303_SEE_OTHER)
         
@@ -267,7 +269,7 @@ async def update_role(
         )
 
 @router.post("/{role_id}/delete", response_class=HTMLResponse)
-async def delete_role(
+def delete_role(
     role_id: int,
     request: Request,
     db: Session = Depends(get_db),
@@ -292,5 +294,6 @@ async def delete_role(
         
         db.delete(role)
         db.commit()
+        invalidate_access_cache()
     
     return RedirectResponse(url="/roles", status_code=status.HTTP_303_SEE_OTHER)
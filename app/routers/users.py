@@ -3,7 +3,6 @@ from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from passlib.context import CryptContext
 import logging
 
 from app.database import get_db
@@ -11,16 +10,16 @@ from app.models.user import User
 from app.models.role import Role
 from app.models.department import Department
 from app.schemas.user import UserCreate, UserUpdate
-from app.dependencies import get_current_user, has_permission, page_permission_required
+from app.dependencies import get_current_user, has_permission, page_permission_required, invalidate_access_cache
+from app.services.passwords import hash_password
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
 templates.env.globals["has_permission"] = has_permission
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # 獲取用戶列表頁面
 @router.get("/", response_class=HTMLResponse)
-async def list_users(
+def list_users(
     request: Request,
     db: Session = Depends(get_db),
     current_user = Depends(page_permission_required("manage_users")),
@@ -49,7 +48,7 @@ async def list_users(
 
 # 獲取創建用戶頁面
 @router.get("/create", response_class=HTMLResponse)
-async def create_user_page(
+def create_user_page(
     request: Request,
     db: Session = Depends(get_db),
     current_user = Depends(page_permission_required("manage_users"))
@@ -73,7 +72,7 @@ async def create_user_page(
 
 # 創建新用戶
 @router.post("/", response_class=HTMLResponse)
-async def create_user(
+def create_user(
     request: Request,
     username: str = Form(...),
     full_name: str = Form(None),
@@ -114,7 +113,7 @@ async def create_user(
     
     try:
         # 創建新用戶
-        hashed_password = pwd_context.hash(password)
+        hashed_password = hash_password(password)
         
         # 處理啟用狀態，如果表單中沒有提交 is_active，則設為 False
         active_status = True if is_active else False
@@ -146,6 +145,7 @@ async def create_user(
         
         db.flush()
         db.commit()
+        invalidate_access_cache(new_user.id)
         
     except Exception as e:
         db.rollback()
@@ -174,7 +174,7 @@ async def create_user(
 
 # 獲取編輯用戶頁面
 @router.get("/{user_id}/edit", response_class=HTMLResponse)
-async def edit_user_page(
+def edit_user_page(
     user_id: int,
     request: Request,
     db: Session = Depends(get_db),
@@ -214,7 +214,7 @@ async def edit_user_page(
 
 # 更新用戶
 @router.post("/{user_id}/edit", response_class=HTMLResponse)
-async def update_user(
+def update_user(
     user_id: int,
     request: Request,
     username: str = Form(...),
@@ -266,7 +266,7 @@ async def update_user(
         
         # 如果提供了新密碼，則更新密碼
         if password and password.strip():
-            user.password_hash = pwd_context.hash(password)
+            user.password_hash = hash_password(password)
         
         # 更新角色
         user.roles.clear()
@@ -283,6 +283,7 @@ async def update_user(
                 user.departments.append(department)
         
         db.commit()
+        invalidate_access_cache(user.id)
         
     except Exception as e:
         db.rollback()
@@ -310,7 +311,7 @@ async def update_user(
 
 # 刪除用戶
 @router.post("/{user_id}/delete", response_class=HTMLResponse)
-async def delete_user(
+def delete_user(
     user_id: int,
     request: Request,
     db: Session = Depends(get_db),
@@ -328,6 +329,7 @@ async def delete_user(
         # 刪除用戶
         db.delete(user)
         db.commit()
+        invalidate_access_cache(user_id)
     except Exception as e:
         db.rollback()
         logging.error(f"刪除用戶時發生錯誤: {str(e)}")
@@ -20,6 +20,15 @@ class QuestionUpdate(BaseModel):
     content: Optional[str] = None
     report_department_ids: Optional[List[int]] = None
     answer_department_ids: Optional[List[int]] = None
+    version: Optional[int] = None  # 讀取時的問題版本，與目前版本不同時拒絕更新
+
+class QuestionBulkClose(BaseModel):
+    question_ids: List[int]
+    summary: str = ""
+
+class QuestionBulkReassign(BaseModel):
+    question_ids: List[int]
+    answer_department_ids: List[int]  # 新的回答部門IDs（取代原有的回答部門）
 
 class QuestionInDB(QuestionBase):
     id: int
@@ -0,0 +1,243 @@
+import logging
+from collections import Counter
+from datetime import datetime, date, timedelta
+
+from sqlalchemy import text
+
+from app.models.dashboard_counter import DashboardCounter
+
+logger = logging.getLogger(__name__)
+
+COUNTER_TABLE = DashboardCounter.__tablename__
+
+# bureau_id 為 0 的計數為全系統合計
+ALL_BUREAUS = 0
+
+# 問題狀態計數名稱：待回覆、已回覆（未結案）、已結案
+QUESTION_STATES = ("pending", "answered", "closed")
+
+# 部門所屬局/處：與權限判斷相同，以代碼前兩碼加 00 的局/處級部門為準（局/處級部門即為自己），
+# 找不到對應的局/處時歸入部門本身
+_BUREAU_SQL = "COALESCE((SELECT b.id FROM departments b WHERE b.code = substr(d.code, 1, 2) || '00'), d.id)"
+
+# 問題目前的計數狀態
+_STATE_SQL = """
+    CASE
+        WHEN lower(q.status) = 'closed' THEN 'closed'
+        WHEN EXISTS (SELECT 1 FROM reports r WHERE r.question_id = q.id) THEN 'answered'
+        ELSE 'pending'
+    END
+"""
+
+
+def week_counter_name(day=None):
+    """每週回覆數的計數名稱，例如 replies:2024-W05（ISO 週）"""
+    iso_year, iso_week, _ = (day or date.today()).isocalendar()
+    return f"replies:{iso_year}-W{iso_week:02d}"
+
+
+def question_state(db, question_id):
+    """取得問題目前的計數狀態（pending / answered / closed），問題不存在時返回 None"""
+    return db.execute(
+        text(f"SELECT {_STATE_SQL} FROM questions q WHERE q.id = :question_id"),
+        {"question_id": question_id}
+    ).scalar()
+
+
+def question_bureaus(db, question_id):
+    """取得問題回答部門所屬的局/處 ID"""
+    rows = db.execute(text(f"""
+        SELECT DISTINCT {_BUREAU_SQL} AS bureau_id
+        FROM question_answer_department qad
+        JOIN departments d ON d.id = qad.department_id
+        WHERE qad.question_id = :question_id
+    """), {"question_id": question_id})
+    return [row.bureau_id for row in rows]
+
+
+def questions_bureaus(db, question_ids):
+    """以一個查詢取得多個問題回答部門所屬的局/處 ID，返回 {問題 ID: [局/處 ID]}"""
+    bureaus = {question_id: [] for question_id in question_ids}
+    if not bureaus:
+        return bureaus
+    params = {f"question_{i}": question_id for i, question_id in enumerate(bureaus)}
+    rows = db.execute(text(f"""
+        SELECT DISTINCT qad.question_id, {_BUREAU_SQL} AS bureau_id
+        FROM question_answer_department qad
+        JOIN departments d ON d.id = qad.department_id
+        WHERE qad.question_id IN ({", ".join(":" + key for key in params)})
+    """), params)
+    for row in rows:
+        bureaus[row.question_id].append(row.bureau_id)
+    return bureaus
+
+
+def _apply_deltas(db, deltas):
+    # deltas: {(bureau_id, name): 增減值}；不存在的計數自動建立
+    now = datetime.utcnow()
+    params = [
+        {"bureau_id": bureau_id, "name": name, "delta": delta, "now": now}
+        for (bureau_id, name), delta in deltas.items()
+        if delta
+    ]
+    if not params:
+        return
+    db.execute(
+        text(f"""
+            INSERT INTO {COUNTER_TABLE} (bureau_id, name, value, updated_at)
+            VALUES (:bureau_id, :name, :delta, :now)
+            ON CONFLICT (bureau_id, name) DO UPDATE
+            SET value = value + excluded.value, updated_at = excluded.updated_at
+        """),
+        params
+    )
+
+
+def _bump(db, bureau_ids, name, delta):
+    # 同時更新各局/處與全系統合計
+    _apply_deltas(db, {(bureau_id, name): delta for bureau_id in [ALL_BUREAUS] + list(bureau_ids)})
+
+
+def record_state_change(db, question_id, old_state, new_state):
+    """
+    問題狀態改變時更新計數（新增問題時 old_state 為 None）
+
+    只執行 SQL 不提交，與呼叫端的寫入在同一個交易中生效。
+    """
+    if old_state == new_state:
+        return
+    record_state_changes(db, [(question_bureaus(db, question_id), old_state, new_state)])
+
+
+def record_state_changes(db, changes):
+    """
+    批次更新多個問題的狀態計數（不提交），以一次 executemany 寫入
+
+    Args:
+        changes: 可迭代的 (局/處 ID 列表, 原狀態, 新狀態)
+    """
+    deltas = Counter()
+    for bureau_ids, old_state, new_state in changes:
+        if old_state == new_state:
+            continue
+        for bureau_id in [ALL_BUREAUS] + list(bureau_ids):
+            if old_state:
+                deltas[(bureau_id, old_state)] -= 1
+            if new_state:
+                deltas[(bureau_id, new_state)] += 1
+    _apply_deltas(db, deltas)
+
+
+def record_reply(db, user, reply_date=None):
+    """新增回覆時更新回覆者所屬局/處的本週回覆數（不提交）"""
+    bureau_ids = []
+    if user.department_id:
+        bureau_ids = [row.bureau_id for row in db.execute(
+            text(f"SELECT {_BUREAU_SQL} AS bureau_id FROM departments d WHERE d.id = :department_id"),
+            {"department_id": user.department_id}
+        )]
+    _bump(db, bureau_ids, week_counter_name(reply_date.date() if reply_date else None), 1)
+
+
+def reconcile_counters(connection, today=None):
+    """
+    依實際資料重新計算狀態計數與本週回覆數
+
+    用於每晚的校正排程，修正漏記或其他寫入路徑造成的誤差。
+
+    Returns:
+        int: 被修正的計數數量
+    """
+    today = today or date.today()
+    week_name = week_counter_name(today)
+    week_start = datetime.combine(today - timedelta(days=today.weekday()), datetime.min.time())
+    names = list(QUESTION_STATES) + [week_name]
+
+    placeholders = ", ".join(f":name_{i}" for i in range(len(names)))
+    name_params = {f"name_{i}": name for i, name in enumerate(names)}
+
+    before = {
+        (row.bureau_id, row.name): row.value
+        for row in connection.execute(
+            text(f"SELECT bureau_id, name, value FROM {COUNTER_TABLE} WHERE name IN ({placeholders})"),
+            name_params
+        )
+    }
+
+    actual = {}
+    rows = connection.execute(text(f"""
+        WITH states AS (
+            SELECT q.id, {_STATE_SQL} AS state FROM questions q
+        ),
+        links AS (
+            SELECT DISTINCT qad.question_id, {_BUREAU_SQL} AS bureau_id
+            FROM question_answer_department qad
+            JOIN departments d ON d.id = qad.department_id
+        ),
+        replies AS (
+            SELECT {_BUREAU_SQL} AS bureau_id
+            FROM reports r
+            JOIN users u ON u.id = r.user_id
+            LEFT JOIN departments d ON d.id = u.department_id
+            WHERE r.reply_date >= :week_start AND r.reply_date < :week_end
+        )
+        SELECT links.bureau_id AS bureau_id, states.state AS name, COUNT(*) AS value
+        FROM states JOIN links ON links.question_id = states.id
+        GROUP BY links.bureau_id, states.state
+        UNION ALL
+        SELECT {ALL_BUREAUS}, state, COUNT(*) FROM states GROUP BY state
+        UNION ALL
+        SELECT bureau_id, :week_name, COUNT(*) FROM replies WHERE bureau_id IS NOT NULL GROUP BY bureau_id
+        UNION ALL
+        SELECT {ALL_BUREAUS}, :week_name, COUNT(*) FROM replies HAVING COUNT(*) > 0
+    """), {"week_start": week_start, "week_end": week_start + timedelta(days=7), "week_name": week_name})
+    for row in rows:
+        actual[(row.bureau_id, row.name)] = row.value
+
+    corrected = {
+        key: actual.get(key, 0)
+        for key in set(before) | set(actual)
+        if before.get(key, 0) != actual.get(key, 0)
+    }
+    for (bureau_id, name), value in sorted(corrected.items()):
+        logger.warning("校正儀表板計數 bureau_id=%s name=%s: %s -> %s", bureau_id, name, before.get((bureau_id, name), 0), value)
+
+    connection.execute(text(f"DELETE FROM {COUNTER_TABLE} WHERE name IN ({placeholders})"), name_params)
+    if actual:
+        now = datetime.utcnow()
+        connection.execute(
+            text(f"INSERT INTO {COUNTER_TABLE} (bureau_id, name, value, updated_at) VALUES (:bureau_id, :name, :value, :now)"),
+            [
+                {"bureau_id": bureau_id, "name": name, "value": value, "now": now}
+                for (bureau_id, name), value in actual.items()
+            ]
+        )
+    return len(corrected)
+
+
+def load_dashboard_counters(db, bureau_ids=None, day=None):
+    """
+    讀取儀表板計數
+
+    Args:
+        bureau_ids: 要讀取的局/處 ID，None 表示讀取全部
+
+    Returns:
+        dict: {bureau_id: {"pending": int, "answered": int, "closed": int, "replies_this_week": int}}
+    """
+    week_name = week_counter_name(day)
+    names = list(QUESTION_STATES) + [week_name]
+    params = {f"name_{i}": name for i, name in enumerate(names)}
+    sql = f"SELECT bureau_id, name, value FROM {COUNTER_TABLE} WHERE name IN ({', '.join(':' + key for key in params)})"
+    if bureau_ids is not None:
+        if not bureau_ids:
+            return {}
+        bureau_params = {f"bureau_{i}": bureau_id for i, bureau_id in enumerate(sorted(bureau_ids))}
+        sql += f" AND bureau_id IN ({', '.join(':' + key for key in bureau_params)})"
+        params.update(bureau_params)
+
+    counters = {}
+    for row in db.execute(text(sql), params):
+        bureau = counters.setdefault(row.bureau_id, {"pending": 0, "answered": 0, "closed": 0, "replies_this_week": 0})
+        bureau["replies_this_week" if row.name == week_name else row.name] = row.value
+    return counters
@@ -0,0 +1,120 @@
+import logging
+import re
+from datetime import datetime, timezone
+
+from sqlalchemy import text, bindparam, DateTime
+
+logger = logging.getLogger(__name__)
+
+# 各資料表的日期時間欄位
+DATETIME_COLUMNS = {
+    "questions": ("question_date", "created_date", "closed_date"),
+    "reports": ("reply_date",),
+    "question_list_view": ("question_date", "created_date", "closed_date", "first_reply_date"),
+    "dashboard_counters": ("updated_at",),
+}
+
+# 統一的儲存格式（與 SQLAlchemy SQLite DateTime 寫入的格式相同），例如 2024-03-15 12:05:57.105542
+CANONICAL_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+_CANONICAL_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9].[0-9][0-9][0-9][0-9][0-9][0-9]"
+
+# 原始 SQL 中以 DateTime 型別處理的欄位與參數名稱
+_DATETIME_TYPES = {
+    name: DateTime()
+    for name in {column for columns in DATETIME_COLUMNS.values() for column in columns}
+}
+
+_BIND_NAME = re.compile(r"(?<![:\w]):(\w+)")
+
+_FALLBACK_FORMATS = ("%Y/%m/%d %H:%M:%S", "%Y/%m/%d", "%Y%m%d")
+
+
+def typed_text(sql):
+    """
+    將原始 SQL 包成帶有日期欄位型別的語句
+
+    與日期欄位同名的參數（如 :closed_date）以統一格式寫入；查詢結果的日期欄位由 SQLAlchemy
+    的結果處理器轉為 datetime，讀取時不必再逐列解析字串。
+    （既有資料須先執行 migrations/normalize_datetimes.py 轉為統一格式）
+    """
+    clause = text(sql)
+    binds = [
+        bindparam(name, type_=_DATETIME_TYPES[name])
+        for name in dict.fromkeys(_BIND_NAME.findall(sql))
+        if name in _DATETIME_TYPES
+    ]
+    if binds:
+        clause = clause.bindparams(*binds)
+    if sql.lstrip().upper().startswith(("SELECT", "WITH")):
+        return clause.columns(**_DATETIME_TYPES)
+    return clause
+
+
+def parse_stored_datetime(value):
+    """解析資料庫中各種歷史格式的日期字串，無法解析時返回 None；有時區的值轉為 UTC 並去除時區"""
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        for fmt in _FALLBACK_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def normalize_datetime_columns(connection, batch_size=500):
+    """
+    將所有日期時間欄位改寫為統一格式
+
+    依 rowid 分批讀取不符合格式的資料並以 executemany 批次更新，無法解析的值保留原樣並記錄警告。
+
+    Returns:
+        int: 改寫的欄位值數量
+    """
+    total = 0
+    for table, columns in DATETIME_COLUMNS.items():
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": table}
+        ).scalar()
+        if not exists:
+            continue
+        for column in columns:
+            last_rowid = 0
+            while True:
+                rows = connection.execute(text(f"""
+                    SELECT rowid AS row_id, {column} AS value FROM {table}
+                    WHERE rowid > :last_rowid
+                      AND typeof({column}) = 'text'
+                      AND NOT ({column} GLOB :canonical AND length({column}) = 26)
+                    ORDER BY rowid
+                    LIMIT :batch_size
+                """), {"last_rowid": last_rowid, "canonical": _CANONICAL_GLOB, "batch_size": batch_size}).fetchall()
+                if not rows:
+                    break
+                last_rowid = rows[-1].row_id
+
+                updates = []
+                for row in rows:
+                    parsed = parse_stored_datetime(row.value)
+                    if parsed is None:
+                        logger.warning(f"無法解析日期 {table}.{column} rowid={row.row_id}: {row.value!r}")
+                        continue
+                    updates.append({"rowid": row.row_id, "value": parsed.strftime(CANONICAL_FORMAT)})
+                if updates:
+                    connection.execute(
+                        text(f"UPDATE {table} SET {column} = :value WHERE rowid = :rowid"),
+                        updates
+                    )
+                    total += len(updates)
+            logger.info(f"已檢查 {table}.{column}")
+    return total
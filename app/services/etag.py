@@ -0,0 +1,62 @@
+import hashlib
+
+from fastapi import Response
+from sqlalchemy import text
+
+from app.config import settings
+from app.dependencies import has_permission
+
+# 條件式 GET 回應一律要求瀏覽器每次重新驗證，且不允許共用快取保存
+CACHE_CONTROL = "private, no-cache"
+
+
+def permission_fingerprint(user, accessible_department_ids):
+    """
+    產生用戶權限指紋
+
+    頁面內容會隨用戶身分、權限與可訪問部門而不同，任何一項改變都應讓 ETag 失效。
+    """
+    permissions = sorted({permission for role in user.roles for permission in (role.permissions or [])})
+    own_departments = sorted(department.id for department in user.departments)
+    accessible = "all" if has_permission(user, "manage_all") else sorted(accessible_department_ids)
+    return f"{user.id}|{permissions}|{own_departments}|{accessible}"
+
+
+def departments_signature(db):
+    """部門清單的簽章（列表頁的部門篩選選單會顯示所有部門）"""
+    return db.execute(text(
+        "SELECT COUNT(*) || ':' || COALESCE(group_concat(id || ',' || code || ',' || name, ';'), '') FROM departments"
+    )).scalar()
+
+
+def make_etag(*parts):
+    """以各組成部分產生弱 ETag"""
+    raw = "\x1f".join(str(part) for part in (settings.ETAG_SALT,) + parts)
+    return 'W/"{}"'.format(hashlib.sha1(raw.encode("utf-8")).hexdigest())
+
+
+def etag_matches(request, etag):
+    """檢查請求的 If-None-Match 是否包含目前的 ETag（弱比較）"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    current = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == current:
+            return True
+    return False
+
+
+def etag_headers(etag):
+    """帶有 ETag 的回應標頭"""
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(etag):
+    """返回 304 Not Modified"""
+    return Response(status_code=304, headers=etag_headers(etag))
@@ -0,0 +1,91 @@
+import logging
+
+from sqlalchemy import text
+
+from app.cache import TTLCache
+from app.config import settings
+from app.dependencies import has_permission
+from app.services.list_view import LIST_VIEW_TABLE
+from app.services.question_queries import _id_list_params, question_visibility_clause
+
+logger = logging.getLogger(__name__)
+
+# 篩選選單的計數快取，鍵為用戶可見範圍（相同可訪問部門的用戶共用）；問題寫入後由路由清除，
+# 其他寫入路徑（例如直接修改資料庫）最多延遲 TTL 秒
+_facet_cache = TTLCache(
+    maxsize=settings.FACET_CACHE_MAX_ENTRIES,
+    ttl=settings.FACET_CACHE_TTL_SECONDS
+)
+
+
+def visibility_key(user, accessible_department_ids):
+    """用戶可見問題範圍的指紋：manage_all 為 "all"，其他用戶為排序後的可訪問部門 ID"""
+    if has_permission(user, "manage_all"):
+        return "all"
+    return tuple(sorted(accessible_department_ids))
+
+
+def question_facets(db, user, accessible_department_ids):
+    """
+    取得用戶可見問題依狀態、年度、部門的計數
+
+    以單一 UNION ALL 分組查詢同時算出三種計數，結果依可見範圍快取。
+    部門計數只包含用戶可訪問的部門，一個問題同時是某部門的填報與回答部門時只計一次。
+
+    Returns:
+        dict: {"total": int, "status": {狀態: 數量}, "year": {年度: 數量}, "department": {部門 ID: 數量}}
+              status 另含 "open"（未結案）的合計
+    """
+    key = visibility_key(user, accessible_department_ids)
+    facets = _facet_cache.get(key)
+    if facets is not None:
+        return facets
+
+    visibility, params = question_visibility_clause(user, accessible_department_ids, table=LIST_VIEW_TABLE)
+    where = f"WHERE {visibility}" if visibility else ""
+
+    department_filter = ""
+    if key != "all":
+        if not accessible_department_ids:
+            department_filter = "WHERE 0 = 1"
+        else:
+            placeholders, department_params = _id_list_params("access_dept_", key)
+            department_filter = f"WHERE links.department_id IN ({placeholders})"
+            params.update(department_params)
+
+    sql = f"""
+        WITH visible AS (
+            SELECT id, status, year FROM {LIST_VIEW_TABLE} {where}
+        )
+        SELECT 'status' AS facet, status AS value, COUNT(*) AS count FROM visible GROUP BY status
+        UNION ALL
+        SELECT 'year' AS facet, year AS value, COUNT(*) AS count FROM visible GROUP BY year
+        UNION ALL
+        SELECT 'department' AS facet, links.department_id AS value, COUNT(*) AS count
+        FROM (
+            SELECT qrd.department_id, qrd.question_id FROM question_report_department qrd
+            JOIN visible ON visible.id = qrd.question_id
+            UNION
+            SELECT qad.department_id, qad.question_id FROM question_answer_department qad
+            JOIN visible ON visible.id = qad.question_id
+        ) links
+        {department_filter}
+        GROUP BY links.department_id
+    """
+
+    facets = {"total": 0, "status": {}, "year": {}, "department": {}}
+    for row in db.execute(text(sql), params):
+        if row.value is None:
+            continue
+        facets[row.facet][row.value] = row.count
+
+    facets["total"] = sum(facets["status"].values())
+    facets["status"]["open"] = facets["total"] - facets["status"].get("closed", 0)
+
+    _facet_cache.set(key, facets)
+    return facets
+
+
+def invalidate_facet_cache():
+    """清除計數快取（問題新增、匯入、結案、編輯與批次操作提交後呼叫）"""
+    _facet_cache.clear()
@@ -0,0 +1,199 @@
+import json
+import logging
+
+from sqlalchemy import event, text
+
+from app.database import Base
+from app.models.question_list_view import QuestionListView
+
+logger = logging.getLogger(__name__)
+
+# 問題列表反正規化資料表，由下列觸發器在寫入時逐筆維護
+LIST_VIEW_TABLE = QuestionListView.__tablename__
+
+_DEPARTMENTS_SQL = """COALESCE((
+    SELECT json_group_array(json_object('id', d.id, 'code', d.code, 'name', d.name, 'parent_id', d.parent_id))
+    FROM (
+        SELECT d.* FROM {link} link
+        JOIN departments d ON d.id = link.department_id
+        WHERE link.question_id = q.id
+        ORDER BY d.id
+    ) d
+), '[]')"""
+
+# 重新計算指定問題在列表資料表中的整筆資料；{where} 為篩選 questions q 的條件
+# 每次重新計算時 version 遞增，供 ETag 判斷頁面內容是否變更
+_REFRESH_SQL = f"""
+    INSERT OR REPLACE INTO {LIST_VIEW_TABLE} (
+        id, version, question_version, title, year, question_date, created_date, status, display_status, summary,
+        closed_date, creator_id, reply_count, first_reply_date, report_departments, answer_departments
+    )
+    SELECT
+        q.id,
+        COALESCE((SELECT v.version FROM {LIST_VIEW_TABLE} v WHERE v.id = q.id), 0) + 1,
+        q.version,
+        q.title, q.year, q.question_date, q.created_date, lower(q.status),
+        CASE
+            WHEN lower(q.status) = 'closed' AND q.closed_date IS NULL THEN
+                CASE WHEN EXISTS (SELECT 1 FROM reports r WHERE r.question_id = q.id)
+                    THEN 'ANSWERED' ELSE 'PENDING' END
+            ELSE upper(q.status)
+        END,
+        q.summary, q.closed_date, q.creator_id,
+        (SELECT COUNT(*) FROM reports r WHERE r.question_id = q.id),
+        (SELECT MIN(r.reply_date) FROM reports r WHERE r.question_id = q.id),
+        {_DEPARTMENTS_SQL.format(link="question_report_department")},
+        {_DEPARTMENTS_SQL.format(link="question_answer_department")}
+    FROM questions q
+    WHERE {{where}}
+"""
+
+
+def _refresh(where):
+    return _REFRESH_SQL.format(where=where).strip() + ";"
+
+
+LIST_VIEW_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS questions_list_view_ai AFTER INSERT ON questions BEGIN
+        {_refresh("q.id = NEW.id")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS questions_list_view_au AFTER UPDATE ON questions BEGIN
+        DELETE FROM {LIST_VIEW_TABLE} WHERE id = OLD.id AND OLD.id != NEW.id;
+        {_refresh("q.id = NEW.id")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS questions_list_view_ad AFTER DELETE ON questions BEGIN
+        DELETE FROM {LIST_VIEW_TABLE} WHERE id = OLD.id;
+    END
+    """,
+]
+
+# 回覆與部門關聯異動時，重新計算所屬問題
+for _table in ("reports", "question_report_department", "question_answer_department"):
+    LIST_VIEW_DDL += [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {_table}_list_view_ai AFTER INSERT ON {_table} BEGIN
+            {_refresh("q.id = NEW.question_id")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {_table}_list_view_au AFTER UPDATE ON {_table} BEGIN
+            {_refresh("q.id IN (OLD.question_id, NEW.question_id)")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {_table}_list_view_ad AFTER DELETE ON {_table} BEGIN
+            {_refresh("q.id = OLD.question_id")}
+        END
+        """,
+    ]
+
+# 部門更名或改代碼時，重新計算所有關聯的問題
+LIST_VIEW_DDL.append(f"""
+    CREATE TRIGGER IF NOT EXISTS departments_list_view_au AFTER UPDATE OF code, name, parent_id ON departments BEGIN
+        {_refresh('''q.id IN (
+            SELECT question_id FROM question_report_department WHERE department_id = NEW.id
+            UNION
+            SELECT question_id FROM question_answer_department WHERE department_id = NEW.id
+        )''')}
+    END
+""")
+
+
+# 資料表建立後才新增的欄位，重建時以 ALTER TABLE 補上
+ADDED_COLUMNS = {
+    "version": "INTEGER NOT NULL DEFAULT 0",
+    "question_version": "INTEGER NOT NULL DEFAULT 1",
+}
+
+
+def create_list_view_triggers(connection):
+    """建立列表資料表的同步觸發器（已存在時略過）"""
+    for statement in LIST_VIEW_DDL:
+        connection.execute(text(statement))
+
+
+def rebuild_list_view(connection):
+    """
+    重建問題列表資料表
+
+    用於既有資料庫第一次啟用列表資料表、資料表新增欄位後，或資料不一致時重新整理。
+    觸發器會重新建立；既有資料的 version 繼續遞增而不歸零，避免與用戶端快取的 ETag 相撞。
+    """
+    QuestionListView.__table__.create(connection, checkfirst=True)
+    add_question_version_column(connection)
+    _add_missing_columns(connection)
+    _recreate_list_view_triggers(connection)
+
+    connection.execute(text(f"DELETE FROM {LIST_VIEW_TABLE} WHERE id NOT IN (SELECT id FROM questions)"))
+    connection.execute(text(_REFRESH_SQL.format(where="1 = 1")))
+    count = connection.execute(text(f"SELECT COUNT(*) FROM {LIST_VIEW_TABLE}")).scalar()
+    logger.info("問題列表資料表重建完成，共 %s 筆問題", count)
+    return count
+
+
+def _recreate_list_view_triggers(connection):
+    # 觸發器內容可能已更新，先刪除再重新建立
+    triggers = connection.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%list_view%'"
+    )).scalars().all()
+    for name in triggers:
+        connection.execute(text(f"DROP TRIGGER {name}"))
+    create_list_view_triggers(connection)
+
+
+def add_question_version_column(connection):
+    """
+    為既有資料庫的 questions 資料表加入樂觀鎖版本欄位（已存在時略過）
+
+    列表資料表的觸發器與重新計算會讀取 questions.version，須在建立觸發器之前補上。
+
+    Returns:
+        bool: 是否新增了欄位
+    """
+    columns = {row[1] for row in connection.execute(text("PRAGMA table_info(questions)"))}
+    if "version" in columns:
+        return False
+    connection.execute(text("ALTER TABLE questions ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+    logger.info("已新增 questions.version 欄位")
+    return True
+
+
+def _add_missing_columns(connection):
+    # 補上舊版資料表缺少的欄位，返回新增的欄位名稱
+    existing = {row[1] for row in connection.execute(text(f"PRAGMA table_info({LIST_VIEW_TABLE})"))}
+    added = [name for name in ADDED_COLUMNS if name not in existing]
+    for name in added:
+        connection.execute(text(f"ALTER TABLE {LIST_VIEW_TABLE} ADD COLUMN {name} {ADDED_COLUMNS[name]}"))
+        logger.info("問題列表資料表新增欄位 %s", name)
+    return added
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_list_view_triggers_after_tables(target, connection, **kw):
+    # 每次啟動都同步觸發器與資料：補上既有資料庫缺少的欄位，並重新計算缺少或過期的資料列。
+    # SQLite 的 DDL 不在同一個交易中，填入失敗時資料表仍會建立；下次啟動會再補上未填入的問題
+    if connection.dialect.name != "sqlite":
+        return
+    add_question_version_column(connection)
+    _add_missing_columns(connection)
+    # 觸發器內容可能早於目前的欄位，重新建立
+    _recreate_list_view_triggers(connection)
+    refreshed = connection.execute(text(_REFRESH_SQL.format(where=f"""NOT EXISTS (
+        SELECT 1 FROM {LIST_VIEW_TABLE} lv WHERE lv.id = q.id AND lv.question_version = q.version
+    )"""))).rowcount
+    if refreshed:
+        logger.info("已以既有資料補上問題列表資料表，共 %s 筆問題", refreshed)
+
+
+def load_department_list(value):
+    """將原始 SQL 取得的部門 JSON 字串轉為部門字典列表"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
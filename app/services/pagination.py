@@ -0,0 +1,129 @@
+import base64
+import json
+import logging
+from datetime import datetime
+
+from app.services.dates import CANONICAL_FORMAT
+
+logger = logging.getLogger(__name__)
+
+# 每頁筆數預設值與上限
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+PAGE_SIZE_OPTIONS = [10, 20, 50, 100]
+
+
+def clamp_page_size(page_size):
+    """將每頁筆數限制在 1 ~ MAX_PAGE_SIZE 之間"""
+    if not page_size or page_size < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(page_size, MAX_PAGE_SIZE)
+
+
+def encode_cursor(created_date, question_id):
+    """
+    將 (created_date, id) 編碼為分頁游標
+
+    Args:
+        created_date: 建立日期（datetime 或資料庫中儲存的原始字串）
+        question_id: 問題 ID
+
+    Returns:
+        str: URL 安全的游標字串
+    """
+    # datetime 須以儲存格式編碼（str() 會省略 .000000），否則游標與資料庫的字串比較會略過同一秒的資料
+    if isinstance(created_date, datetime):
+        created_date = created_date.strftime(CANONICAL_FORMAT)
+    raw = json.dumps([str(created_date) if created_date is not None else None, question_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    解碼分頁游標
+
+    Returns:
+        tuple: (created_date, id)，游標無效時返回 None
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_date, question_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return created_date, int(question_id)
+    except (ValueError, TypeError):
+        logger.warning("無效的分頁游標: %s", cursor)
+        return None
+
+
+def keyset_clause(cursor, backward=False, table="questions"):
+    """
+    產生 (created_date, id) 鍵集分頁的 WHERE 條件與排序
+
+    列表固定依 created_date DESC, id DESC 排序；往下一頁取比游標「舊」的資料，
+    往上一頁則以反向排序取比游標「新」的資料，取回後由呼叫端反轉。
+    created_date 為 NULL 的舊資料（SQLite 中排序最小）排在最後，以 IS NULL 條件另外比較，
+    否則與游標的大小比較永遠不成立，翻頁後就再也取不到。
+
+    Returns:
+        tuple: (where 條件或 None, ORDER BY 子句, 參數字典)
+    """
+    if backward:
+        order_by = f"{table}.created_date ASC, {table}.id ASC"
+        comparison = ">"
+    else:
+        order_by = f"{table}.created_date DESC, {table}.id DESC"
+        comparison = "<"
+
+    if cursor is None:
+        return None, order_by, {}
+
+    created_date, question_id = cursor
+    if created_date is None:
+        # 游標位於 created_date 為 NULL 的資料：只在 NULL 資料中依 id 比較；往上一頁時所有有日期的資料都較新
+        where = f"({table}.created_date IS NULL AND {table}.id {comparison} :cursor_id)"
+        if backward:
+            where = f"({where} OR {table}.created_date IS NOT NULL)"
+        return where, order_by, {"cursor_id": question_id}
+
+    where = f"({table}.created_date, {table}.id) {comparison} (:cursor_created_date, :cursor_id)"
+    if not backward:
+        # 往下一頁時 NULL 資料都排在有日期的資料之後
+        where = f"({where} OR {table}.created_date IS NULL)"
+    return where, order_by, {"cursor_created_date": created_date, "cursor_id": question_id}
+
+
+def paginate_rows(rows, page_size, cursor, backward=False):
+    """
+    整理多取一筆的鍵集分頁查詢結果
+
+    Args:
+        rows: 以 LIMIT page_size + 1 取得的資料列（需有 created_date 與 id 欄位）
+        page_size: 每頁筆數
+        cursor: 本次查詢使用的游標（decode_cursor 的結果），第一頁為 None
+        backward: 是否為往上一頁查詢
+
+    Returns:
+        tuple: (本頁資料列（由新到舊）, 上一頁游標, 下一頁游標)
+    """
+    has_more = len(rows) > page_size
+    rows = list(rows[:page_size])
+    if backward:
+        # 上一頁是以反向排序取得，需還原為由新到舊
+        rows.reverse()
+
+    prev_cursor = next_cursor = None
+    if rows:
+        # 以資料庫的儲存格式產生游標，避免日期轉換後格式不一致
+        first_cursor = encode_cursor(rows[0].created_date, rows[0].id)
+        last_cursor = encode_cursor(rows[-1].created_date, rows[-1].id)
+        if backward:
+            next_cursor = last_cursor
+            if has_more:
+                prev_cursor = first_cursor
+        else:
+            if has_more:
+                next_cursor = last_cursor
+            if cursor is not None:
+                prev_cursor = first_cursor
+    return rows, prev_cursor, next_cursor
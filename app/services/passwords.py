@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# bcrypt 雜湊與驗證專用的執行緒池：限制同時進行的雜湊數量，其餘請求在池中排隊，
+# 不會佔住事件迴圈或 FastAPI 的預設執行緒池
+_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+
+# 准入控制：執行中與排隊中的雜湊總數上限，超過時立即拒絕而不是無限排隊
+_admission = threading.BoundedSemaphore(settings.PASSWORD_HASH_MAX_PENDING)
+
+
+class PasswordHashBusy(RuntimeError):
+    """排隊等待雜湊的請求已達上限"""
+
+
+def _submit(fn, *args):
+    if not _admission.acquire(blocking=False):
+        logger.warning("密碼雜湊排隊已達上限 %s，拒絕請求", settings.PASSWORD_HASH_MAX_PENDING)
+        raise PasswordHashBusy("系統忙碌，請稍後再試")
+    try:
+        future = _executor.submit(fn, *args)
+    except Exception:
+        _admission.release()
+        raise
+    future.add_done_callback(lambda _: _admission.release())
+    return future
+
+
+def _verify(password, password_hash):
+    if not password_hash:
+        return False
+    return pwd_context.verify(password, password_hash)
+
+
+def hash_password(password):
+    """在雜湊執行緒池中計算密碼雜湊並等待結果（供同步程式碼使用）"""
+    return _submit(pwd_context.hash, password).result()
+
+
+def verify_password(password, password_hash):
+    """在雜湊執行緒池中驗證密碼並等待結果（供同步程式碼使用）"""
+    return _submit(_verify, password, password_hash).result()
+
+
+async def hash_password_async(password):
+    """在雜湊執行緒池中計算密碼雜湊，等待期間不阻塞事件迴圈"""
+    return await asyncio.wrap_future(_submit(pwd_context.hash, password))
+
+
+async def verify_password_async(password, password_hash):
+    """在雜湊執行緒池中驗證密碼，等待期間不阻塞事件迴圈"""
+    return await asyncio.wrap_future(_submit(_verify, password, password_hash))
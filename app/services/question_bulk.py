@@ -0,0 +1,157 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.services.counters import _STATE_SQL, questions_bureaus, record_state_changes
+from app.services.dates import typed_text
+from app.services.question_queries import _id_list_params, question_visibility_clause
+
+logger = logging.getLogger(__name__)
+
+
+class BulkOperationError(ValueError):
+    """批次操作無法執行（問題不存在、無權限或參數錯誤），整批都不會寫入"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def load_bulk_targets(db, question_ids, user, accessible_department_ids):
+    """
+    以一個查詢檢查批次操作的問題是否存在、用戶是否有權限，並取得各問題目前的計數狀態
+
+    任何一個問題不存在或無權訪問時整批拒絕。
+
+    Returns:
+        dict: {問題 ID: 狀態（pending / answered / closed）}，依傳入順序
+    """
+    question_ids = list(dict.fromkeys(question_ids))
+    if not question_ids:
+        raise BulkOperationError("請選擇至少一個問題")
+
+    placeholders, params = _id_list_params("question_", question_ids)
+    visibility, visibility_params = question_visibility_clause(user, accessible_department_ids, table="q")
+    params.update(visibility_params)
+    rows = db.execute(text(f"""
+        SELECT q.id, {_STATE_SQL} AS state, {f"CASE WHEN {visibility} THEN 1 ELSE 0 END" if visibility else "1"} AS visible
+        FROM questions q
+        WHERE q.id IN ({placeholders})
+    """), params).fetchall()
+
+    found = {row.id: row for row in rows}
+    missing = [question_id for question_id in question_ids if question_id not in found]
+    if missing:
+        raise BulkOperationError(f"問題不存在: {', '.join(map(str, missing))}", status_code=404)
+    denied = [question_id for question_id in question_ids if not found[question_id].visible]
+    if denied:
+        raise BulkOperationError(f"無權訪問問題: {', '.join(map(str, denied))}", status_code=403)
+    return {question_id: found[question_id].state for question_id in question_ids}
+
+
+def bulk_close_questions(db, states, summary):
+    """
+    批次結案（不提交），已結案的問題略過
+
+    以單一 UPDATE 更新所有問題，儀表板計數以一次 executemany 更新。
+
+    Returns:
+        list: 本次結案的問題 ID
+    """
+    question_ids = [question_id for question_id, state in states.items() if state != "closed"]
+    if not question_ids:
+        return []
+
+    placeholders, params = _id_list_params("question_", question_ids)
+    db.execute(
+        typed_text(f"""
+            UPDATE questions
+            SET status = 'closed',
+                summary = :summary,
+                closed_date = :closed_date,
+                version = version + 1
+            WHERE id IN ({placeholders})
+        """),
+        {"summary": summary, "closed_date": datetime.now(), **params}
+    )
+
+    bureaus = questions_bureaus(db, question_ids)
+    record_state_changes(db, [
+        (bureaus[question_id], states[question_id], "closed") for question_id in question_ids
+    ])
+    logger.info(f"批次結案: {len(question_ids)} 個問題")
+    return question_ids
+
+
+def bulk_reassign_questions(db, states, answer_department_ids, accessible_department_ids):
+    """
+    批次更換回答部門（不提交），新的回答部門取代各問題原有的回答部門
+
+    部門與填報部門衝突各以一個查詢檢查；關聯以一個 DELETE 與一次 executemany INSERT 更新。
+
+    Returns:
+        list: 更新的問題 ID
+    """
+    answer_department_ids = list(dict.fromkeys(answer_department_ids))
+    if not answer_department_ids:
+        raise BulkOperationError("請選擇至少一個回答部門")
+
+    dept_placeholders, dept_params = _id_list_params("dept_", answer_department_ids)
+    departments = {
+        row.id: row.code
+        for row in db.execute(
+            text(f"SELECT id, code FROM departments WHERE id IN ({dept_placeholders})"),
+            dept_params
+        )
+    }
+    for dept_id in answer_department_ids:
+        code = departments.get(dept_id)
+        if code is None or not code.endswith('00'):
+            raise BulkOperationError(f"部門 ID={dept_id} 不是處層級部門")
+        if dept_id not in accessible_department_ids:
+            raise BulkOperationError(f"用戶無權訪問部門 ID={dept_id}", status_code=403)
+
+    question_ids = list(states)
+    question_placeholders, question_params = _id_list_params("question_", question_ids)
+    conflicts = db.execute(
+        text(f"""
+            SELECT DISTINCT question_id FROM question_report_department
+            WHERE question_id IN ({question_placeholders}) AND department_id IN ({dept_placeholders})
+        """),
+        {**question_params, **dept_params}
+    ).scalars().all()
+    if conflicts:
+        raise BulkOperationError(
+            f"同一個部門不能同時是報告部門和回答部門（問題: {', '.join(map(str, sorted(conflicts)))}）"
+        )
+
+    # 遞增版本，讓以舊版本送出的編輯表單得到衝突回應而不會覆蓋新的回答部門
+    db.execute(
+        text(f"UPDATE questions SET version = version + 1 WHERE id IN ({question_placeholders})"),
+        question_params
+    )
+
+    old_bureaus = questions_bureaus(db, question_ids)
+    db.execute(
+        text(f"DELETE FROM question_answer_department WHERE question_id IN ({question_placeholders})"),
+        question_params
+    )
+    db.execute(
+        text("INSERT INTO question_answer_department (question_id, department_id) VALUES (:question_id, :department_id)"),
+        [
+            {"question_id": question_id, "department_id": dept_id}
+            for question_id in question_ids
+            for dept_id in answer_department_ids
+        ]
+    )
+
+    # 狀態不變，計數從原回答部門的局/處移到新的局/處（全系統合計增減相抵）
+    new_bureaus = questions_bureaus(db, question_ids)
+    changes = []
+    for question_id, state in states.items():
+        changes.append((old_bureaus[question_id], state, None))
+        changes.append((new_bureaus[question_id], None, state))
+    record_state_changes(db, changes)
+    logger.info(f"批次更換回答部門: {len(question_ids)} 個問題 -> 部門 {answer_department_ids}")
+    return question_ids
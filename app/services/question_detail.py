@@ -0,0 +1,120 @@
+import logging
+
+from app.cache import TTLCache
+from app.config import settings
+from app.dependencies import has_permission
+from app.services.dates import typed_text
+from app.services.list_view import LIST_VIEW_TABLE
+from app.services.question_queries import _id_list_params, question_visibility_clause
+from app.view_models import QuestionDetail, ReportView, department_views
+
+logger = logging.getLogger(__name__)
+
+# 問題詳情快取，鍵為問題 ID，值為 {用戶權限指紋: (版本, QuestionDetail)}，
+# 以問題為單位淘汰（LRU），問題或回覆變更時整筆移除
+_detail_cache = TTLCache(
+    maxsize=settings.DETAIL_CACHE_MAX_ENTRIES,
+    ttl=settings.DETAIL_CACHE_TTL_SECONDS
+)
+
+# 問題詳情需要的列表資料表欄位（部門與顯示狀態都已預先算好）
+_DETAIL_COLUMNS = (
+    "id", "version", "title", "year", "question_date", "created_date", "closed_date",
+    "status", "display_status", "summary", "creator_id", "report_departments", "answer_departments",
+)
+
+
+def visible_question_row(db, question_id, user, accessible_department_ids):
+    """
+    以單一查詢取得用戶可見的問題資料（含問題內容、填報與回答部門、顯示狀態與版本）
+
+    權限在 SQL 中判斷，問題不存在或用戶無權查看時返回 None。
+    """
+    visibility, params = question_visibility_clause(user, accessible_department_ids, table=LIST_VIEW_TABLE)
+    columns = ", ".join(f"{LIST_VIEW_TABLE}.{column}" for column in _DETAIL_COLUMNS)
+    sql = f"""
+        SELECT {columns}, q.content, q.version AS question_version
+        FROM {LIST_VIEW_TABLE}
+        JOIN questions q ON q.id = {LIST_VIEW_TABLE}.id
+        WHERE {LIST_VIEW_TABLE}.id = :question_id
+    """
+    if visibility:
+        sql += f" AND {visibility}"
+    return db.execute(typed_text(sql), {"question_id": question_id, **params}).fetchone()
+
+
+def build_question_detail(db, row, user, accessible_department_ids):
+    """
+    由 visible_question_row 的結果組成 QuestionDetail
+
+    回覆以一個查詢取得，只包含用戶可見的回覆（manage_all 可看全部，其他用戶只看自己所屬部門的回覆）。
+    """
+    report_departments = department_views(row.report_departments)
+    answer_departments = department_views(row.answer_departments)
+    question = QuestionDetail(row, report_departments, answer_departments)
+
+    # 只顯示用戶有權限的部門
+    can_see_all = has_permission(user, "manage_all")
+    if not can_see_all:
+        question.filtered_report_departments = [
+            dept for dept in report_departments if dept.id in accessible_department_ids
+        ]
+        question.filtered_answer_departments = [
+            dept for dept in answer_departments if dept.id in accessible_department_ids
+        ]
+
+    user_department_ids = [dept.id for dept in user.departments]
+    sql = """
+        SELECT r.id, r.reply_content, r.reply_date, r.user_id,
+               u.username, d.id AS department_id, d.name AS department_name
+        FROM reports r
+        JOIN users u ON r.user_id = u.id
+        JOIN departments d ON u.department_id = d.id
+        WHERE r.question_id = :question_id
+    """
+    params = {"question_id": row.id}
+    if not can_see_all:
+        if user_department_ids:
+            placeholders, department_params = _id_list_params("own_dept_", user_department_ids)
+            sql += f" AND d.id IN ({placeholders})"
+            params.update(department_params)
+        else:
+            sql += " AND 0 = 1"
+    sql += " ORDER BY r.reply_date DESC"
+    question.reports = [ReportView(*report) for report in db.execute(typed_text(sql), params)]
+
+    # 用戶屬於問題的回答部門，且所屬部門尚未回覆時才能回覆
+    question.can_reply = (
+        has_permission(user, "create_report")
+        and any(dept.id in user_department_ids for dept in answer_departments)
+        and not any(report.department_id in user_department_ids for report in question.reports)
+    )
+    return question
+
+
+def cached_question_detail(question_id, fingerprint):
+    """取得快取的問題詳情，返回 (版本, QuestionDetail) 或 None"""
+    entries = _detail_cache.get(question_id)
+    if entries is None:
+        return None
+    return entries.get(fingerprint)
+
+
+def cache_question_detail(question_id, fingerprint, version, question):
+    """快取問題詳情（QuestionDetail 建立後不再修改，可在請求間共用）"""
+    entries = dict(_detail_cache.get(question_id) or {})
+    entries[fingerprint] = (version, question)
+    _detail_cache.set(question_id, entries)
+
+
+def invalidate_question_detail(question_id=None):
+    """
+    清除問題詳情快取
+
+    Args:
+        question_id: 只清除指定問題；為 None 時清除全部（部門資料變更時使用）
+    """
+    if question_id is None:
+        _detail_cache.clear()
+    else:
+        _detail_cache.pop(question_id)
@@ -0,0 +1,230 @@
+import csv
+import io
+import logging
+import re
+from datetime import datetime, date
+
+import openpyxl
+from sqlalchemy import insert, select
+
+from app.config import settings
+from app.models.department import Department
+from app.models.question import Question, QuestionStatus, question_report_department, question_answer_department
+from app.services.counters import record_state_changes
+from app.services.dates import parse_stored_datetime
+
+logger = logging.getLogger(__name__)
+
+# 匯入檔的欄位標題（中文或英文皆可）
+IMPORT_COLUMNS = {
+    "標題": "title", "title": "title",
+    "內容": "content", "content": "content",
+    "年度": "year", "year": "year",
+    "問題日期": "question_date", "question_date": "question_date",
+    "填報單位代碼": "report_department_codes", "report_department_codes": "report_department_codes",
+    "回答單位代碼": "answer_department_codes", "answer_department_codes": "answer_department_codes",
+}
+REQUIRED_COLUMNS = ("title", "content", "report_department_codes", "answer_department_codes")
+
+# 多個部門代碼的分隔符號
+_CODE_SEPARATOR = re.compile(r"[,，、;；\s]+")
+
+
+class ImportFileError(ValueError):
+    """匯入檔無法讀取或缺少必要欄位"""
+
+
+def iter_import_rows(filename, file):
+    """
+    逐列讀取上傳的 XLSX 或 CSV 檔，返回各列的值（不含標題列以外的格式資訊）
+
+    XLSX 以 openpyxl 唯讀模式讀取，不會把整個活頁簿載入記憶體。
+    """
+    name = (filename or "").lower()
+    if name.endswith(".xlsx"):
+        try:
+            workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        except Exception as e:
+            raise ImportFileError(f"無法讀取 Excel 檔: {str(e)}")
+        try:
+            for values in workbook.active.iter_rows(values_only=True):
+                yield list(values)
+        finally:
+            workbook.close()
+    elif name.endswith(".csv"):
+        text_file = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        try:
+            yield from csv.reader(text_file)
+        except UnicodeDecodeError:
+            raise ImportFileError("CSV 檔必須使用 UTF-8 編碼")
+        finally:
+            text_file.detach()
+    else:
+        raise ImportFileError("只支援 .xlsx 或 .csv 檔")
+
+
+def _cell_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _parse_codes(value):
+    # Excel 會把 0100 這類代碼存成數字 100，補回處層級代碼的 4 位數
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return [_cell_text(value).zfill(4)]
+    return [code for code in _CODE_SEPARATOR.split(_cell_text(value)) if code]
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    text_value = _cell_text(value)
+    if not text_value:
+        return None
+    parsed = parse_stored_datetime(text_value)
+    if parsed is None:
+        raise ValueError(f"問題日期格式錯誤: {text_value}")
+    return parsed
+
+
+def parse_import_rows(rows):
+    """
+    解析匯入檔的各列
+
+    第一列為欄位標題，空白列略過。
+
+    Returns:
+        list: [(列號, 欄位字典)]，部門代碼尚未轉換為 ID
+    """
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        raise ImportFileError("匯入檔沒有資料")
+    columns = [IMPORT_COLUMNS.get(_cell_text(name).lower()) or IMPORT_COLUMNS.get(_cell_text(name)) for name in header]
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise ImportFileError(f"缺少必要欄位: {', '.join(missing)}")
+
+    parsed = []
+    for row_number, values in enumerate(rows, start=2):
+        if not any(_cell_text(value) for value in values):
+            continue
+        if len(parsed) >= settings.IMPORT_MAX_ROWS:
+            raise ImportFileError(f"單次最多匯入 {settings.IMPORT_MAX_ROWS} 筆")
+        record = {}
+        for column, value in zip(columns, values):
+            if column:
+                record[column] = value
+        parsed.append((row_number, record))
+    return parsed
+
+
+def import_questions(db, user, accessible_department_ids, rows):
+    """
+    批次匯入問題
+
+    部門代碼以一個查詢轉為 ID；驗證失敗的列記錄錯誤並略過，其餘的問題與部門關聯
+    以 executemany 在同一個交易中寫入（由呼叫端提交）。
+
+    Returns:
+        tuple: (新增的問題 ID 列表, [(列號, 錯誤訊息)])
+    """
+    records = parse_import_rows(rows)
+
+    all_codes = {
+        code
+        for _, record in records
+        for key in ("report_department_codes", "answer_department_codes")
+        for code in _parse_codes(record.get(key))
+    }
+    departments = {}
+    if all_codes:
+        departments = {
+            dept.code: dept
+            for dept in db.execute(
+                select(Department.id, Department.code).where(Department.code.in_(all_codes))
+            )
+        }
+
+    now = datetime.utcnow()
+    current_year = datetime.now().year
+    valid, errors = [], []
+    for row_number, record in records:
+        try:
+            title = _cell_text(record.get("title"))
+            content = _cell_text(record.get("content"))
+            if not title:
+                raise ValueError("標題不可空白")
+            if not content:
+                raise ValueError("內容不可空白")
+
+            year_text = _cell_text(record.get("year"))
+            if year_text and not year_text.isdigit():
+                raise ValueError(f"年度格式錯誤: {year_text}")
+            year = int(year_text) if year_text else current_year
+            question_date = _parse_date(record.get("question_date")) or datetime.combine(now.date(), datetime.min.time())
+
+            department_ids = {}
+            for key in ("report_department_codes", "answer_department_codes"):
+                codes = _parse_codes(record.get(key))
+                if not codes:
+                    raise ValueError("填報單位與回答單位代碼不可空白")
+                ids = []
+                for code in codes:
+                    dept = departments.get(code)
+                    if not dept:
+                        raise ValueError(f"部門代碼不存在: {code}")
+                    if not code.endswith("00"):
+                        raise ValueError(f"部門代碼 {code} 不是處層級部門")
+                    if dept.id not in accessible_department_ids:
+                        raise ValueError(f"無權訪問部門代碼 {code}")
+                    if dept.id not in ids:
+                        ids.append(dept.id)
+                department_ids[key] = ids
+            if set(department_ids["report_department_codes"]) & set(department_ids["answer_department_codes"]):
+                raise ValueError("同一個部門不能同時是報告部門和回答部門")
+        except ValueError as e:
+            errors.append((row_number, str(e)))
+            continue
+
+        valid.append((
+            {
+                "title": title,
+                "content": content,
+                "year": year,
+                "question_date": question_date,
+                "created_date": now,
+                "status": QuestionStatus.PENDING,
+                "creator_id": user.id,
+            },
+            department_ids["report_department_codes"],
+            department_ids["answer_department_codes"],
+        ))
+
+    if not valid:
+        return [], errors
+
+    # 以 executemany 新增問題並依參數順序取回 ID
+    result = db.execute(
+        insert(Question.__table__).returning(Question.__table__.c.id, sort_by_parameter_order=True),
+        [question for question, _, _ in valid]
+    )
+    question_ids = list(result.scalars())
+
+    report_links, answer_links = [], []
+    for question_id, (_, report_ids, answer_ids) in zip(question_ids, valid):
+        report_links.extend({"question_id": question_id, "department_id": dept_id} for dept_id in report_ids)
+        answer_links.extend({"question_id": question_id, "department_id": dept_id} for dept_id in answer_ids)
+    db.execute(insert(question_report_department), report_links)
+    db.execute(insert(question_answer_department), answer_links)
+
+    # 回答部門皆為處層級，直接作為儀表板計數的局/處
+    record_state_changes(db, [(answer_ids, None, "pending") for _, _, answer_ids in valid])
+
+    logger.info(f"匯入問題: 用戶={user.username}, 新增={len(question_ids)}, 錯誤={len(errors)}")
+    return question_ids, errors
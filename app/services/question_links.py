@@ -0,0 +1,39 @@
+import logging
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# 問題與部門的關聯資料表
+LINK_TABLES = ("question_report_department", "question_answer_department")
+
+
+def sync_department_links(db, table, question_id, current_ids, new_ids):
+    """
+    將問題在關聯資料表中的部門更新為 new_ids（不提交）
+
+    只寫入與目前關聯的差異：新增與刪除各以一次 executemany 執行，沒有變更時不寫入。
+
+    Returns:
+        tuple: (新增的部門 ID 列表, 刪除的部門 ID 列表)
+    """
+    if table not in LINK_TABLES:
+        raise ValueError(f"未知的關聯資料表: {table}")
+
+    current_ids = set(current_ids)
+    added = [dept_id for dept_id in dict.fromkeys(new_ids) if dept_id not in current_ids]
+    removed = sorted(current_ids.difference(new_ids))
+
+    if removed:
+        db.execute(
+            text(f"DELETE FROM {table} WHERE question_id = :question_id AND department_id = :department_id"),
+            [{"question_id": question_id, "department_id": dept_id} for dept_id in removed]
+        )
+    if added:
+        db.execute(
+            text(f"INSERT INTO {table} (question_id, department_id) VALUES (:question_id, :department_id)"),
+            [{"question_id": question_id, "department_id": dept_id} for dept_id in added]
+        )
+    if added or removed:
+        logger.debug("更新 %s 問題 ID=%s: 新增 %s, 刪除 %s", table, question_id, added, removed)
+    return added, removed
@@ -0,0 +1,154 @@
+import logging
+
+from app.dependencies import has_permission
+from app.services.list_view import LIST_VIEW_TABLE
+from app.services.pagination import DEFAULT_PAGE_SIZE, keyset_clause
+
+logger = logging.getLogger(__name__)
+
+# 狀態欄位同時存在 ORM 寫入的列舉名稱（大寫）與原始 SQL 寫入的列舉值（小寫）
+STATUS_STORED_VALUES = {
+    "pending": ("pending", "PENDING"),
+    "answered": ("answered", "ANSWERED"),
+    "closed": ("closed", "CLOSED"),
+}
+
+
+def _id_list_params(prefix, ids):
+    """將 ID 列表展開為具名參數，返回 (佔位符字串, 參數字典)"""
+    params = {f"{prefix}{i}": value for i, value in enumerate(ids)}
+    placeholders = ", ".join(f":{name}" for name in params)
+    return placeholders, params
+
+
+def question_department_clause(department_placeholder, table="questions"):
+    """
+    產生「問題的填報部門或回答部門符合條件」的 SQL 條件
+
+    Args:
+        department_placeholder: department_id 的比較式，例如 "= :department_id" 或 "IN (:d0, :d1)"
+        table: 問題 ID 所在的資料表名稱
+    """
+    return (
+        "(EXISTS (SELECT 1 FROM question_report_department qrd"
+        " WHERE qrd.question_id = {table}.id AND qrd.department_id {cond})"
+        " OR EXISTS (SELECT 1 FROM question_answer_department qad"
+        " WHERE qad.question_id = {table}.id AND qad.department_id {cond}))"
+    ).format(cond=department_placeholder, table=table)
+
+
+def question_visibility_clause(user, accessible_department_ids, table="questions"):
+    """
+    產生用戶可見問題的 SQL 條件
+
+    具有 manage_all 權限的用戶可以看到所有問題，直接返回 None；
+    其他用戶只能看到填報部門或回答部門在可訪問部門中的問題。
+
+    Returns:
+        tuple: (SQL 條件或 None, 參數字典)
+    """
+    if has_permission(user, "manage_all"):
+        return None, {}
+
+    if not accessible_department_ids:
+        # 沒有可訪問的部門，任何問題都不可見
+        return "0 = 1", {}
+
+    placeholders, params = _id_list_params("access_dept_", sorted(accessible_department_ids))
+    return question_department_clause(f"IN ({placeholders})", table), params
+
+
+def build_question_filters(user, accessible_department_ids, status=None, department_id=None, year=None, table="questions"):
+    """
+    組合問題查詢的 WHERE 條件（權限、狀態、部門、年度）
+
+    所有條件都以 table 資料表（預設為 questions，也可以是 question_list_view）的欄位表示，
+    可直接用於原始 SQL，也可以透過 text() 套用在 ORM 查詢上。
+
+    Args:
+        user: 當前用戶
+        accessible_department_ids: 用戶可訪問的部門 ID 集合
+        status: "open"（未結案）、"all" 或 QuestionStatus 的值
+        department_id: 部門 ID（int），不在用戶可訪問部門中時不返回任何問題
+        year: 年度（int）
+        table: 查詢的資料表名稱
+
+    Returns:
+        tuple: (條件列表, 參數字典)
+    """
+    clauses = []
+    params = {}
+
+    visibility, visibility_params = question_visibility_clause(user, accessible_department_ids, table)
+    if visibility:
+        clauses.append(visibility)
+        params.update(visibility_params)
+
+    if status and status != "all":
+        if status == "open":
+            clauses.append(f"{table}.status NOT IN ('closed', 'CLOSED')")
+        elif status in STATUS_STORED_VALUES:
+            lower, upper = STATUS_STORED_VALUES[status]
+            clauses.append(f"{table}.status IN (:status_lower, :status_upper)")
+            params.update({"status_lower": lower, "status_upper": upper})
+        else:
+            logger.warning("無效的狀態值: %s", status)
+
+    if department_id is not None:
+        if visibility and department_id not in accessible_department_ids:
+            logger.info("用戶無權訪問部門 ID: %s", department_id)
+            clauses.append("0 = 1")
+        clauses.append(question_department_clause("= :filter_department_id", table))
+        params["filter_department_id"] = department_id
+
+    if year is not None:
+        clauses.append(f"{table}.year = :filter_year")
+        params["filter_year"] = year
+
+    return clauses, params
+
+
+def parse_int(value, label):
+    """將查詢字串參數轉為整數，空值或無效值返回 None"""
+    if value is None or not str(value).strip():
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning("無效的%s: %s", label, value)
+        return None
+
+
+def build_question_list_query(user, accessible_department_ids, status=None, department_id=None, year=None,
+                              cursor=None, backward=False, page_size=DEFAULT_PAGE_SIZE, columns="*"):
+    """
+    組合問題列表的分頁查詢（讀取 question_list_view）
+
+    多取一筆用來判斷是否還有下一頁，結果交由 paginate_rows 整理。
+
+    Args:
+        columns: SELECT 的欄位，預設為全部欄位
+
+    Returns:
+        tuple: (SQL 字串, 參數字典)
+    """
+    clauses, params = build_question_filters(
+        user,
+        accessible_department_ids,
+        status=status,
+        department_id=department_id,
+        year=year,
+        table=LIST_VIEW_TABLE
+    )
+
+    where, order_by, keyset_params = keyset_clause(cursor, backward, table=LIST_VIEW_TABLE)
+    if where:
+        clauses.append(where)
+    params.update(keyset_params)
+    params["limit"] = page_size + 1
+
+    sql = f"SELECT {columns} FROM {LIST_VIEW_TABLE}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += f" ORDER BY {order_by} LIMIT :limit"
+    return sql, params
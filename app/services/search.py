@@ -0,0 +1,175 @@
+import logging
+
+from sqlalchemy import event, exists, text, column, select, Integer, Float, or_
+
+from app.database import Base
+from app.models.question import Question
+from app.models.report import Report
+
+logger = logging.getLogger(__name__)
+
+# 問題全文檢索索引（SQLite FTS5，trigram 分詞以支援中文任意子字串比對）
+# rowid 即為問題 ID，replies 欄位彙整該問題所有回覆內容
+SEARCH_TABLE = "question_search"
+
+# trigram 分詞最少需要 3 個字元才能比對
+MIN_TERM_LENGTH = 3
+
+# bm25 欄位權重：標題 > 摘要 > 內容 > 回覆
+BM25_WEIGHTS = "10.0, 2.0, 5.0, 1.0"
+
+_REPLIES_SQL = "COALESCE((SELECT group_concat(r.reply_content, ' ') FROM reports r WHERE r.question_id = {qid}), '')"
+
+SEARCH_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE}
+    USING fts5(title, content, summary, replies, tokenize='trigram')
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS questions_search_ai AFTER INSERT ON questions BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, title, content, summary, replies)
+        VALUES (NEW.id, NEW.title, NEW.content, COALESCE(NEW.summary, ''), '');
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS questions_search_au AFTER UPDATE OF title, content, summary ON questions BEGIN
+        UPDATE {SEARCH_TABLE}
+        SET title = NEW.title, content = NEW.content, summary = COALESCE(NEW.summary, '')
+        WHERE rowid = NEW.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS questions_search_ad AFTER DELETE ON questions BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = OLD.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS reports_search_ai AFTER INSERT ON reports BEGIN
+        UPDATE {SEARCH_TABLE} SET replies = {_REPLIES_SQL.format(qid="NEW.question_id")}
+        WHERE rowid = NEW.question_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS reports_search_au AFTER UPDATE OF reply_content, question_id ON reports BEGIN
+        UPDATE {SEARCH_TABLE} SET replies = {_REPLIES_SQL.format(qid="OLD.question_id")}
+        WHERE rowid = OLD.question_id;
+        UPDATE {SEARCH_TABLE} SET replies = {_REPLIES_SQL.format(qid="NEW.question_id")}
+        WHERE rowid = NEW.question_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS reports_search_ad AFTER DELETE ON reports BEGIN
+        UPDATE {SEARCH_TABLE} SET replies = {_REPLIES_SQL.format(qid="OLD.question_id")}
+        WHERE rowid = OLD.question_id;
+    END
+    """,
+]
+
+
+def create_search_index(connection):
+    """建立全文檢索資料表與同步觸發器（已存在時略過）"""
+    for statement in SEARCH_DDL:
+        connection.execute(text(statement))
+
+
+def rebuild_search_index(connection):
+    """
+    重建全文檢索索引
+
+    用於既有資料庫第一次啟用全文檢索，或索引與資料不一致時重新整理。
+    """
+    create_search_index(connection)
+    count = _populate_search_index(connection)
+    connection.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')"))
+    logger.info("全文檢索索引重建完成，共 %s 筆問題", count)
+    return count
+
+
+def _populate_search_index(connection):
+    # 以目前的問題與回覆重新填入索引，返回索引筆數
+    connection.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    connection.execute(text(f"""
+        INSERT INTO {SEARCH_TABLE}(rowid, title, content, summary, replies)
+        SELECT q.id, q.title, q.content, COALESCE(q.summary, ''), {_REPLIES_SQL.format(qid="q.id")}
+        FROM questions q
+    """))
+    return connection.execute(text(f"SELECT COUNT(*) FROM {SEARCH_TABLE}")).scalar()
+
+
+def _search_table_exists(connection):
+    return connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": SEARCH_TABLE}
+    ).first() is not None
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_search_index_after_tables(target, connection, **kw):
+    # 建立資料表後一併建立全文檢索索引；既有資料庫第一次建立索引時以現有資料填入，
+    # 避免空索引讓關鍵字搜尋查不到任何問題
+    if connection.dialect.name != "sqlite" or _search_table_exists(connection):
+        return
+    create_search_index(connection)
+    count = _populate_search_index(connection)
+    if count:
+        logger.info("已為既有資料建立全文檢索索引，共 %s 筆問題", count)
+
+
+def build_match_query(keyword):
+    """
+    將使用者輸入的關鍵字轉為 FTS5 MATCH 語法
+
+    以空白分隔的每個詞都視為一個片語（以雙引號包住），彼此為 AND 關係。
+    若有任何詞少於 3 個字元（trigram 無法比對），返回 None 讓呼叫端改用 LIKE。
+    """
+    terms = keyword.split()
+    if not terms or any(len(term) < MIN_TERM_LENGTH for term in terms):
+        return None
+    return " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def apply_keyword_search(db, query, keyword, id_column=Question.id):
+    """
+    在問題查詢上套用關鍵字搜尋
+
+    優先使用全文檢索並依 bm25 相關度排序；關鍵字太短或資料庫尚未建立索引時，
+    退回對標題、內容、摘要與回覆內容的 LIKE 比對（與全文檢索的比對範圍相同）。
+
+    Args:
+        id_column: 查詢中代表問題 ID 的欄位，例如 Question.id 或 QuestionListView.id
+    """
+    if not keyword or not keyword.strip():
+        return query
+    keyword = keyword.strip()
+
+    match_query = build_match_query(keyword)
+    if match_query and db.get_bind().dialect.name == "sqlite" and search_index_exists(db):
+        matches = text(f"""
+            SELECT rowid AS question_id, bm25({SEARCH_TABLE}, {BM25_WEIGHTS}) AS rank
+            FROM {SEARCH_TABLE}
+            WHERE {SEARCH_TABLE} MATCH :search_query
+        """).columns(column("question_id", Integer), column("rank", Float)).subquery("search_matches")
+        return (
+            query.join(matches, matches.c.question_id == id_column)
+            .params(search_query=match_query)
+            .order_by(matches.c.rank)
+        )
+
+    search_term = f"%{keyword}%"
+    return query.filter(
+        id_column.in_(
+            select(Question.id).where(
+                or_(
+                    Question.title.like(search_term),
+                    Question.content.like(search_term),
+                    Question.summary.like(search_term),
+                    exists().where(Report.question_id == Question.id, Report.reply_content.like(search_term))
+                )
+            )
+        )
+    )
+
+
+def search_index_exists(db):
+    """檢查資料庫是否已建立全文檢索資料表"""
+    return _search_table_exists(db)
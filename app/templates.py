@@ -1,3 +1,4 @@
+from fastapi.responses import StreamingResponse
 from fastapi.templating import Jinja2Templates
 from app.dependencies import has_permission
 
@@ -5,4 +6,26 @@ from app.dependencies import has_permission
 templates = Jinja2Templates(directory="templates")
 
 # 添加全局函數
-templates.env.globals["has_permission"] = has_permission 
\ No newline at end of file
+templates.env.globals["has_permission"] = has_permission
+
+# 串流輸出時每累積多少個模板片段送出一次，避免送出過多極小的區塊
+STREAM_BUFFER_SIZE = 64
+
+
+def stream_template(template_engine, name, context, status_code=200, headers=None):
+    """
+    以串流方式輸出模板
+
+    使用 Jinja 的 generate()（經 TemplateStream 緩衝）邊渲染邊送出，
+    context 中的資料列可以是迭代器，頁首在查詢結果讀完前就能先送到瀏覽器，
+    也不需要把整頁 HTML 組成一個字串。
+
+    Args:
+        template_engine: 路由模組使用的 Jinja2Templates 實例
+        name: 模板名稱
+        context: 模板變數（需包含 request）
+        headers: 額外的回應標頭
+    """
+    stream = template_engine.get_template(name).stream(context)
+    stream.enable_buffering(STREAM_BUFFER_SIZE)
+    return StreamingResponse(stream, status_code=status_code, headers=headers, media_type="text/html; charset=utf-8")
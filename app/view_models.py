@@ -0,0 +1,106 @@
+from typing import NamedTuple, Optional
+from datetime import datetime
+
+from app.services.list_view import load_department_list
+
+
+class DepartmentView(NamedTuple):
+    """模板顯示用的部門（唯讀）"""
+    id: int
+    code: Optional[str]
+    name: str
+    parent_id: Optional[int] = None
+
+
+class ReportView(NamedTuple):
+    """問題詳情頁的回覆（含回覆者與其部門名稱）"""
+    id: int
+    reply_content: str
+    reply_date: Optional[datetime]
+    user_id: int
+    username: str
+    department_id: int
+    department_name: str
+
+
+def department_view(value):
+    """由部門字典或資料列建立 DepartmentView"""
+    if isinstance(value, dict):
+        return DepartmentView(value["id"], value.get("code"), value["name"], value.get("parent_id"))
+    return DepartmentView(value.id, value.code, value.name, value.parent_id)
+
+
+def department_views(value):
+    """由列表資料表的部門 JSON（字串或已解析的列表）或部門資料列建立 DepartmentView 列表"""
+    return [department_view(item) for item in load_department_list(value)]
+
+
+# 列表頁與匯出查詢結果需要的欄位（皆為 question_list_view 的欄位）
+LIST_ITEM_FIELDS = (
+    "id", "title", "year", "question_date", "created_date", "status", "display_status",
+    "report_departments", "answer_departments", "question_version",
+)
+
+
+class QuestionListItem:
+    """問題列表與匯出查詢結果的一列"""
+    __slots__ = LIST_ITEM_FIELDS
+
+    def __init__(self, id, title, year, question_date, created_date, status, display_status,
+                 report_departments, answer_departments, question_version):
+        self.id = id
+        self.title = title
+        self.year = year
+        self.question_date = question_date
+        self.created_date = created_date
+        self.status = status
+        self.display_status = display_status
+        self.report_departments = report_departments
+        self.answer_departments = answer_departments
+        # questions.version，列表頁結案時送回以檢查衝突
+        self.question_version = question_version
+
+    @classmethod
+    def from_row(cls, row):
+        """由查詢結果列（含 LIST_ITEM_FIELDS 欄位）建立"""
+        mapping = row._mapping
+        return cls(
+            mapping["id"], mapping["title"], mapping["year"], mapping["question_date"],
+            mapping["created_date"], mapping["status"], mapping["display_status"],
+            department_views(mapping["report_departments"]),
+            department_views(mapping["answer_departments"]),
+            mapping["question_version"],
+        )
+
+
+class QuestionDetail:
+    """問題詳情與編輯頁的問題"""
+    __slots__ = (
+        "id", "title", "content", "year", "question_date", "created_date", "closed_date",
+        "status", "summary", "creator_id", "display_status",
+        "report_departments", "answer_departments",
+        "filtered_report_departments", "filtered_answer_departments",
+        "reports", "can_reply", "question_version",
+    )
+
+    def __init__(self, row, report_departments, answer_departments):
+        mapping = row._mapping
+        self.id = mapping["id"]
+        self.title = mapping["title"]
+        self.content = mapping["content"]
+        self.year = mapping["year"]
+        self.question_date = mapping["question_date"]
+        self.created_date = mapping["created_date"]
+        self.closed_date = mapping["closed_date"]
+        self.status = mapping["status"]
+        self.summary = mapping["summary"]
+        self.creator_id = mapping["creator_id"]
+        self.display_status = mapping.get("display_status")
+        self.report_departments = report_departments
+        self.answer_departments = answer_departments
+        self.filtered_report_departments = report_departments
+        self.filtered_answer_departments = answer_departments
+        self.reports = []
+        self.can_reply = False
+        # questions.version，編輯、結案與摘要更新時送回以檢查衝突
+        self.question_version = mapping.get("question_version")
@@ -0,0 +1,144 @@
+"""
+比較 async def 路由中直接使用同步 Session 與改用 AsyncSession（aiosqlite）時事件迴圈的阻塞情形
+
+在暫存資料庫建立測試資料，同時送出多個篩選計數查詢（列表頁最耗時的查詢），並以每 5ms
+喚醒一次的心跳工作量測事件迴圈最長的停頓時間：
+
+- blocking：在協程中直接呼叫同步 Session（舊的列表／詳情路由寫法），查詢期間事件迴圈完全停住，
+  所有請求依序排隊
+- async：透過 AsyncSession.run_sync 執行同一個查詢函數，查詢在 aiosqlite 的背景執行緒進行
+
+用法：python -m benchmarks.async_db [--questions 20000] [--concurrency 16]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import joinedload, sessionmaker
+
+from app.database import Base
+from app.models import user, department, question, role, report, question_list_view, dashboard_counter  # 確保載入所有模型
+from app.models.department import Department
+from app.models.question import Question, QuestionStatus, question_answer_department, question_report_department
+from app.models.role import Role
+from app.models.user import User
+from app.services.facets import invalidate_facet_cache, question_facets
+
+HEARTBEAT_INTERVAL = 0.005
+
+
+def seed(session_factory, question_count):
+    """建立 20 個處與指定數量的問題，返回一位只能看到其中 10 個處的用戶（已載入角色與部門）"""
+    with session_factory() as db:
+        departments = [Department(code=f"{i + 10:02d}00", name=f"處{i}") for i in range(20)]
+        role = Role(name="benchmark", permissions=["read_question"])
+        db.add_all(departments + [role])
+        db.flush()
+
+        reader = User(username="benchmark", is_active=True, department_id=departments[0].id)
+        reader.roles.append(role)
+        reader.departments.extend(departments[:10])
+        db.add(reader)
+        db.flush()
+
+        result = db.execute(
+            insert(Question.__table__).returning(Question.__table__.c.id, sort_by_parameter_order=True),
+            [
+                {
+                    "title": f"問題 {i}", "content": "內容", "year": 2020 + i % 5,
+                    "status": QuestionStatus.PENDING, "creator_id": reader.id,
+                }
+                for i in range(question_count)
+            ]
+        )
+        question_ids = list(result.scalars())
+        db.execute(insert(question_report_department), [
+            {"question_id": question_id, "department_id": departments[i % 20].id}
+            for i, question_id in enumerate(question_ids)
+        ])
+        db.execute(insert(question_answer_department), [
+            {"question_id": question_id, "department_id": departments[(i + 7) % 20].id}
+            for i, question_id in enumerate(question_ids)
+        ])
+        db.commit()
+
+        reader = db.query(User).options(joinedload(User.roles), joinedload(User.departments)).filter(
+            User.id == reader.id
+        ).one()
+        accessible_ids = frozenset(dept.id for dept in reader.departments)
+        db.expunge(reader)
+    return reader, accessible_ids
+
+
+def load_facets(db, reader, accessible_ids):
+    # 每次都清除快取，確保實際執行查詢
+    invalidate_facet_cache()
+    return question_facets(db, reader, accessible_ids)
+
+
+async def heartbeat(stop, gaps):
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        now = time.perf_counter()
+        gaps.append(now - last - HEARTBEAT_INTERVAL)
+        last = now
+
+
+async def run(mode, concurrency, sync_factory, async_factory, reader, accessible_ids):
+    async def blocking_request():
+        with sync_factory() as db:
+            load_facets(db, reader, accessible_ids)
+
+    async def async_request():
+        async with async_factory() as db:
+            await db.run_sync(load_facets, reader, accessible_ids)
+
+    request = blocking_request if mode == "blocking" else async_request
+    stop, gaps = asyncio.Event(), []
+    beat = asyncio.create_task(heartbeat(stop, gaps))
+    await asyncio.sleep(HEARTBEAT_INTERVAL * 2)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(request() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await beat
+    return elapsed, max(gaps, default=0.0)
+
+
+async def main(question_count, concurrency):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.db")
+        sync_engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=sync_engine)
+        sync_factory = sessionmaker(bind=sync_engine, autoflush=False)
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+        reader, accessible_ids = seed(sync_factory, question_count)
+        print(f"問題數 {question_count}，同時請求數 {concurrency}")
+
+        # 先各執行一次暖機（建立連線、載入 SQLite 頁面快取）
+        await run("blocking", 1, sync_factory, async_factory, reader, accessible_ids)
+        await run("async", 1, sync_factory, async_factory, reader, accessible_ids)
+
+        for mode in ("blocking", "async"):
+            elapsed, max_gap = await run(mode, concurrency, sync_factory, async_factory, reader, accessible_ids)
+            print(f"{mode:>8}: 總耗時 {elapsed * 1000:8.1f} ms，事件迴圈最長停頓 {max_gap * 1000:8.1f} ms")
+
+        await async_engine.dispose()
+        sync_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(main(args.questions, args.concurrency))
@@ -4,14 +4,14 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.responses import HTMLResponse, RedirectResponse
-from app.routers import auth, questions, reports, export, users, roles, departments
+from app.routers import auth, questions, reports, export, users, roles, departments, api, dashboard
 from app.database import Base, engine, SessionLocal, get_db
-from app.dependencies import get_current_user_optional, has_permission
+from app.dependencies import create_login_token, get_current_user_optional, has_permission, invalidate_access_cache
 from app.models.user import User
 from app.models.department import Department
 from app.models.role import Role
 from sqlalchemy.orm import Session
-from jose import JWTError, jwt
+from jose import jwt
 import os
 from datetime import datetime, timedelta
 import logging
@@ -101,28 +101,6 @@ templates = Jinja2Templates(directory="templates")
 # 添加全局模板函數
 templates.env.globals["has_permission"] = has_permission
 
-# 可選的OAuth2方案
-def optional_oauth2_scheme(request: Request):
-    token = request.cookies.get("access_token")
-    if token and token.startswith("Bearer "):
-        return token.replace("Bearer ", "")
-    return None
-
-# 可選的當前使用者
-def get_current_user_optional(db: Session = Depends(get_db), token: str = Depends(optional_oauth2_scheme)):
-    if not token:
-        return None
-    try:
-        from app.config import settings
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-    except JWTError:
-        return None
-    user = db.query(User).filter(User.username == username).first()
-    return user
-
 # 包含路由器
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(questions.router, prefix="/questions", tags=["Questions"])
@@ -131,10 +109,12 @@ app.include_router(export.router, prefix="/export", tags=["Export"])
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(roles.router, prefix="/roles", tags=["Roles"])
 app.include_router(departments.router, prefix="/departments", tags=["departments"])
+app.include_router(api.router, prefix="/api", tags=["API"])
+app.include_router(dashboard.router, prefix="/dashboard", tags=["Dashboard"])
 
 # 首頁
 @app.get("/", response_class=HTMLResponse)
-async def index(
+def index(
     request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_optional)
@@ -164,10 +144,11 @@ async def login(
     from app.routers.auth import login as auth_login
     try:
         return await auth_login(form_data, db)
-    except HTTPException:
+    except HTTPException as e:
         return templates.TemplateResponse(
             "login.html",
-            {"request": request, "error": "帳號或密碼不正確"}
+            {"request": request, "error": e.detail if e.status_code == 503 else "帳號或密碼不正確"},
+            status_code=e.status_code if e.status_code == 503 else 200
         )
 
 # 登出
@@ -269,9 +250,12 @@ async def sso_login(request: Request, ssoToken1: str = None, db: Session = Depen
                     db.commit()
                     db.refresh(user)
                 
+                # SSO 登入可能更新了用戶的部門與角色
+                invalidate_access_cache(user.id)
+                
                 # 創建 JWT token
-                access_token = create_access_token(
-                    data={"sub": account},
+                access_token = create_login_token(
+                    user, db,
                     expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
                 )
                 
@@ -0,0 +1,35 @@
+from app.database import Base, engine
+from app.models import user, department, question, role, report, question_list_view  # 確保載入所有模型
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 熱門查詢使用的複合索引（定義於各模型的 __table_args__ / Table 中）
+QUERY_INDEXES = [
+    ("questions", "ix_questions_year_status_created"),
+    ("question_report_department", "ix_question_report_department_department"),
+    ("question_answer_department", "ix_question_answer_department_department"),
+    ("reports", "ix_reports_question_reply_date"),
+    ("reports", "ix_reports_department_id"),
+    ("question_list_view", "ix_question_list_view_created"),
+    ("question_list_view", "ix_question_list_view_year_status_created"),
+]
+
+def add_query_indexes():
+    """為既有資料庫建立熱門查詢所需的索引（已存在時略過），並更新查詢規劃統計"""
+    try:
+        with engine.begin() as conn:
+            for table_name, index_name in QUERY_INDEXES:
+                table = Base.metadata.tables[table_name]
+                table.create(conn, checkfirst=True)
+                index = next(index for index in table.indexes if index.name == index_name)
+                index.create(conn, checkfirst=True)
+                logger.info(f"已建立索引 {index_name} ON {table_name}")
+            conn.exec_driver_sql("ANALYZE")
+    except Exception as e:
+        logger.error(f"建立索引失敗: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    add_query_indexes()
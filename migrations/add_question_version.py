@@ -0,0 +1,19 @@
+from app.database import engine
+from app.services.list_view import add_question_version_column
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def add_question_version():
+    """為既有資料庫的 questions 資料表加入樂觀鎖版本欄位（已存在時略過；應用程式啟動時也會自動補上）"""
+    try:
+        with engine.begin() as conn:
+            if not add_question_version_column(conn):
+                logger.info("questions.version 已存在，略過")
+    except Exception as e:
+        logger.error(f"新增版本欄位失敗: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    add_question_version()
@@ -0,0 +1,20 @@
+from app.database import engine
+from app.models import user, department, question, role, report, question_list_view, dashboard_counter  # 確保載入所有模型
+from app.services.dates import normalize_datetime_columns
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def normalize_datetimes():
+    """一次性將既有資料的日期時間欄位改寫為統一格式（YYYY-MM-DD HH:MM:SS.ffffff）"""
+    try:
+        with engine.begin() as conn:
+            count = normalize_datetime_columns(conn)
+        logger.info(f"已統一日期格式，共改寫 {count} 個欄位值")
+    except Exception as e:
+        logger.error(f"統一日期格式失敗: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    normalize_datetimes()
@@ -0,0 +1,20 @@
+from app.database import engine
+from app.models import user, department, question, role, report, question_list_view  # 確保載入所有模型
+from app.services.list_view import rebuild_list_view
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def rebuild_question_list_view():
+    """為既有資料庫建立（或重建）問題列表資料表與同步觸發器"""
+    try:
+        with engine.begin() as conn:
+            count = rebuild_list_view(conn)
+        logger.info(f"已重建問題列表資料表，共 {count} 筆問題")
+    except Exception as e:
+        logger.error(f"重建問題列表資料表失敗: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    rebuild_question_list_view()
@@ -0,0 +1,20 @@
+from app.database import engine
+from app.models import user, department, question, role, report  # 確保載入所有模型
+from app.services.search import rebuild_search_index
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def rebuild_question_search():
+    """為既有資料庫建立（或重建）問題與回覆的全文檢索索引"""
+    try:
+        with engine.begin() as conn:
+            count = rebuild_search_index(conn)
+        logger.info(f"已重建全文檢索索引，共 {count} 筆問題")
+    except Exception as e:
+        logger.error(f"重建全文檢索索引失敗: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    rebuild_question_search()
@@ -0,0 +1,22 @@
+from app.database import engine
+from app.models import user, department, question, role, report, question_list_view, dashboard_counter  # 確保載入所有模型
+from app.models.dashboard_counter import DashboardCounter
+from app.services.counters import reconcile_counters
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def reconcile_dashboard_counters():
+    """依實際資料校正儀表板計數（建議每晚排程執行，例如 cron: 0 2 * * *）"""
+    try:
+        with engine.begin() as conn:
+            DashboardCounter.__table__.create(conn, checkfirst=True)
+            corrected = reconcile_counters(conn)
+        logger.info(f"已校正儀表板計數，修正 {corrected} 筆")
+    except Exception as e:
+        logger.error(f"校正儀表板計數失敗: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    reconcile_dashboard_counters()
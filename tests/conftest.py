@@ -1,11 +1,15 @@
 import pytest
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 import os
 
-from app.database import Base, get_db
-from app.models import user, department, question, role, report # 預加載所有模型
+from app.database import Base, get_async_db, get_db
+from app.dependencies import invalidate_access_cache
+from app.services.facets import invalidate_facet_cache
+from app.services.question_detail import invalidate_question_detail
+from app.models import user, department, question, role, report, question_list_view, dashboard_counter # 預加載所有模型
 from main import app
 
 # 使用獨立的測試資料庫
@@ -32,6 +36,10 @@ def setup_database():
 
 @pytest.fixture
 def db_session():
+    # 每個測試都會回滾，ID 可能被重複使用，先清除行程內快取
+    invalidate_access_cache()
+    invalidate_facet_cache()
+    invalidate_question_detail()
     connection = engine.connect()
     transaction = connection.begin()
     session = TestingSessionLocal(bind=connection)
@@ -51,6 +59,12 @@ def client(db_session):
         finally:
             pass
     
+    # 非同步路由使用包裝同一個測試 Session 的 AsyncSession，才能看到測試交易中的資料
+    async def override_get_async_db():
+        yield AsyncSession(sync_session_class=lambda **kw: db_session)
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     yield TestClient(app)
     del app.dependency_overrides[get_db]
+    del app.dependency_overrides[get_async_db]
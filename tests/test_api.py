@@ -0,0 +1,109 @@
+import pytest
+from app.models.department import Department
+from app.models.question import Question, QuestionStatus
+from app.models.role import Role
+from app.models.user import User
+from app.dependencies import create_access_token
+
+@pytest.fixture
+def reader_headers(db_session):
+    role = Role(name="API 讀者", permissions=["read_question"])
+    own_dept = Department(code="4100", name="本處")
+    other_dept = Department(code="4200", name="他處")
+    db_session.add_all([role, own_dept, other_dept])
+    db_session.flush()
+
+    user = User(username="api_reader", is_active=True)
+    user.roles.append(role)
+    user.departments.append(own_dept)
+    db_session.add(user)
+    db_session.flush()
+
+    for i in range(3):
+        q = Question(title=f"API 問題 {i}", content="C", year=2024, creator_id=user.id)
+        q.report_departments.append(own_dept)
+        db_session.add(q)
+        db_session.flush()
+    hidden = Question(title="Hidden", content="C", year=2024, creator_id=user.id)
+    hidden.report_departments.append(other_dept)
+    db_session.add(hidden)
+    db_session.commit()
+
+    token = create_access_token(data={"sub": user.username})
+    return {"Cookie": f"access_token=Bearer {token}"}
+
+def test_api_questions_pagination_and_fields(client, reader_headers):
+    response = client.get("/api/questions?page_size=2&fields=id,title,report_departments", headers=reader_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["title"] for item in data["items"]] == ["API 問題 2", "API 問題 1"]
+    assert set(data["items"][0]) == {"id", "title", "report_departments"}
+    assert data["items"][0]["report_departments"][0]["name"] == "本處"
+    assert data["prev_cursor"] is None
+
+    response = client.get(f"/api/questions?page_size=2&fields=title&after={data['next_cursor']}", headers=reader_headers)
+    data = response.json()
+    assert data["items"] == [{"title": "API 問題 0"}]
+    assert data["next_cursor"] is None
+    assert data["prev_cursor"] is not None
+
+def test_api_questions_rejects_unknown_field(client, reader_headers):
+    response = client.get("/api/questions?fields=id,password_hash", headers=reader_headers)
+    assert response.status_code == 400
+
+def test_api_questions_requires_login(client):
+    response = client.get("/api/questions")
+    assert response.status_code == 401
+
+def test_api_question_facets(client, db_session, reader_headers):
+    closed = db_session.query(Question).filter(Question.title == "API 問題 0").one()
+    closed.status = QuestionStatus.CLOSED
+    db_session.commit()
+
+    response = client.get("/api/questions/facets", headers=reader_headers)
+    assert response.status_code == 200
+    facets = response.json()
+    # 只計算用戶可見的問題（他處的 Hidden 不計入）
+    assert facets["total"] == 3
+    assert facets["status"] == {"pending": 2, "closed": 1, "open": 2}
+    assert facets["year"] == {"2024": 3}
+    assert list(facets["department"].values()) == [3]
+
+def test_api_questions_pagination_with_tied_created_date(client, db_session, reader_headers):
+    from datetime import datetime
+    # 同一秒建立的問題（批次匯入、日期正規化後常見）須依 id 逐頁取得，不可略過
+    db_session.query(Question).update({Question.created_date: datetime(2024, 3, 1, 9, 0, 0)})
+    db_session.commit()
+
+    titles, cursor = [], None
+    for _ in range(3):
+        url = "/api/questions?page_size=2&fields=title" + (f"&after={cursor}" if cursor else "")
+        data = client.get(url, headers=reader_headers).json()
+        titles.extend(item["title"] for item in data["items"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    assert titles == ["API 問題 2", "API 問題 1", "API 問題 0"]
+
+def test_api_questions_pagination_reaches_null_created_date(client, db_session, reader_headers):
+    from sqlalchemy import text
+    # 以原始 SQL 寫入的舊資料沒有 created_date，須排在最後且仍可翻頁取得
+    db_session.execute(text("UPDATE questions SET created_date = NULL WHERE title IN ('API 問題 0', 'API 問題 2')"))
+    db_session.commit()
+
+    titles, cursor = [], None
+    for _ in range(3):
+        url = "/api/questions?page_size=1&fields=title" + (f"&after={cursor}" if cursor else "")
+        data = client.get(url, headers=reader_headers).json()
+        titles.extend(item["title"] for item in data["items"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    assert titles == ["API 問題 1", "API 問題 2", "API 問題 0"]
+
+    # 從最後一頁往回翻頁也能回到有日期的資料
+    data = client.get(f"/api/questions?page_size=1&fields=title&before={data['prev_cursor']}", headers=reader_headers).json()
+    assert [item["title"] for item in data["items"]] == ["API 問題 2"]
+    data = client.get(f"/api/questions?page_size=1&fields=title&before={data['prev_cursor']}", headers=reader_headers).json()
+    assert [item["title"] for item in data["items"]] == ["API 問題 1"]
+    assert data["prev_cursor"] is None
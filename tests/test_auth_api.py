@@ -77,3 +77,81 @@ def test_logout(client, auth_headers):
     # 檢查是否有 set-cookie 指令
     cookie_header = response.headers.get("set-cookie", "")
     assert "access_token=;" in cookie_header or 'access_token=""' in cookie_header or "Max-Age=0" in cookie_header
+
+def test_login_rejected_when_password_queue_full(client, test_user, test_password, monkeypatch):
+    import threading
+    from app.services import passwords
+
+    # 排隊名額用完時不等待 bcrypt，直接返回忙碌
+    monkeypatch.setattr(passwords, "_admission", threading.BoundedSemaphore(1))
+    passwords._admission.acquire()
+    response = client.post(
+        "/auth/login",
+        data={"username": test_user.username, "password": test_password},
+        follow_redirects=False
+    )
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+
+    passwords._admission.release()
+    response = client.post(
+        "/auth/login",
+        data={"username": test_user.username, "password": test_password},
+        follow_redirects=False
+    )
+    assert response.status_code == 303
+
+def test_principal_cache_skips_user_lookup(db_session, test_user, auth_token):
+    from sqlalchemy import event
+    from app.dependencies import Principal, authenticate_token, has_permission, invalidate_access_cache
+
+    principal = authenticate_token(auth_token, db_session)
+    assert isinstance(principal, Principal)
+    assert principal.id == test_user.id
+    assert principal.permissions == frozenset(["create_question", "read_question", "view_reports"])
+    assert has_permission(principal, "read_question") and not has_permission(principal, "manage_all")
+    assert test_user.department_id in principal.accessible_department_ids
+
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    connection = db_session.connection()
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    assert authenticate_token(auth_token, db_session) is principal
+    event.remove(connection, "before_cursor_execute", before_cursor_execute)
+    assert statements == []
+
+    # 用戶資料變更後重新載入
+    invalidate_access_cache(test_user.id)
+    assert authenticate_token(auth_token, db_session) is not principal
+    assert authenticate_token("invalid-token", db_session) is None
+
+
+def test_login_token_claims_skip_user_lookup(db_session, test_user):
+    from sqlalchemy import event
+    from app.dependencies import authenticate_token, create_login_token, invalidate_access_cache
+
+    token = create_login_token(test_user, db_session)
+
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    connection = db_session.connection()
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    principal = authenticate_token(token, db_session)
+    event.remove(connection, "before_cursor_execute", before_cursor_execute)
+    assert statements == []
+    assert principal.id == test_user.id
+    assert principal.permissions == frozenset(["create_question", "read_question", "view_reports"])
+    assert principal.department.id == test_user.department_id
+    assert test_user.department_id in principal.accessible_department_ids
+
+    # 權限變更後 token 內的授權版本過期，改由資料庫載入
+    invalidate_access_cache(test_user.id)
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    reloaded = authenticate_token(token, db_session)
+    event.remove(connection, "before_cursor_execute", before_cursor_execute)
+    assert statements
+    assert reloaded.id == test_user.id
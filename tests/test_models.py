@@ -76,3 +76,24 @@ def test_question_reports(db_session):
     assert len(question.reports) == 1
     assert question.reports[0].reply_content == "這是一個回覆"
     assert question.reports[0].user.username == "replier_r"
+
+def test_accessible_department_ids_follow_bureau_code(db_session):
+    from app.dependencies import get_accessible_department_ids, invalidate_access_cache
+
+    bureau = Department(code="0400", name="局")
+    section = Department(code="0401", name="科", parent=bureau)
+    other = Department(code="0500", name="他局")
+    user = User(username="bureau_user")
+    user.departments.append(bureau)
+    db_session.add_all([bureau, section, other, user])
+    db_session.commit()
+
+    accessible = get_accessible_department_ids(user, db_session)
+    assert accessible == frozenset({bureau.id, section.id})
+
+    # 快取命中時不重新計算，失效後重新計算
+    user.departments.append(other)
+    db_session.commit()
+    assert get_accessible_department_ids(user, db_session) == accessible
+    invalidate_access_cache(user.id)
+    assert other.id in get_accessible_department_ids(user, db_session)
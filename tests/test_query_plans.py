@@ -0,0 +1,130 @@
+import re
+import pytest
+from sqlalchemy import event, text
+from app.models.department import Department
+from app.models.question import Question
+from app.models.report import Report
+from app.models.role import Role
+from app.models.user import User
+from app.dependencies import create_access_token
+
+# 資料量會持續成長的資料表，查詢這些資料表時不允許全表掃描
+HOT_TABLES = {
+    "questions", "question_list_view", "reports",
+    "question_report_department", "question_answer_department",
+}
+
+@pytest.fixture
+def capture_queries(db_session):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    connection = db_session.connection()
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(connection, "before_cursor_execute", before_cursor_execute)
+
+@pytest.fixture
+def plan_data(db_session):
+    role = Role(name="查詢計畫", permissions=[
+        "read_question", "create_report", "read_report", "export_questions"
+    ])
+    dept = Department(code="3100", name="計畫處")
+    section = Department(code="3101", name="計畫科")
+    db_session.add_all([role, dept, section])
+    db_session.flush()
+
+    user = User(username="plan_test", is_active=True, department_id=dept.id)
+    user.set_password("plan123")
+    user.roles.append(role)
+    user.departments.append(dept)
+    db_session.add(user)
+    db_session.flush()
+
+    questions = []
+    for i in range(3):
+        q = Question(title=f"查詢計畫問題{i}", content="內容", year=2024, creator_id=user.id)
+        q.report_departments.append(dept)
+        q.answer_departments.append(section)
+        questions.append(q)
+    db_session.add_all(questions)
+    db_session.flush()
+    db_session.add(Report(question_id=questions[0].id, reply_content="回覆", user_id=user.id, department_id=dept.id))
+    db_session.commit()
+
+    token = create_access_token(data={"sub": user.username})
+    return {
+        "headers": {"Cookie": f"access_token=Bearer {token}"},
+        "department": dept,
+        "questions": questions,
+    }
+
+def _table_aliases(statement):
+    """從 SQL 取出 FROM / JOIN 後的資料表與別名對應"""
+    aliases = {}
+    for table, alias in re.findall(r"(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", statement, re.IGNORECASE):
+        aliases[table] = table
+        if alias and alias.upper() not in ("WHERE", "JOIN", "ON", "LEFT", "INNER", "ORDER", "GROUP", "LIMIT"):
+            aliases[alias] = table
+    return aliases
+
+def full_scans(db_session, statements):
+    """對每個查詢執行 EXPLAIN QUERY PLAN，返回對熱門資料表做全表掃描的查詢"""
+    problems = []
+    for statement, parameters in statements:
+        aliases = _table_aliases(statement)
+        plan = db_session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+        for row in plan:
+            detail = row[-1]
+            match = re.match(r"SCAN (\w+)", detail)
+            if match and "USING" not in detail and aliases.get(match.group(1)) in HOT_TABLES:
+                problems.append((detail, statement))
+    return problems
+
+def assert_no_full_scan(db_session, statements):
+    assert statements, "沒有擷取到任何查詢"
+    problems = full_scans(db_session, statements)
+    assert not problems, "\n\n".join(f"{detail}\n{statement}" for detail, statement in problems)
+
+def test_list_query_plans(client, db_session, plan_data, capture_queries):
+    headers = plan_data["headers"]
+    dept = plan_data["department"]
+    for url in (
+        "/questions/",
+        "/questions/?page_size=2",
+        f"/questions/?status=open&year=2024&department_id={dept.id}",
+    ):
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+    assert_no_full_scan(db_session, capture_queries)
+
+def test_detail_query_plans(client, db_session, plan_data, capture_queries):
+    question = plan_data["questions"][0]
+    response = client.get(f"/questions/{question.id}", headers=plan_data["headers"])
+    assert response.status_code == 200
+    assert_no_full_scan(db_session, capture_queries)
+
+def test_export_query_plans(client, db_session, plan_data, capture_queries):
+    headers = plan_data["headers"]
+    dept = plan_data["department"]
+    for url in (
+        f"/export/search?year=2024&department_id={dept.id}&keyword=查詢計畫",
+        "/export/questions/filtered?status=pending",
+    ):
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+    assert_no_full_scan(db_session, capture_queries)
+
+def test_reply_query_plans(client, db_session, plan_data, capture_queries):
+    question = plan_data["questions"][1]
+    response = client.post(f"/reports/{question.id}", json={"reply_content": "新回覆"}, headers=plan_data["headers"])
+    assert response.status_code == 200
+    assert_no_full_scan(db_session, capture_queries)
+
+def test_full_scan_is_detected(db_session):
+    # 確認檢查本身有效：依無索引欄位查詢必須被判定為全表掃描
+    statements = [("SELECT * FROM questions WHERE content = ?", ("內容",))]
+    assert full_scans(db_session, statements)
@@ -0,0 +1,221 @@
+import pytest
+from sqlalchemy import event
+from app.models.department import Department
+from app.models.question import Question, QuestionStatus
+from app.models.report import Report
+
+@pytest.fixture
+def count_queries(db_session):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    connection = db_session.connection()
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(connection, "before_cursor_execute", before_cursor_execute)
+
+def test_keyword_search_uses_fulltext_index(db_session):
+    from app.services.search import apply_keyword_search
+
+    in_title = Question(title="道路養護經費說明", content="內容")
+    in_reply = Question(title="其他問題", content="內容")
+    unrelated = Question(title="無關", content="內容")
+    db_session.add_all([in_title, in_reply, unrelated])
+    db_session.flush()
+    db_session.add(Report(question_id=in_reply.id, reply_content="已編列道路養護預算"))
+    db_session.commit()
+
+    results = apply_keyword_search(db_session, db_session.query(Question), "道路養護").all()
+    # 標題權重較高，排在回覆命中之前
+    assert [q.id for q in results] == [in_title.id, in_reply.id]
+
+    # 少於 3 個字元時退回 LIKE 比對
+    results = apply_keyword_search(db_session, db_session.query(Question), "無關").all()
+    assert [q.id for q in results] == [unrelated.id]
+
+    # LIKE 比對同樣搜尋回覆內容
+    results = apply_keyword_search(db_session, db_session.query(Question), "預算").all()
+    assert [q.id for q in results] == [in_reply.id]
+
+def test_search_index_backfilled_when_first_created(db_session):
+    from sqlalchemy import text
+    from app.database import Base
+    from app.services.search import SEARCH_TABLE, apply_keyword_search
+
+    question = Question(title="既有橋梁檢測問題", content="內容")
+    db_session.add(question)
+    db_session.commit()
+
+    # 模擬升級前沒有全文檢索索引的資料庫，啟動時 create_all 建立的索引須包含既有問題
+    connection = db_session.connection()
+    connection.execute(text(f"DROP TABLE {SEARCH_TABLE}"))
+    Base.metadata.create_all(bind=connection)
+
+    results = apply_keyword_search(db_session, db_session.query(Question), "橋梁檢測").all()
+    assert [q.id for q in results] == [question.id]
+
+def test_question_list_view_follows_writes(db_session):
+    from app.models.question_list_view import QuestionListView
+
+    dept = Department(code="2300", name="養護處")
+    db_session.add(dept)
+    question = Question(title="列表", content="C")
+    question.report_departments.append(dept)
+    db_session.add(question)
+    db_session.commit()
+
+    row = db_session.get(QuestionListView, question.id)
+    assert (row.status, row.display_status, row.reply_count) == ("pending", "PENDING", 0)
+    assert [d["name"] for d in row.report_departments] == ["養護處"]
+    assert row.answer_departments == []
+
+    # 回覆、結案與部門更名都會同步更新
+    db_session.add(Report(question_id=question.id, reply_content="R"))
+    question.status = QuestionStatus.CLOSED
+    dept.name = "新養護處"
+    db_session.commit()
+    db_session.expire_all()
+
+    row = db_session.get(QuestionListView, question.id)
+    assert (row.status, row.display_status, row.reply_count) == ("closed", "ANSWERED", 1)
+    assert row.first_reply_date is not None
+    assert [d["name"] for d in row.report_departments] == ["新養護處"]
+
+    db_session.delete(question)
+    db_session.commit()
+    assert db_session.get(QuestionListView, question.id) is None
+
+def test_question_list_view_backfilled_when_first_created(db_session):
+    from sqlalchemy import text
+    from app.database import Base
+    from app.models.question_list_view import QuestionListView
+
+    dept = Department(code="2400", name="既有處")
+    question = Question(title="既有問題", content="C")
+    question.report_departments.append(dept)
+    db_session.add_all([dept, question])
+    db_session.commit()
+
+    # 模擬升級前沒有列表資料表的資料庫，啟動時 create_all 建立的資料表須包含既有問題
+    connection = db_session.connection()
+    connection.execute(text(f"DROP TABLE {QuestionListView.__tablename__}"))
+    Base.metadata.create_all(bind=connection)
+
+    row = db_session.get(QuestionListView, question.id)
+    assert row.title == "既有問題"
+    assert [d["name"] for d in row.report_departments] == ["既有處"]
+
+def test_question_list_view_refilled_after_failed_backfill(db_session):
+    from sqlalchemy import text
+    from app.database import Base
+    from app.models.question_list_view import QuestionListView
+
+    question = Question(title="未填入", content="C")
+    db_session.add(question)
+    db_session.commit()
+
+    # 上次啟動已建立資料表但填入失敗：下次啟動補上缺少的資料列
+    db_session.execute(text(f"DELETE FROM {QuestionListView.__tablename__}"))
+    Base.metadata.create_all(bind=db_session.connection())
+    assert db_session.get(QuestionListView, question.id).title == "未填入"
+
+def test_list_view_startup_adds_question_version(db_session):
+    from sqlalchemy import text
+    from app.database import Base
+    from app.models.question_list_view import QuestionListView
+
+    question = Question(title="舊版問題", content="C")
+    db_session.add(question)
+    db_session.commit()
+
+    # 模擬 questions 尚無 version 欄位、也還沒有列表資料表的舊資料庫
+    connection = db_session.connection()
+    for name in connection.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%list_view%'"
+    )).scalars().all():
+        connection.execute(text(f"DROP TRIGGER {name}"))
+    connection.execute(text(f"DROP TABLE {QuestionListView.__tablename__}"))
+    connection.execute(text("ALTER TABLE questions DROP COLUMN version"))
+
+    Base.metadata.create_all(bind=connection)
+
+    assert connection.execute(text("SELECT version FROM questions WHERE id = :id"), {"id": question.id}).scalar() == 1
+    row = db_session.get(QuestionListView, question.id)
+    assert (row.title, row.question_version) == ("舊版問題", 1)
+
+    # 觸發器可正常寫入
+    db_session.add(Question(title="升級後新增", content="C"))
+    db_session.commit()
+
+def test_normalize_datetime_columns(db_session):
+    from datetime import datetime
+    from sqlalchemy import text
+    from app.services.dates import normalize_datetime_columns, typed_text
+
+    question = Question(title="日期", content="C")
+    db_session.add(question)
+    db_session.flush()
+    # 歷史資料以原始 SQL 寫入了各種格式
+    db_session.execute(text("""
+        UPDATE questions SET question_date = '2024-03-15', created_date = '2024-03-15T08:30:00Z',
+                             closed_date = '2024/03/20'
+        WHERE id = :id
+    """), {"id": question.id})
+
+    assert normalize_datetime_columns(db_session.connection(), batch_size=1) >= 3
+    stored = db_session.execute(
+        text("SELECT question_date, created_date, closed_date FROM questions WHERE id = :id"), {"id": question.id}
+    ).one()
+    assert tuple(stored) == ("2024-03-15 00:00:00.000000", "2024-03-15 08:30:00.000000", "2024-03-20 00:00:00.000000")
+    # 已是統一格式時不再改寫
+    assert normalize_datetime_columns(db_session.connection()) == 0
+
+    row = db_session.execute(typed_text("SELECT * FROM questions WHERE id = :id"), {"id": question.id}).one()
+    assert row.created_date == datetime(2024, 3, 15, 8, 30)
+
+def test_question_detail_loader_two_statements(db_session, count_queries):
+    from app.models.role import Role
+    from app.models.user import User
+    from app.services.question_detail import build_question_detail, visible_question_row
+
+    role = Role(name="詳情讀者", permissions=["read_question", "create_report"])
+    own_dept = Department(code="2600", name="本處")
+    other_dept = Department(code="2700", name="他處")
+    db_session.add_all([role, own_dept, other_dept])
+    db_session.flush()
+    reader = User(username="detail_reader", is_active=True, department_id=own_dept.id)
+    reader.roles.append(role)
+    reader.departments.append(own_dept)
+    other = User(username="detail_other", is_active=True, department_id=other_dept.id)
+    db_session.add_all([reader, other])
+
+    question = Question(title="詳情", content="內容")
+    question.report_departments.append(other_dept)
+    question.answer_departments.extend([own_dept, other_dept])
+    db_session.add(question)
+    db_session.flush()
+    for i in range(5):
+        db_session.add(Report(question_id=question.id, reply_content=f"他處回覆{i}", user_id=other.id))
+    db_session.commit()
+    # 預先載入用戶角色與部門，只計算載入詳情的查詢
+    question_id, own_dept_id, other_dept_id = question.id, own_dept.id, other_dept.id
+    reader.roles, reader.departments
+
+    count_queries.clear()
+    accessible = frozenset({own_dept_id})
+    row = visible_question_row(db_session, question_id, reader, accessible)
+    detail = build_question_detail(db_session, row, reader, accessible)
+    assert len(count_queries) == 2
+
+    assert detail.content == "內容"
+    assert detail.display_status == "PENDING"
+    # 只顯示可訪問的部門與本部門的回覆
+    assert [dept.name for dept in detail.filtered_answer_departments] == ["本處"]
+    assert detail.filtered_report_departments == []
+    assert detail.reports == []
+    assert detail.can_reply is True
+
+    # 不可見的問題在 SQL 中就被排除
+    assert visible_question_row(db_session, question_id, reader, frozenset({other_dept_id + 100})) is None
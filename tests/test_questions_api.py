@@ -1,8 +1,11 @@
 import pytest
+import re
+from datetime import datetime
 from app.models.user import User
 from app.models.role import Role
 from app.models.department import Department
 from app.models.question import Question, QuestionStatus
+from app.models.report import Report
 from app.dependencies import create_access_token
 
 @pytest.fixture
@@ -12,7 +15,7 @@ def admin_user(db_session):
         name="管理員", 
         permissions=[
             "create_question", "read_question", "edit_question", 
-            "delete_question", "close_question", "manage_all"
+            "delete_question", "close_question", "create_report", "manage_all"
         ]
     )
     db_session.add(role)
@@ -71,13 +74,20 @@ def test_list_questions_api(client, db_session, auth_headers, admin_user):
 
 def test_get_question_detail_api(client, db_session, auth_headers, admin_user):
     q = Question(title="Detail Test", content="UniqueContent", creator_id=admin_user.id)
+    q.answer_departments.append(db_session.get(Department, admin_user.department_id))
     db_session.add(q)
+    db_session.flush()
+    db_session.add(Report(question_id=q.id, reply_content="UniqueReply", reply_date=datetime(2024, 5, 1, 9, 30), user_id=admin_user.id))
     db_session.commit()
     
     response = client.get(f"/questions/{q.id}", headers=auth_headers)
     assert response.status_code == 200
     assert "Detail Test" in response.text
     assert "UniqueContent" in response.text
+    # 回覆與回覆者部門由 view model 提供
+    assert "UniqueReply" in response.text
+    assert "admin_test (管理部)" in response.text
+    assert "2024-05-01 09:30" in response.text
 
 def test_close_question_api(client, db_session, auth_headers, admin_user):
     q = Question(title="Close Test", content="Content", creator_id=admin_user.id, status=QuestionStatus.PENDING)
@@ -90,3 +100,630 @@ def test_close_question_api(client, db_session, auth_headers, admin_user):
     
     db_session.refresh(q)
     assert q.status == QuestionStatus.CLOSED
+
+def test_list_questions_keyset_pagination(client, db_session, auth_headers, admin_user):
+    dept = Department(code="1100", name="分頁處")
+    db_session.add(dept)
+    db_session.flush()
+    for i in range(3):
+        q = Question(
+            title=f"Page Test {i}",
+            content="Content",
+            creator_id=admin_user.id,
+            created_date=datetime(2024, 1, i + 1)
+        )
+        q.report_departments.append(dept)
+        db_session.add(q)
+    db_session.commit()
+
+    response = client.get("/questions/?page_size=2", headers=auth_headers)
+    assert response.status_code == 200
+    assert "Page Test 2" in response.text
+    assert "Page Test 1" in response.text
+    assert "Page Test 0" not in response.text
+
+    match = re.search(r'after=([A-Za-z0-9_\-]+)', response.text)
+    assert match is not None
+
+    response = client.get(f"/questions/?page_size=2&after={match.group(1)}", headers=auth_headers)
+    assert response.status_code == 200
+    assert "Page Test 0" in response.text
+    assert "Page Test 1" not in response.text
+    assert "before=" in response.text
+
+def test_list_questions_filters_by_accessible_departments(client, db_session):
+    role = Role(name="一般讀者", permissions=["read_question"])
+    own_dept = Department(code="1200", name="本處")
+    other_dept = Department(code="1300", name="他處")
+    db_session.add_all([role, own_dept, other_dept])
+    db_session.flush()
+
+    user = User(username="reader_test", is_active=True)
+    user.roles.append(role)
+    user.departments.append(own_dept)
+    db_session.add(user)
+    db_session.flush()
+
+    visible = Question(title="Visible Question", content="C", creator_id=user.id)
+    visible.answer_departments.append(own_dept)
+    hidden = Question(title="Hidden Question", content="C", creator_id=user.id)
+    hidden.report_departments.append(other_dept)
+    db_session.add_all([visible, hidden])
+    db_session.commit()
+
+    token = create_access_token(data={"sub": user.username})
+    headers = {"Cookie": f"access_token=Bearer {token}"}
+
+    response = client.get("/questions/", headers=headers)
+    assert response.status_code == 200
+    assert "Visible Question" in response.text
+    assert "Hidden Question" not in response.text
+
+    # 過濾無權訪問的部門時不返回任何問題
+    response = client.get(f"/questions/?department_id={other_dept.id}", headers=headers)
+    assert "Visible Question" not in response.text
+    assert "Hidden Question" not in response.text
+
+def test_list_questions_streams_response(client, db_session, auth_headers, admin_user):
+    for i in range(3):
+        db_session.add(Question(title=f"Stream Test {i}", content="C", creator_id=admin_user.id))
+    db_session.commit()
+
+    response = client.get("/questions/", headers=auth_headers)
+    assert response.status_code == 200
+    # 串流回應不會預先計算 Content-Length
+    assert "content-length" not in response.headers
+    assert response.text.count("Stream Test") == 3
+    assert response.text.rstrip().endswith("</html>")
+
+def test_list_questions_conditional_get(client, db_session, auth_headers, admin_user):
+    q = Question(title="ETag List", content="C", creator_id=admin_user.id)
+    db_session.add(q)
+    db_session.commit()
+
+    from sqlalchemy import event
+
+    page_queries = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if "FROM question_list_view" in statement and "LIMIT" in statement:
+            page_queries.append(statement)
+
+    # 沒有 If-None-Match 時只查詢一次本頁資料列，ETag 由同一批資料列計算
+    connection = db_session.connection()
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    response = client.get("/questions/", headers=auth_headers)
+    event.remove(connection, "before_cursor_execute", before_cursor_execute)
+    assert len(page_queries) == 1
+    etag = response.headers["etag"]
+    response = client.get("/questions/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    # 問題異動後 ETag 改變，重新返回完整頁面
+    q.title = "ETag List Changed"
+    db_session.commit()
+    response = client.get("/questions/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert "ETag List Changed" in response.text
+    assert response.headers["etag"] != etag
+    response = client.get("/questions/", headers={**auth_headers, "If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+
+def test_get_question_conditional_get(client, db_session, auth_headers, admin_user):
+    q = Question(title="ETag Detail", content="C", creator_id=admin_user.id)
+    db_session.add(q)
+    db_session.commit()
+
+    response = client.get(f"/questions/{q.id}", headers=auth_headers)
+    etag = response.headers["etag"]
+    # 詳情已快取，重複瀏覽不必查詢資料庫
+    from app.services.question_detail import _detail_cache
+    assert _detail_cache.get(q.id)
+    response = client.get(f"/questions/{q.id}", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    # 新增回覆會清除詳情快取並讓問題版本遞增
+    response = client.post(f"/reports/{q.id}", json={"reply_content": "NewReply"}, headers=auth_headers)
+    assert response.status_code == 200
+    response = client.get(f"/questions/{q.id}", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert "NewReply" in response.text
+
+def test_dashboard_counters(client, db_session, auth_headers, admin_user):
+    from sqlalchemy import text
+    from app.services.counters import load_dashboard_counters, question_state, reconcile_counters, record_reply, record_state_change
+
+    dept = db_session.get(Department, admin_user.department_id)
+    q = Question(title="Dashboard", content="C", creator_id=admin_user.id)
+    q.answer_departments.append(dept)
+    db_session.add(q)
+    db_session.flush()
+    record_state_change(db_session, q.id, None, "pending")
+
+    db_session.add(Report(question_id=q.id, reply_content="R", reply_date=datetime.utcnow(), user_id=admin_user.id))
+    db_session.flush()
+    record_state_change(db_session, q.id, "pending", question_state(db_session, q.id))
+    record_reply(db_session, admin_user)
+    db_session.commit()
+
+    expected = {"pending": 0, "answered": 1, "closed": 0, "replies_this_week": 1}
+    assert load_dashboard_counters(db_session) == {0: expected, dept.id: expected}
+
+    response = client.get("/dashboard/", headers=auth_headers)
+    assert response.status_code == 200
+    assert "管理部" in response.text
+
+    # 計數與實際資料一致時不需校正；產生誤差後由校正作業修正
+    assert reconcile_counters(db_session.connection()) == 0
+    db_session.execute(text("UPDATE dashboard_counters SET value = 5 WHERE name = 'answered'"))
+    assert reconcile_counters(db_session.connection()) == 2
+    assert load_dashboard_counters(db_session) == {0: expected, dept.id: expected}
+
+def test_import_questions_csv(client, db_session, auth_headers, admin_user):
+    from app.services.counters import load_dashboard_counters
+
+    answer_dept = Department(code="0200", name="回答處")
+    db_session.add(answer_dept)
+    db_session.commit()
+
+    csv_content = (
+        "標題,內容,年度,問題日期,填報單位代碼,回答單位代碼\n"
+        "匯入問題一,內容一,113,2024-03-01,0100,0200\n"
+        ",缺少標題,113,2024-03-01,0100,0200\n"
+        "匯入問題二,內容二,,2024/03/02,0100,9900\n"
+        "匯入問題三,內容三,,,0100,0200、0100\n"
+        "匯入問題四,內容四,112,2023-12-31,0100,0200\n"
+    ).encode("utf-8-sig")
+    response = client.post(
+        "/questions/import",
+        files={"file": ("questions.csv", csv_content, "text/csv")},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert "已匯入 2 筆問題" in response.text
+    assert "標題不可空白" in response.text
+    assert "部門代碼不存在: 9900" in response.text
+    assert "同一個部門不能同時是報告部門和回答部門" in response.text
+
+    imported = db_session.query(Question).filter(Question.title.like("匯入問題%")).order_by(Question.id).all()
+    assert [q.title for q in imported] == ["匯入問題一", "匯入問題四"]
+    assert imported[0].question_date == datetime(2024, 3, 1)
+    assert imported[1].year == 112
+    assert [d.id for d in imported[0].report_departments] == [admin_user.department_id]
+    assert [d.id for d in imported[0].answer_departments] == [answer_dept.id]
+    assert load_dashboard_counters(db_session)[answer_dept.id]["pending"] == 2
+
+    response = client.post(
+        "/questions/import",
+        files={"file": ("questions.txt", b"title", "text/plain")},
+        headers=auth_headers
+    )
+    assert response.status_code == 400
+
+def test_bulk_close_and_reassign(client, db_session, auth_headers, admin_user):
+    from sqlalchemy import text
+    from app.services.counters import load_dashboard_counters, record_state_change
+
+    admin_dept = db_session.get(Department, admin_user.department_id)
+    old_dept = Department(code="0300", name="原回答處")
+    new_dept = Department(code="0400", name="新回答處")
+    db_session.add_all([old_dept, new_dept])
+    db_session.flush()
+
+    questions = []
+    for i in range(3):
+        q = Question(title=f"Bulk {i}", content="C", creator_id=admin_user.id)
+        q.report_departments.append(admin_dept)
+        q.answer_departments.append(old_dept)
+        db_session.add(q)
+        db_session.flush()
+        record_state_change(db_session, q.id, None, "pending")
+        questions.append(q)
+    db_session.commit()
+    ids = [q.id for q in questions]
+
+    response = client.put("/questions/bulk/reassign", json={"question_ids": ids, "answer_department_ids": [new_dept.id]}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["updated"] == ids
+    db_session.expire_all()
+    assert all([d.id for d in q.answer_departments] == [new_dept.id] for q in questions)
+    counters = load_dashboard_counters(db_session)
+    assert counters[old_dept.id]["pending"] == 0
+    assert counters[new_dept.id]["pending"] == 3
+    assert counters[0]["pending"] == 3
+
+    response = client.put("/questions/bulk/close", json={"question_ids": ids[:2], "summary": "年度結案"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["closed"] == ids[:2]
+    response = client.put("/questions/bulk/close", json={"question_ids": ids, "summary": "年度結案"}, headers=auth_headers)
+    assert response.json()["closed"] == ids[2:]
+    assert response.json()["skipped"] == ids[:2]
+    summaries = db_session.execute(text("SELECT summary FROM questions WHERE lower(status) = 'closed' ORDER BY id")).scalars().all()
+    assert summaries == ["年度結案"] * 3
+    counters = load_dashboard_counters(db_session)
+    assert counters[new_dept.id]["pending"] == 0
+    assert counters[new_dept.id]["closed"] == 3
+
+    # 填報部門不能同時是回答部門；任何問題不存在時整批拒絕
+    response = client.put("/questions/bulk/reassign", json={"question_ids": ids, "answer_department_ids": [admin_dept.id]}, headers=auth_headers)
+    assert response.status_code == 400
+    response = client.put("/questions/bulk/close", json={"question_ids": ids + [999999]}, headers=auth_headers)
+    assert response.status_code == 404
+
+def test_create_question_constant_round_trips(client, db_session, auth_headers, admin_user):
+    from sqlalchemy import event, text
+    from app.dependencies import authenticate_token
+
+    departments = [Department(code=f"{50 + i:02d}00", name=f"回答處{i}") for i in range(6)]
+    db_session.add_all(departments)
+    db_session.commit()
+    # 先載入已認證用戶快取與部門 ID，只計算建立問題本身的語句
+    authenticate_token(auth_headers["Cookie"].split("Bearer ", 1)[1], db_session)
+    department_ids = [dept.id for dept in departments]
+    report_department_id = admin_user.department_id
+
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    connection = db_session.connection()
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    counts = []
+    for answer_department_ids in (department_ids[:1], department_ids):
+        statements.clear()
+        response = client.post("/questions/", json={
+            "title": "多部門問題",
+            "content": "C",
+            "report_department_ids": [report_department_id],
+            "answer_department_ids": answer_department_ids,
+        }, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["success"] is True
+        counts.append(len([s for s in statements if not s.lstrip().upper().startswith(("SAVEPOINT", "RELEASE"))]))
+    event.remove(connection, "before_cursor_execute", before_cursor_execute)
+    assert counts[0] == counts[1]
+
+    question_id = response.json()["question_id"]
+    answer_ids = {row.department_id for row in db_session.execute(
+        text("SELECT department_id FROM question_answer_department WHERE question_id = :id"), {"id": question_id}
+    )}
+    assert answer_ids == set(department_ids)
+
+def test_edit_question_writes_only_link_changes(client, db_session, auth_headers, admin_user):
+    from sqlalchemy import event, text
+
+    admin_dept = db_session.get(Department, admin_user.department_id)
+    answer_a = Department(code="0600", name="回答處A")
+    answer_b = Department(code="0700", name="回答處B")
+    q = Question(title="Edit Links", content="C", creator_id=admin_user.id)
+    q.report_departments.append(admin_dept)
+    q.answer_departments.append(answer_a)
+    db_session.add_all([answer_a, answer_b, q])
+    db_session.commit()
+    question_id, report_id, a_id, b_id = q.id, admin_dept.id, answer_a.id, answer_b.id
+
+    link_writes = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("INSERT", "DELETE")) and "_department" in statement:
+            link_writes.append(statement)
+
+    versions = iter(range(1, 10))
+    def save(answer_ids):
+        response = client.post(f"/questions/{question_id}/edit", data={
+            "title": "Edit Links", "content": "C", "version": str(next(versions)),
+            "report_department_ids": [report_id], "answer_department_ids": answer_ids,
+        }, headers=auth_headers, follow_redirects=False)
+        assert response.status_code == 303
+
+    connection = db_session.connection()
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    save([a_id])
+    assert link_writes == []
+    save([a_id, b_id])
+    assert len(link_writes) == 1 and link_writes[0].lstrip().startswith("INSERT INTO question_answer_department")
+    link_writes.clear()
+    save([b_id])
+    assert len(link_writes) == 1 and link_writes[0].lstrip().startswith("DELETE FROM question_answer_department")
+    event.remove(connection, "before_cursor_execute", before_cursor_execute)
+
+    answer_ids = db_session.execute(
+        text("SELECT department_id FROM question_answer_department WHERE question_id = :id"), {"id": question_id}
+    ).scalars().all()
+    assert answer_ids == [b_id]
+
+def test_question_writes_detect_version_conflicts(client, db_session, auth_headers, admin_user):
+    from sqlalchemy import text
+
+    dept = db_session.get(Department, admin_user.department_id)
+    q = Question(title="Concurrent", content="C", creator_id=admin_user.id)
+    q.report_departments.append(dept)
+    db_session.add(q)
+    db_session.commit()
+    question_id, dept_id = q.id, dept.id
+    assert q.version == 1
+
+    # 兩位用戶都讀到版本 1，先送出的更新成功，後送出的得到衝突回應
+    response = client.put(f"/questions/{question_id}/summary", json={"summary": "第一位", "version": 1}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+
+    response = client.put(f"/questions/{question_id}/close", json={"summary": "第二位", "version": 1}, headers=auth_headers)
+    assert response.status_code == 409
+    assert response.json()["conflict"] is True
+
+    response = client.post(f"/questions/{question_id}/edit", data={
+        "title": "覆蓋標題", "content": "C", "version": "1",
+        "report_department_ids": [dept_id], "answer_department_ids": [dept_id],
+    }, headers=auth_headers, follow_redirects=False)
+    assert response.status_code == 409
+
+    row = db_session.execute(text("SELECT title, summary, version FROM questions WHERE id = :id"), {"id": question_id}).one()
+    assert tuple(row) == ("Concurrent", "第一位", 2)
+
+    # 未送出或送出無效的版本時拒絕更新，不以目前版本代替
+    response = client.put(f"/questions/{question_id}/summary", json={"summary": "無版本"}, headers=auth_headers)
+    assert response.status_code == 400
+    response = client.put(f"/questions/{question_id}/close", json={"summary": "無版本", "version": "abc"}, headers=auth_headers)
+    assert response.status_code == 400
+    response = client.post(f"/questions/{question_id}/edit", data={
+        "title": "無版本標題", "content": "C",
+        "report_department_ids": [dept_id], "answer_department_ids": [dept_id],
+    }, headers=auth_headers, follow_redirects=False)
+    assert response.status_code == 400
+    row = db_session.execute(text("SELECT title, summary, version FROM questions WHERE id = :id"), {"id": question_id}).one()
+    assert tuple(row) == ("Concurrent", "第一位", 2)
+
+    # 列表頁的結案按鈕帶有目前版本
+    response = client.get("/questions/", headers=auth_headers)
+    assert f'data-id="{question_id}" data-version="2"' in response.text
+
+    response = client.put(f"/questions/{question_id}/close", json={"summary": "結案", "version": 2}, headers=auth_headers)
+    assert response.status_code == 200
+    assert db_session.execute(text("SELECT version FROM questions WHERE id = :id"), {"id": question_id}).scalar() == 3
+
+def test_edit_question_conflict_rerenders_dated_question(client, db_session, auth_headers, admin_user):
+    dept = db_session.get(Department, admin_user.department_id)
+    q = Question(title="Dated", content="C", creator_id=admin_user.id, question_date=datetime(2024, 5, 6), version=2)
+    q.report_departments.append(dept)
+    db_session.add(q)
+    db_session.commit()
+
+    # 以舊版本送出時重新顯示表單，日期欄位須能正常格式化
+    response = client.post(f"/questions/{q.id}/edit", data={
+        "title": "Dated", "content": "C", "version": "1", "question_date": "2024-05-07",
+        "report_department_ids": [dept.id], "answer_department_ids": [dept.id],
+    }, headers=auth_headers, follow_redirects=False)
+    assert response.status_code == 409
+    assert 'value="2024-05-06"' in response.text
+
+def test_edit_question_updates_dashboard_counters(client, db_session, auth_headers, admin_user):
+    from app.services.counters import load_dashboard_counters, reconcile_counters
+
+    report_dept = db_session.get(Department, admin_user.department_id)
+    answer_a = Department(code="0800", name="計數處A")
+    answer_b = Department(code="0900", name="計數處B")
+    db_session.add_all([answer_a, answer_b])
+    db_session.commit()
+    response = client.post("/questions/", json={
+        "title": "計數", "content": "C", "year": 2024,
+        "report_department_ids": [report_dept.id], "answer_department_ids": [answer_a.id],
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    question_id = response.json()["question_id"]
+
+    # 更換回答部門並設定結案日期，計數移到新局/處的已結案
+    response = client.post(f"/questions/{question_id}/edit", data={
+        "title": "計數", "content": "C", "version": "1", "closed_date": "2024-06-01",
+        "report_department_ids": [report_dept.id], "answer_department_ids": [answer_b.id],
+    }, headers=auth_headers, follow_redirects=False)
+    assert response.status_code == 303
+
+    counters = load_dashboard_counters(db_session, [0, answer_a.id, answer_b.id])
+    assert counters[0]["pending"] == 0 and counters[0]["closed"] == 1
+    assert counters[answer_a.id]["pending"] == 0
+    assert counters[answer_b.id]["closed"] == 1
+    assert reconcile_counters(db_session.connection()) == 0
+
+def test_question_writes_refresh_facet_counts(client, db_session, auth_headers, admin_user):
+    dept = db_session.get(Department, admin_user.department_id)
+    answer_dept = Department(code="1200", name="計數回答處")
+    db_session.add(answer_dept)
+    db_session.commit()
+
+    def facets():
+        response = client.get("/api/questions/facets", headers=auth_headers)
+        assert response.status_code == 200
+        return response.json()
+
+    before = facets()
+    response = client.post("/questions/", json={
+        "title": "計數", "content": "C", "year": 2024,
+        "report_department_ids": [dept.id], "answer_department_ids": [answer_dept.id],
+    }, headers=auth_headers)
+    question_id = response.json()["question_id"]
+    # 新增與結案後計數立即更新，不等快取到期
+    assert facets()["total"] == before["total"] + 1
+
+    response = client.put("/questions/bulk/close", json={"question_ids": [question_id], "summary": "結案"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert facets()["status"].get("closed", 0) == before["status"].get("closed", 0) + 1
+
+def test_department_rename_refreshes_cached_principal(client, db_session):
+    role = Role(name="部門管理員", permissions=["manage_departments"])
+    dept = Department(code="1300", name="舊處名")
+    user = User(username="dept_manager", is_active=True)
+    user.roles.append(role)
+    user.departments.append(dept)
+    db_session.add_all([role, dept, user])
+    db_session.commit()
+    headers = {"Cookie": f"access_token=Bearer {create_access_token(data={'sub': user.username})}"}
+
+    assert "舊處名" in client.get("/", headers=headers).text
+    response = client.post(f"/departments/{dept.id}/edit", data={"name": "新處名"}, headers=headers, follow_redirects=False)
+    assert response.status_code == 303
+    # 快取的用戶資料須反映新的部門名稱
+    text = client.get("/", headers=headers).text
+    assert "新處名" in text and "舊處名" not in text
+
+def test_dashboard_counters_follow_bureau_code(client, db_session):
+    from app.services.counters import load_dashboard_counters, record_state_change
+
+    # 科的 parent_id 未設定或指向其他部門時，仍依代碼前兩碼歸入局/處
+    bureau_a = Department(code="1400", name="甲處")
+    bureau_b = Department(code="1500", name="乙處")
+    section = Department(code="1410", name="甲處一科", parent=bureau_b)
+    role = Role(name="儀表板讀者", permissions=["read_question"])
+    user = User(username="dashboard_reader", is_active=True)
+    user.roles.append(role)
+    user.departments.extend([bureau_a, bureau_b])
+    q = Question(title="跨處", content="C")
+    q.answer_departments.extend([section, bureau_b])
+    db_session.add_all([bureau_a, bureau_b, section, role, user, q])
+    db_session.flush()
+    record_state_change(db_session, q.id, None, "pending")
+    db_session.commit()
+
+    counters = load_dashboard_counters(db_session, [bureau_a.id, bureau_b.id, section.id])
+    assert counters[bureau_a.id]["pending"] == 1
+    assert counters[bureau_b.id]["pending"] == 1
+    assert section.id not in counters
+
+    # 可訪問多個局/處時不顯示會重複計算的合計
+    headers = {"Cookie": f"access_token=Bearer {create_access_token(data={'sub': user.username})}"}
+    response = client.get("/dashboard/", headers=headers)
+    assert response.status_code == 200
+    assert "待回覆問題" not in response.text
+    assert "甲處" in response.text and "乙處" in response.text
+
+def test_question_writes_refresh_cached_detail(client, db_session, auth_headers, admin_user):
+    # 回覆編輯與部門更名需要額外權限
+    admin_user.roles.append(Role(name="詳情維護", permissions=["edit_report", "manage_departments"]))
+    dept = db_session.get(Department, admin_user.department_id)
+    q = Question(title="快取詳情", content="C", creator_id=admin_user.id)
+    q.report_departments.append(dept)
+    q.answer_departments.append(dept)
+    db_session.add(q)
+    db_session.commit()
+    question_id, dept_id = q.id, dept.id
+
+    def detail():
+        response = client.get(f"/questions/{question_id}", headers=auth_headers)
+        assert response.status_code == 200
+        return response.text
+
+    # 每次寫入後，已快取的詳情頁須立即反映新資料
+    assert "快取詳情" in detail()
+    response = client.post(f"/reports/{question_id}", json={"reply_content": "第一次回覆"}, headers=auth_headers)
+    assert response.status_code == 200
+    report_id = response.json()["report_id"]
+    assert "第一次回覆" in detail()
+
+    response = client.put(f"/reports/{report_id}", json={"reply_content": "修改後回覆"}, headers=auth_headers)
+    assert response.status_code == 200
+    text = detail()
+    assert "修改後回覆" in text and "第一次回覆" not in text
+
+    response = client.put(f"/questions/{question_id}/summary", json={"summary": "新摘要", "version": 1}, headers=auth_headers)
+    assert response.status_code == 200
+    assert "新摘要" in detail()
+
+    response = client.post(f"/questions/{question_id}/edit", data={
+        "title": "改過的標題", "content": "C", "version": "2",
+        "report_department_ids": [dept_id], "answer_department_ids": [dept_id],
+    }, headers=auth_headers, follow_redirects=False)
+    assert response.status_code == 303
+    assert "改過的標題" in detail()
+
+    response = client.post(f"/departments/{dept_id}/edit", data={"name": "更名處"}, headers=auth_headers, follow_redirects=False)
+    assert response.status_code == 303
+    text = detail()
+    assert "更名處" in text and "管理部" not in text
+
+    response = client.put(f"/questions/{question_id}/close", json={"summary": "結案摘要", "version": 3}, headers=auth_headers)
+    assert response.status_code == 200
+    assert "結案摘要" in detail()
+
+def test_question_pages_read_through_async_session(tmp_path):
+    import asyncio
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.database import Base, get_async_db, get_db
+    from app.dependencies import invalidate_access_cache
+    from app.services.question_detail import invalidate_question_detail
+    from main import app
+
+    # 使用實際的 aiosqlite AsyncSession（另一個已提交資料的資料庫），而非包裝測試交易的 Session
+    invalidate_access_cache()
+    invalidate_question_detail()
+    url = f"sqlite:///{tmp_path / 'async_qa.db'}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://", 1))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    with SessionLocal() as db:
+        role = Role(name="非同步讀者", permissions=["read_question"])
+        dept = Department(code="1600", name="非同步處")
+        user = User(username="async_reader", is_active=True)
+        user.roles.append(role)
+        user.departments.append(dept)
+        q = Question(title="非同步問題", content="AsyncContent")
+        q.answer_departments.append(dept)
+        db.add_all([role, dept, user, q])
+        db.commit()
+        question_id = q.id
+
+    def override_get_db():
+        with SessionLocal() as db:
+            yield db
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    try:
+        client = TestClient(app)
+        headers = {"Cookie": f"access_token=Bearer {create_access_token(data={'sub': 'async_reader'})}"}
+        response = client.get("/questions/", headers=headers)
+        assert response.status_code == 200
+        assert "非同步問題" in response.text
+
+        response = client.get(f"/questions/{question_id}", headers=headers)
+        assert response.status_code == 200
+        assert "AsyncContent" in response.text and "非同步處" in response.text
+    finally:
+        del app.dependency_overrides[get_db]
+        del app.dependency_overrides[get_async_db]
+        invalidate_access_cache()
+        invalidate_question_detail()
+        engine.dispose()
+        asyncio.run(async_engine.dispose())
+
+def test_list_item_view_model_from_list_view_row(db_session, admin_user):
+    from sqlalchemy import text
+    from app.view_models import LIST_ITEM_FIELDS, DepartmentView, QuestionListItem
+
+    report_dept = db_session.get(Department, admin_user.department_id)
+    answer_dept = Department(code="1700", name="檢視處")
+    q = Question(title="檢視模型", content="C", creator_id=admin_user.id, year=2024)
+    q.report_departments.append(report_dept)
+    q.answer_departments.append(answer_dept)
+    db_session.add_all([answer_dept, q])
+    db_session.commit()
+
+    row = db_session.execute(
+        text(f"SELECT {', '.join(LIST_ITEM_FIELDS)} FROM question_list_view WHERE id = :id"), {"id": q.id}
+    ).one()
+    item = QuestionListItem.from_row(row)
+    assert (item.id, item.title, item.year, item.question_version) == (q.id, "檢視模型", 2024, 1)
+    # 部門 JSON 解析為唯讀的 DepartmentView
+    assert item.report_departments == [DepartmentView(report_dept.id, "0100", "管理部", None)]
+    assert [dept.name for dept in item.answer_departments] == ["檢視處"]
+    # 以 __slots__ 儲存，不建立實例字典
+    assert not hasattr(item, "__dict__")
+    with pytest.raises(AttributeError):
+        item.extra = 1